@@ -0,0 +1,131 @@
+"""
+Composants de la page Dashboard
+
+Les filtres et les graphiques qui ont leurs propres widgets sont des
+fragments (st.fragment) : un widget ne relance que le fragment qui le
+contient, pas toute la page (sélecteur de période, sidebar). Les séries
+viennent de get_period_overview, en cache par période et filtres.
+"""
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+from data import get_period_overview
+
+
+def sidebar_stats(kpis: dict) -> None:
+    """Carte de la sidebar (hors fragment : un fragment ne peut pas écrire dans st.sidebar)"""
+    with st.sidebar:
+        st.markdown(f"""
+        <div class="sidebar-stats">
+            <div class="stat-label">This Month</div>
+            <div class="stat-value">{kpis['current']['total']:.0f} CHF</div>
+            <div class="stat-secondary">Last Month: {kpis['previous']['total']:.0f} CHF</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def kpi_cards(kpis: dict) -> None:
+    """Total, transactions, panier moyen et magasins, comparés au mois précédent"""
+    current, last_month = kpis["current"], kpis["previous"]
+    cols_kpis = st.columns(4)
+
+    cols_kpis[0].metric(
+        label="Total Spent",
+        value=f"{current['total']:.0f} CHF",
+        delta=f"{current['total'] - last_month['total']:.0f} CHF",
+        delta_color="inverse",
+        help="Total amount spent this month",
+        border=True,
+    )
+    cols_kpis[1].metric(
+        "Transactions", f"{current['transactions']:,}",
+        delta=f"{current['transactions'] - last_month['transactions']:,}",
+        delta_color="off",
+        help="Total number of transactions this month",
+        border=True,
+    )
+    cols_kpis[2].metric(
+        "Average", f"{current['average']:.0f} CHF",
+        delta=f"{current['average'] - last_month['average']:.0f} CHF",
+        delta_color="inverse",
+        help="Average amount spent per transaction this month",
+        border=True,
+    )
+    cols_kpis[3].metric(
+        "Stores", f"{current['stores']}",
+        delta=f"{current['stores'] - last_month['stores']}",
+        delta_color="off",
+        help="Total number of stores this month",
+        border=True,
+    )
+
+
+@st.fragment
+def spending_chart(daily: pd.DataFrame) -> None:
+    """Dépenses par jour et par groupe ; le choix cumulé / quotidien ne relance que ce graphique"""
+    cumulated_spending = st.radio(
+        "Cumulated Spending",
+        ["Yes", "No"],
+        index=1,
+        key="overview_cumulated",
+        label_visibility="collapsed",
+        horizontal=True
+    )
+    st.line_chart(
+        daily,
+        x="transaction_date",
+        y="cumulative_amount" if cumulated_spending == "Yes" else "amount",
+        color="group"
+    )
+
+
+def store_chart(by_store: pd.DataFrame) -> None:
+    """Dépenses par magasin"""
+    st.bar_chart(
+        by_store,
+        x="store_name",
+        y="amount",
+        color="store_name"
+    )
+
+
+@st.fragment
+def period_overview(start_date: date, end_date: date, group_options: list, store_options: list) -> None:
+    """
+    Filtres groupes / magasins, KPIs et graphiques de la période
+
+    Un changement de filtre ne relance que ce fragment ; les agrégats de
+    chaque combinaison de filtres sont en cache.
+    """
+    cols = st.columns(2)
+    with cols[0]:
+        groups = st.multiselect(
+            "Groups",
+            group_options,
+            default=None,
+            key="overview_groups",
+            label_visibility="collapsed",
+            placeholder="All groups"
+        )
+    with cols[1]:
+        stores = st.multiselect(
+            "Stores",
+            store_options,
+            default=None,
+            key="overview_stores",
+            label_visibility="collapsed",
+            placeholder="All stores"
+        )
+    overview = get_period_overview(start_date, end_date, groups=groups, stores=stores)
+
+    # mettre un espace vertical pour séparer les charts
+    st.space(20)
+    kpi_cards(overview.kpis)
+
+    st.space(20)
+    charts_cols = st.columns(2)
+    with charts_cols[0]:
+        spending_chart(overview.daily)
+    with charts_cols[1]:
+        store_chart(overview.by_store)
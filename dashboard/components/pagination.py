@@ -0,0 +1,32 @@
+"""
+Pagination par clé (keyset) des pages du dashboard
+
+La session garde la pile des curseurs des pages déjà vues : « Next » empile
+le curseur de fin de la page courante, « Previous » le dépile.
+"""
+import streamlit as st
+
+
+def current_cursor(key: str, filters) -> tuple:
+    """
+    Curseur de la page affichée (None pour la première page)
+
+    La pile est remise à zéro quand les filtres ou le tri changent.
+    """
+    state = st.session_state.setdefault(key, {"filters": None, "cursors": [None]})
+    if state["filters"] != filters:
+        state["filters"], state["cursors"] = filters, [None]
+    return state["cursors"][-1]
+
+
+def pager(key: str, next_cursor) -> None:
+    """Boutons Previous / Next sous la page"""
+    state = st.session_state[key]
+    cols = st.columns([1, 1, 6])
+    if cols[0].button("← Previous", key=f"{key}_previous", disabled=len(state["cursors"]) == 1):
+        state["cursors"].pop()
+        st.rerun()
+    if cols[1].button("Next →", key=f"{key}_next", disabled=next_cursor is None):
+        state["cursors"].append(next_cursor)
+        st.rerun()
+    cols[2].caption(f"Page {len(state['cursors'])}")
@@ -2,6 +2,7 @@
 Configuration du dashboard TickApp
 """
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,6 +16,34 @@ DB_CONFIG = {
     'password': os.getenv('POSTGRES_PASSWORD', 'SuperSecretPassword123!')  # Changé DB_PASSWORD → POSTGRES_PASSWORD
 }
 
+# Pool de connexions partagé par toutes les sessions du dashboard
+DB_POOL_MIN = int(os.getenv('DASHBOARD_DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DASHBOARD_DB_POOL_MAX', '8'))
+
+# Durée de vie (secondes) du cache de chaque requête
+QUERY_TTLS = {
+    # Watermark (dernier transaction_id) : détecte les nouveaux tickets
+    'watermark': 15,
+    # Données invalidées par le watermark : le TTL ne couvre que les
+    # corrections et suppressions, que le watermark ne voit pas
+    'daily_spending': 3600,
+    'overview': 3600,
+    'categories': 3600,
+    # Pages de transactions et articles (invalidées par le watermark)
+    'transactions': 600,
+    # Snapshots Parquet : invalidés par la date de modification des fichiers
+    'snapshot': 3600,
+}
+
+# Instrumentation des requêtes (panneau Performance de la page Settings)
+QUERY_LOG_SIZE = int(os.getenv('DASHBOARD_QUERY_LOG_SIZE', '5000'))   # Derniers appels gardés
+SLOW_QUERY_MS = float(os.getenv('DASHBOARD_SLOW_QUERY_MS', '500'))     # Seuil des requêtes lentes
+SLOW_QUERY_EXPLAIN_INTERVAL = 300   # Secondes entre deux EXPLAIN ANALYZE d'une même requête
+
+# Snapshots Parquet des transactions et articles (écrits par Dagster,
+# voir tickapp/snapshots.py) : pages d'analyse sans requête sur Postgres
+SNAPSHOT_DIR = Path(os.getenv('SNAPSHOT_DIR', Path(__file__).parent.parent / 'data' / 'snapshots'))
+
 # Palette de couleurs
 COLORS = {
     'primary': '#6366F1',
@@ -1,25 +1,834 @@
 """
 Fonctions de récupération et traitement des données
+
+- Connexions : pool partagé par toutes les sessions (st.cache_resource)
+- Cache : une entrée par requête et par mois, TTL par requête (QUERY_TTLS)
+- Invalidation : le watermark (dernier transaction_id) détecte les nouveaux
+  tickets ; seuls les mois qu'ils touchent sont relus en base
+- Analyses : lues dans les snapshots Parquet (SNAPSHOT_DIR) sans requête
+  sur Postgres ; le cache est invalidé par la date de modification des mois
+- Instrumentation : chaque requête en cache (@instrumented) enregistre sa
+  durée, sa part Postgres, ses lignes, sa taille et le hit / miss du cache ;
+  les requêtes lentes sont journalisées avec leur plan EXPLAIN ANALYZE
 """
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
 import streamlit as st
 import pandas as pd
 import psycopg2
-from config import DB_CONFIG
+import psycopg2.pool
+import pyarrow as pa
+import pyarrow.dataset as ds
+from config import (
+    DB_CONFIG, DB_POOL_MIN, DB_POOL_MAX, QUERY_TTLS, SNAPSHOT_DIR,
+    QUERY_LOG_SIZE, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONNEXIONS
+# ============================================================================
+
+@st.cache_resource
+def get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """Pool de connexions partagé par toutes les sessions"""
+    return psycopg2.pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **DB_CONFIG)
+
+
+@contextmanager
+def get_connection():
+    """Emprunte une connexion au pool (fermée au lieu d'être rendue si elle est cassée)"""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        if not broken and not conn.closed:
+            conn.rollback()  # Pas de transaction laissée ouverte sur une connexion du pool
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+# ============================================================================
+# INSTRUMENTATION DES REQUÊTES
+# ============================================================================
+
+@dataclass
+class QuerySample:
+    """Un appel d'une requête instrumentée"""
+    name: str
+    at: datetime
+    total_ms: float     # Appel complet : cache, Postgres, pandas
+    source_ms: float    # Postgres (exécution + lecture des lignes) ou Parquet ; 0 si hit
+    rows: int
+    bytes: int          # Taille en mémoire du résultat
+    cache_hit: bool
+
+
+@dataclass
+class SlowQuery:
+    """Dernière requête lente d'un nom, avec son plan"""
+    name: str
+    at: datetime
+    source_ms: float
+    rows: int
+    plan: str
+
+
+@dataclass
+class _QueryLog:
+    """Journal partagé par toutes les sessions"""
+    samples: deque = field(default_factory=lambda: deque(maxlen=QUERY_LOG_SIZE))
+    slow: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class _QueryScope:
+    """Appel instrumenté en cours dans le thread du script"""
+    name: str
+    source_ms: float = 0.0
+    executed: bool = False
+
+
+_scopes = threading.local()
+
+
+@st.cache_resource
+def _get_query_log() -> _QueryLog:
+    return _QueryLog()
+
+
+def _current_scope() -> Optional[_QueryScope]:
+    return getattr(_scopes, "current", None)
+
+
+def _result_size(result) -> tuple:
+    """(lignes, octets) des DataFrames d'un résultat"""
+    if isinstance(result, pd.DataFrame):
+        frames = [result]
+    elif is_dataclass(result):
+        frames = [getattr(result, f.name) for f in fields(result)]
+    elif isinstance(result, dict):
+        frames = list(result.values())
+    else:
+        return 1, 0
+    frames = [frame for frame in frames if isinstance(frame, pd.DataFrame)]
+    return (sum(len(frame) for frame in frames),
+            int(sum(frame.memory_usage(deep=True).sum() for frame in frames)))
+
+
+def instrumented(name: str):
+    """
+    Enregistre chaque appel de la fonction dans le journal des requêtes
+
+    À placer au-dessus de @st.cache_data : l'appel est un miss si la
+    fonction a exécuté une requête (ou lu un snapshot), un hit sinon.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope, outer = _QueryScope(name), _current_scope()
+            _scopes.current = scope
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _scopes.current = outer
+            rows, size = _result_size(result)
+            sample = QuerySample(
+                name=name,
+                at=datetime.now(),
+                total_ms=(time.perf_counter() - start) * 1000,
+                source_ms=scope.source_ms,
+                rows=rows,
+                bytes=size,
+                cache_hit=not scope.executed,
+            )
+            query_log = _get_query_log()
+            with query_log.lock:
+                query_log.samples.append(sample)
+            return result
+        if hasattr(func, "clear"):
+            wrapper.clear = func.clear
+        return wrapper
+    return decorator
+
+
+def _record_source(source_ms: float) -> None:
+    scope = _current_scope()
+    if scope is not None:
+        scope.source_ms += source_ms
+        scope.executed = True
+
+
+def _explain_slow_query(cursor, name: str, query: str, params, source_ms: float, rows: int) -> None:
+    """Journalise le plan EXPLAIN (ANALYZE, BUFFERS) d'une requête lente (au plus une fois par intervalle)"""
+    query_log = _get_query_log()
+    with query_log.lock:
+        previous = query_log.slow.get(name)
+        if previous and (datetime.now() - previous.at).total_seconds() < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return
+        # Réservé avant l'EXPLAIN : les sessions concurrentes ne le relancent pas
+        query_log.slow[name] = SlowQuery(name, datetime.now(), source_ms, rows, previous.plan if previous else "")
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+        plan = "\n".join(line for line, in cursor.fetchall())
+    except psycopg2.Error as e:
+        cursor.connection.rollback()
+        plan = f"EXPLAIN impossible : {e}"
+    with query_log.lock:
+        query_log.slow[name] = SlowQuery(name, datetime.now(), source_ms, rows, plan)
+    logger.warning(f"🐢 Requête lente {name} : {source_ms:.0f} ms, {rows} ligne(s)\n{plan}")
+
+
+def run_query(query: str, params=None) -> pd.DataFrame:
+    """Exécute une requête en lecture et retourne un DataFrame"""
+    scope = _current_scope()
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            records = cursor.fetchall()
+            source_ms = (time.perf_counter() - start) * 1000
+            columns = [column.name for column in cursor.description]
+            if source_ms >= SLOW_QUERY_MS:
+                _explain_slow_query(cursor, scope.name if scope else "query", query, params, source_ms, len(records))
+    _record_source(source_ms)
+    return pd.DataFrame(records, columns=columns)
+
+
+def get_query_stats() -> pd.DataFrame:
+    """
+    Statistiques par requête sur le journal : appels, taux de hit, p50 / p95
+    de l'appel complet et de la part Postgres / Parquet (misses), lignes et
+    taille moyennes
+    """
+    query_log = _get_query_log()
+    with query_log.lock:
+        samples = pd.DataFrame(list(query_log.samples), columns=[f.name for f in fields(QuerySample)])
+    if samples.empty:
+        return pd.DataFrame()
+
+    misses = samples[~samples["cache_hit"]].groupby("name")["source_ms"]
+    stats = samples.groupby("name").agg(
+        calls=("total_ms", "size"),
+        hit_rate=("cache_hit", "mean"),
+        p50_ms=("total_ms", lambda values: values.quantile(0.5)),
+        p95_ms=("total_ms", lambda values: values.quantile(0.95)),
+        rows=("rows", "mean"),
+        bytes=("bytes", "mean"),
+        last_call=("at", "max"),
+    )
+    stats["source_p50_ms"] = misses.quantile(0.5)
+    stats["source_p95_ms"] = misses.quantile(0.95)
+    return stats.sort_values("p95_ms", ascending=False).reset_index()
+
+
+def get_slow_queries() -> list:
+    """Dernière requête lente de chaque nom, la plus récente d'abord"""
+    query_log = _get_query_log()
+    with query_log.lock:
+        slow = [query for query in query_log.slow.values() if query.plan]
+    return sorted(slow, key=lambda query: query.at, reverse=True)
+
+
+def reset_query_log() -> None:
+    """Vide le journal des requêtes et des requêtes lentes"""
+    query_log = _get_query_log()
+    with query_log.lock:
+        query_log.samples.clear()
+        query_log.slow.clear()
+
+
+# ============================================================================
+# INVALIDATION PAR WATERMARK
+# ============================================================================
+
+@dataclass
+class _CacheVersions:
+    """Watermark vu par le dashboard et version des données de chaque mois"""
+    watermark: int = -1
+    months: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@st.cache_resource
+def _get_cache_versions() -> _CacheVersions:
+    return _CacheVersions()
+
+
+@instrumented("watermark")
+@st.cache_data(ttl=QUERY_TTLS["watermark"], show_spinner=False)
+def get_watermark() -> int:
+    """Dernier transaction_id en base"""
+    return int(run_query("SELECT COALESCE(MAX(transaction_id), 0) AS watermark FROM transaction")["watermark"][0])
+
+
+@instrumented("changed_months")
+def _get_changed_months(watermark: int) -> pd.DataFrame:
+    """Mois des tickets insérés après le watermark"""
+    return run_query("""
+        SELECT DISTINCT date_trunc('month', transaction_date)::date AS month
+        FROM transaction
+        WHERE transaction_id > %s
+    """, (watermark,))
+
+
+def refresh_watermark(force: bool = False) -> int:
+    """
+    Compare le watermark au dernier vu et invalide les mois des nouveaux tickets
+
+    Args:
+        force: Relire le watermark sans attendre son TTL (bouton ↻)
+
+    Returns:
+        Watermark courant
+    """
+    if force:
+        get_watermark.clear()
+    watermark = get_watermark()
+    versions = _get_cache_versions()
+    with versions.lock:
+        if watermark > versions.watermark:
+            if versions.watermark >= 0:
+                for month in _get_changed_months(versions.watermark)["month"]:
+                    versions.months[month] = watermark
+            versions.watermark = watermark
+    return watermark
+
+
+def _month_version(month: date) -> int:
+    return _get_cache_versions().months.get(month, 0)
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _months(from_date: date, to_date: date) -> list:
+    """Premiers jours des mois couverts par [from_date, to_date]"""
+    months = []
+    month = from_date.replace(day=1)
+    while month <= to_date:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+# ============================================================================
+# REQUÊTES
+# ============================================================================
+
+@instrumented("daily_spending")
+@st.cache_data(ttl=QUERY_TTLS["daily_spending"], show_spinner=False)
+def _get_daily_spending_month(month: date, version: int) -> pd.DataFrame:
+    """Récapitulatif d'un mois (version : invalidation par watermark)"""
+    return run_query("""
+    SELECT * FROM daily_spending_summary
+    WHERE transaction_date >= %s AND transaction_date < %s
+    """, (month, _next_month(month)))
 
 
-@st.cache_data(ttl=60)
 def get_daily_spending_summary(from_date=None, to_date=None):
     """Récupère les données de récapitulatif des dépenses quotidiennes depuis la base de données"""
-    query = """
-    SELECT * FROM daily_spending_summary
-    WHERE transaction_date >= %s AND transaction_date <= %s
-    ORDER BY transaction_date DESC
-    """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        df = pd.read_sql_query(query, conn, params=(from_date, to_date))
-        conn.close()
-        return df
+        refresh_watermark()
+        frames = [
+            _get_daily_spending_month(month, _month_version(month))
+            for month in _months(from_date, to_date)
+        ]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df["transaction_date"] >= from_date) & (df["transaction_date"] <= to_date)]
+        return df.sort_values("transaction_date", ascending=False, kind="stable").reset_index(drop=True)
     except Exception as e:
         st.error(f"Error fetching daily spending summary: {e}")
         return pd.DataFrame()
+
+
+# ============================================================================
+# VUE D'ENSEMBLE (période courante vs période précédente)
+# ============================================================================
+
+@dataclass
+class PeriodOverview:
+    """Agrégats des deux périodes, calculés en base en une requête"""
+    kpis: dict              # {'current' | 'previous': {'total', 'transactions', 'average', 'stores'}}
+    daily: pd.DataFrame     # Période courante : transaction_date, group, amount, cumulative_amount
+    by_store: pd.DataFrame  # Période courante : store_name, amount, share
+    group_options: list     # Groupes / magasins de la période courante (avant filtres)
+    store_options: list
+
+
+OVERVIEW_QUERY = """
+WITH periods(period, from_date, to_date) AS (
+    VALUES ('current', %(start)s::date, %(end)s::date),
+           ('previous', %(previous_start)s::date, %(previous_end)s::date)
+),
+base AS (
+    SELECT p.period, ds.transaction_date, s.store_name, tc.name AS "group",
+           ds.transaction_count, ds.total_amount,
+           (%(groups)s::text[] IS NULL OR tc.name = ANY(%(groups)s::text[]))
+           AND (%(stores)s::text[] IS NULL OR s.store_name = ANY(%(stores)s::text[])) AS matches
+    FROM periods p
+    JOIN daily_spending ds ON ds.transaction_date BETWEEN p.from_date AND p.to_date
+    JOIN store s ON ds.store_id = s.store_id
+    LEFT JOIN transaction_category tc ON ds.transaction_category_id = tc.category_id
+),
+aggregates AS (
+    SELECT period, transaction_date, "group", store_name,
+           -- 7 : KPIs, 1 : jour x groupe, 6 : magasin, 5 : groupe
+           GROUPING(transaction_date, "group", store_name) AS level,
+           COALESCE(SUM(total_amount) FILTER (WHERE matches), 0) AS amount,
+           COALESCE(SUM(transaction_count) FILTER (WHERE matches), 0) AS transactions,
+           COUNT(DISTINCT store_name) FILTER (WHERE matches) AS stores
+    FROM base
+    GROUP BY GROUPING SETS (
+        (period),
+        (period, transaction_date, "group"),
+        (period, store_name),
+        (period, "group")
+    )
+)
+SELECT period, level, transaction_date, "group", store_name, amount, transactions, stores,
+       SUM(amount) OVER (
+           PARTITION BY period, level, "group" ORDER BY transaction_date
+       ) AS cumulative_amount,
+       amount / NULLIF(SUM(amount) OVER (PARTITION BY period, level), 0) AS share
+FROM aggregates
+"""
+
+_LEVEL_KPIS, _LEVEL_DAILY, _LEVEL_STORE, _LEVEL_GROUP = 7, 1, 6, 5
+
+
+def previous_period(from_date: date, to_date: date) -> tuple:
+    """Même plage de dates, un mois plus tôt (jour ramené à la fin du mois si besoin)"""
+    def shift(day: date) -> date:
+        previous_month_end = day.replace(day=1) - timedelta(days=1)
+        return previous_month_end.replace(day=min(day.day, previous_month_end.day))
+    return shift(from_date), shift(to_date)
+
+
+@instrumented("overview")
+@st.cache_data(ttl=QUERY_TTLS["overview"], show_spinner=False)
+def _get_period_overview(params: tuple, versions: tuple) -> PeriodOverview:
+    """
+    KPIs et séries dérivés de OVERVIEW_QUERY, une entrée de cache par période
+    et filtres (versions : invalidation par watermark)
+    """
+    start, end, previous_start, previous_end, groups, stores = params
+    rows = run_query(OVERVIEW_QUERY, {
+        "start": start, "end": end,
+        "previous_start": previous_start, "previous_end": previous_end,
+        "groups": list(groups) if groups else None,
+        "stores": list(stores) if stores else None,
+    })
+    for column in ("amount", "cumulative_amount", "share"):
+        rows[column] = pd.to_numeric(rows[column])
+
+    kpis = {}
+    for period in ("current", "previous"):
+        row = rows[(rows["period"] == period) & (rows["level"] == _LEVEL_KPIS)]
+        total = float(row["amount"].sum())
+        transactions = int(row["transactions"].sum())
+        kpis[period] = {
+            "total": total,
+            "transactions": transactions,
+            "average": total / transactions if transactions else 0.0,
+            "stores": int(row["stores"].sum()),
+        }
+
+    current = rows[rows["period"] == "current"]
+    daily = current[(current["level"] == _LEVEL_DAILY) & (current["transactions"] > 0)]
+    by_store = current[current["level"] == _LEVEL_STORE]
+    return PeriodOverview(
+        kpis=kpis,
+        daily=daily[["transaction_date", "group", "amount", "cumulative_amount"]].reset_index(drop=True),
+        by_store=by_store[by_store["transactions"] > 0][["store_name", "amount", "share"]].reset_index(drop=True),
+        group_options=sorted(current.loc[current["level"] == _LEVEL_GROUP, "group"].dropna()),
+        store_options=sorted(by_store["store_name"].dropna()),
+    )
+
+
+def get_period_overview(from_date: date, to_date: date, groups=None, stores=None) -> PeriodOverview:
+    """
+    KPIs et séries de la période et de la même période le mois précédent
+
+    Un changement de filtres déjà vus (ou un simple rerun) ne relance ni la
+    requête ni le calcul des séries.
+
+    Args:
+        groups: Groupes (catégories de transaction) retenus, tous si vide
+        stores: Magasins retenus, tous si vide
+    """
+    previous_start, previous_end = previous_period(from_date, to_date)
+    refresh_watermark()
+    versions = tuple(
+        _month_version(month)
+        for month in _months(previous_start, previous_end) + _months(from_date, to_date)
+    )
+    return _get_period_overview(
+        (from_date, to_date, previous_start, previous_end,
+         tuple(sorted(groups or ())), tuple(sorted(stores or ()))),
+        versions
+    )
+
+
+# ============================================================================
+# CUBE DES CATÉGORIES (category_spending, voir 17-category-spending.sql)
+# ============================================================================
+
+CATEGORY_GRAINS = ("day", "month", "year")
+
+
+@instrumented("category_spending")
+@st.cache_data(ttl=QUERY_TTLS["categories"], show_spinner=False)
+def _get_category_spending(grain: str, from_date: date, to_date: date,
+                           category_main: Optional[str], watermark: int) -> pd.DataFrame:
+    """Lignes du cube (watermark : invalidation par nouveau ticket)"""
+    if category_main is None:
+        # Totaux des catégories principales
+        level = "category_main IS NOT NULL AND category_sub IS NULL"
+    else:
+        # Sous-catégories d'une catégorie principale
+        level = "category_main = %(category_main)s AND category_sub IS NOT NULL"
+    rows = run_query(f"""
+        SELECT period, currency, category_main, category_sub, item_count, total_spent
+        FROM category_spending
+        WHERE grain = %(grain)s
+          AND {level}
+          AND period >= date_trunc(%(grain)s, %(from_date)s::timestamp)::date
+          AND period <= %(to_date)s
+        ORDER BY period, total_spent DESC
+    """, {"grain": grain, "from_date": from_date, "to_date": to_date, "category_main": category_main})
+    return rows.assign(total_spent=pd.to_numeric(rows["total_spent"]))
+
+
+def get_category_spending(grain: str, from_date: date, to_date: date,
+                          category_main: Optional[str] = None) -> pd.DataFrame:
+    """
+    Dépenses par catégorie et par période, lues dans le cube pré-calculé
+
+    Args:
+        grain: 'day', 'month' ou 'year' (périodes qui touchent la plage)
+        category_main: None pour les catégories principales, sinon les
+            sous-catégories de cette catégorie
+    """
+    if grain not in CATEGORY_GRAINS:
+        raise ValueError(f"Grain inconnu: {grain} (grains: {', '.join(CATEGORY_GRAINS)})")
+    return _get_category_spending(grain, from_date, to_date, category_main, refresh_watermark())
+
+
+# ============================================================================
+# SNAPSHOTS PARQUET (transactions et articles, écrits par Dagster)
+# ============================================================================
+
+def _snapshot_files(dataset: str, from_date: date, to_date: date) -> tuple:
+    """Fichiers des mois couverts, avec leur date de modification (clé de cache)"""
+    files = []
+    for month in _months(from_date, to_date):
+        path = SNAPSHOT_DIR / dataset / f"month={month:%Y-%m}" / "data.parquet"
+        if path.exists():
+            files.append((str(path), path.stat().st_mtime_ns))
+    return tuple(files)
+
+
+@instrumented("snapshot")
+@st.cache_data(ttl=QUERY_TTLS["snapshot"], show_spinner=False)
+def _read_snapshot(files: tuple, from_date: date, to_date: date, columns: tuple) -> pd.DataFrame:
+    """Lit les fichiers Parquet ; le filtre de dates élimine les row groups hors période"""
+    start = time.perf_counter()
+    dataset = ds.dataset([path for path, _ in files], format="parquet")
+    table = dataset.to_table(
+        columns=list(columns) or None,
+        filter=(ds.field("transaction_date") >= from_date) & (ds.field("transaction_date") <= to_date)
+    )
+    # Montants DECIMAL en float pour pandas et les graphiques
+    for index, column in enumerate(table.schema):
+        if pa.types.is_decimal(column.type):
+            table = table.set_column(index, column.name, table.column(index).cast(pa.float64()))
+    _record_source((time.perf_counter() - start) * 1000)
+    return table.to_pandas()
+
+
+def snapshot_available(dataset: str = "transactions") -> bool:
+    """Au moins un mois exporté dans le dataset"""
+    return any((SNAPSHOT_DIR / dataset).glob("month=*/data.parquet"))
+
+
+def get_snapshot(dataset: str, from_date: date, to_date: date, columns=None) -> pd.DataFrame:
+    """
+    Lignes d'un dataset ('transactions' ou 'items') sur une période
+
+    Seuls les fichiers des mois couverts et les colonnes demandées sont lus.
+
+    Args:
+        columns: Colonnes à lire, toutes si None
+    """
+    files = _snapshot_files(dataset, from_date, to_date)
+    if not files:
+        return pd.DataFrame(columns=list(columns or ()))
+    return _read_snapshot(files, from_date, to_date, tuple(columns or ()))
+
+
+# ============================================================================
+# TRANSACTIONS PAGINÉES PAR CLÉ (pages Transactions et History)
+# ============================================================================
+
+@dataclass(frozen=True)
+class TransactionFilters:
+    """Filtres appliqués en SQL (vides = pas de filtre)"""
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    store_ids: tuple = ()
+    group_ids: tuple = ()       # Catégories de transaction
+    categories: tuple = ()      # Catégories principales d'articles
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+
+@dataclass
+class TransactionPage:
+    """Une page de transactions et la clé de la page suivante"""
+    rows: pd.DataFrame
+    next_cursor: Optional[tuple]  # (valeur de tri, transaction_id), None en fin de liste
+
+
+# Tri : (colonne, sens) ; chaque tri a son index (15-transaction-keyset.sql)
+TRANSACTION_SORTS = {
+    "date_desc": ("transaction_date", "DESC"),
+    "date_asc": ("transaction_date", "ASC"),
+    "amount_desc": ("total", "DESC"),
+    "amount_asc": ("total", "ASC"),
+}
+
+TRANSACTIONS_PAGE_QUERY = """
+SELECT t.transaction_id, t.transaction_date, t.transaction_time, s.store_name, s.city,
+       tc.name AS "group", t.currency, t.total, t.payment_method,
+       (SELECT COUNT(*) FROM item i WHERE i.transaction_id = t.transaction_id) AS item_count
+FROM transaction t
+JOIN store s ON t.store_id = s.store_id
+LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+WHERE {conditions}
+ORDER BY t.{column} {direction}, t.transaction_id {direction}
+LIMIT %(limit)s
+"""
+
+
+def _transaction_conditions(filters: TransactionFilters) -> tuple:
+    """Conditions SQL et paramètres des filtres"""
+    conditions, params = ["TRUE"], {}
+    if filters.from_date:
+        conditions.append("t.transaction_date >= %(from_date)s")
+        params["from_date"] = filters.from_date
+    if filters.to_date:
+        conditions.append("t.transaction_date <= %(to_date)s")
+        params["to_date"] = filters.to_date
+    if filters.store_ids:
+        conditions.append("t.store_id = ANY(%(store_ids)s)")
+        params["store_ids"] = list(filters.store_ids)
+    if filters.group_ids:
+        conditions.append("t.transaction_category_id = ANY(%(group_ids)s)")
+        params["group_ids"] = list(filters.group_ids)
+    if filters.categories:
+        conditions.append("""EXISTS (
+            SELECT 1 FROM item i JOIN item_category c ON i.category_id = c.category_id
+            WHERE i.transaction_id = t.transaction_id AND c.category_main = ANY(%(categories)s)
+        )""")
+        params["categories"] = list(filters.categories)
+    if filters.min_amount is not None:
+        conditions.append("t.total >= %(min_amount)s")
+        params["min_amount"] = filters.min_amount
+    if filters.max_amount is not None:
+        conditions.append("t.total <= %(max_amount)s")
+        params["max_amount"] = filters.max_amount
+    return conditions, params
+
+
+@instrumented("transactions_page")
+@st.cache_data(ttl=QUERY_TTLS["transactions"], show_spinner=False)
+def _get_transactions_page(filters: TransactionFilters, sort: str, after: Optional[tuple],
+                           page_size: int, watermark: int) -> TransactionPage:
+    """Page de transactions (watermark : invalidation par nouveau ticket)"""
+    column, direction = TRANSACTION_SORTS[sort]
+    conditions, params = _transaction_conditions(filters)
+    if after is not None:
+        # Reprise après la dernière ligne de la page précédente
+        operator = "<" if direction == "DESC" else ">"
+        conditions.append(f"(t.{column}, t.transaction_id) {operator} (%(after_value)s, %(after_id)s)")
+        params["after_value"], params["after_id"] = after
+    # Une ligne de plus : indique s'il reste une page
+    params["limit"] = page_size + 1
+
+    rows = run_query(
+        TRANSACTIONS_PAGE_QUERY.format(conditions=" AND ".join(conditions), column=column, direction=direction),
+        params
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        next_cursor = (last[column], int(last["transaction_id"]))
+    rows = rows.assign(total=pd.to_numeric(rows["total"]))
+    return TransactionPage(rows=rows.reset_index(drop=True), next_cursor=next_cursor)
+
+
+def get_transactions_page(filters: TransactionFilters, sort: str = "date_desc",
+                          after: Optional[tuple] = None, page_size: int = 50) -> TransactionPage:
+    """
+    Page de transactions triée et filtrée en base
+
+    Args:
+        sort: Clé de TRANSACTION_SORTS
+        after: next_cursor de la page précédente, None pour la première page
+        page_size: Nombre de lignes par page
+    """
+    return _get_transactions_page(filters, sort, after, page_size, refresh_watermark())
+
+
+@instrumented("transaction_items")
+@st.cache_data(ttl=QUERY_TTLS["transactions"], show_spinner=False)
+def get_transaction_items(transaction_id: int) -> pd.DataFrame:
+    """Articles d'une transaction, dans l'ordre du ticket (lus au dépliage de la ligne)"""
+    items = run_query("""
+        SELECT i.line_number, i.product_name, i.brand, i.quantity, i.unit_price, i.total_price,
+               c.category_main, c.category_sub
+        FROM item i
+        JOIN item_category c ON i.category_id = c.category_id
+        WHERE i.transaction_id = %s
+        ORDER BY i.line_number NULLS LAST, i.item_id
+    """, (transaction_id,))
+    for column in ("quantity", "unit_price", "total_price"):
+        items[column] = pd.to_numeric(items[column])
+    return items
+
+
+@instrumented("transaction_filter_options")
+@st.cache_data(ttl=QUERY_TTLS["daily_spending"], show_spinner=False)
+def get_transaction_filter_options() -> dict:
+    """Magasins, groupes et catégories d'articles proposés dans les filtres"""
+    return {
+        "stores": run_query("SELECT store_id, store_name, city FROM store ORDER BY store_name, city"),
+        "groups": run_query("SELECT category_id, name FROM transaction_category ORDER BY name"),
+        "categories": run_query(
+            "SELECT DISTINCT category_main FROM item_category WHERE active ORDER BY category_main"
+        )["category_main"].tolist(),
+    }
+
+
+# ============================================================================
+# RECHERCHE DE PRODUITS (16-product-search.sql)
+# ============================================================================
+
+# Un produit = (nom, marque) ; mots (tsvector français + allemand), sous-chaîne
+# ou nom approchant (trigrammes) ; chaque critère a son index GIN
+PRODUCT_SEARCH_QUERY = """
+WITH q AS (
+    SELECT websearch_to_tsquery('french', %(query)s) || websearch_to_tsquery('german', %(query)s)
+           || websearch_to_tsquery('simple', %(query)s) AS tsquery
+),
+matches AS (
+    SELECT i.item_id, i.product_name, i.brand, i.unit_price, i.transaction_id,
+           ts_rank_cd(i.search_vector, q.tsquery)
+           + GREATEST(word_similarity(%(query)s, i.product_name),
+                      word_similarity(%(query)s, coalesce(i.brand, ''))) AS rank
+    FROM item i, q
+    WHERE i.search_vector @@ q.tsquery
+       OR i.product_name ILIKE %(pattern)s
+       OR i.brand ILIKE %(pattern)s
+       OR %(query)s <%% i.product_name
+)
+SELECT m.product_name, m.brand,
+       MAX(m.rank) AS rank,
+       COUNT(*) AS purchases,
+       AVG(m.unit_price) AS avg_price,
+       MIN(m.unit_price) AS min_price,
+       MAX(m.unit_price) AS max_price,
+       MAX(t.transaction_date) AS last_purchase,
+       MIN(o.product_key) AS product_key
+FROM matches m
+JOIN transaction t ON t.transaction_id = m.transaction_id
+LEFT JOIN product_price_observation o ON o.item_id = m.item_id
+GROUP BY m.product_name, m.brand
+ORDER BY rank DESC, purchases DESC
+LIMIT %(limit)s
+"""
+
+
+def _like_pattern(query: str) -> str:
+    """Motif ILIKE de sous-chaîne (caractères spéciaux échappés)"""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+@instrumented("product_search")
+@st.cache_data(ttl=QUERY_TTLS["transactions"], show_spinner=False)
+def _search_products(query: str, limit: int, watermark: int) -> pd.DataFrame:
+    results = run_query(PRODUCT_SEARCH_QUERY, {
+        "query": query,
+        "pattern": _like_pattern(query),
+        "limit": limit,
+    })
+    for column in ("rank", "avg_price", "min_price", "max_price"):
+        results[column] = pd.to_numeric(results[column])
+    return results
+
+
+def search_products(query: str, limit: int = 50) -> pd.DataFrame:
+    """
+    Produits (nom, marque) correspondant à la recherche, les plus pertinents
+    d'abord, avec leur nombre d'achats et leurs prix
+
+    Args:
+        query: Texte libre ("lait entier", "vollmilch", "-bio", "M-Budget")
+    """
+    query = (query or "").strip()
+    if len(query) < 2:
+        return pd.DataFrame()
+    return _search_products(query, limit, refresh_watermark())
+
+
+# ============================================================================
+# SUIVI DES PRIX (product_price_observation, 18-price-observations.sql)
+# ============================================================================
+
+@instrumented("price_history")
+@st.cache_data(ttl=QUERY_TTLS["transactions"], show_spinner=False)
+def _get_product_price_history(product_key: str, watermark: int) -> pd.DataFrame:
+    history = run_query("""
+        SELECT o.observed_on, s.store_name, o.currency, o.unit_price, o.package_size,
+               o.quantity_unit, o.price_per_unit
+        FROM product_price_observation o
+        JOIN store s ON s.store_id = o.store_id
+        WHERE o.product_key = %(product_key)s
+        ORDER BY o.observed_on
+    """, {"product_key": product_key})
+    for column in ("unit_price", "package_size", "price_per_unit"):
+        history[column] = pd.to_numeric(history[column])
+    return history
+
+
+def get_product_price_history(product_key: str) -> pd.DataFrame:
+    """
+    Historique complet des prix d'un produit canonique, tous magasins
+    (un parcours de idx_price_observation_product)
+
+    Args:
+        product_key: Clé du produit (colonne product_key de search_products)
+    """
+    return _get_product_price_history(product_key, refresh_watermark())
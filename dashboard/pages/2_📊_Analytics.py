@@ -1,11 +1,97 @@
 """
 Page Analytics
+
+Lue dans les snapshots Parquet (transactions et articles) : aucune requête
+sur Postgres
 """
 import streamlit as st
+from datetime import date, datetime
+from data import get_snapshot, snapshot_available
 from components.styles import load_styles
 
 load_styles()
 
 st.markdown("# Analytics")
 st.caption("Deep dive into spending patterns")
-st.info("📊 Analytics page - coming soon!")
\ No newline at end of file
+
+# Par défaut : les 6 derniers mois
+today = datetime.now().date()
+start_month = today.year * 12 + today.month - 1 - 5
+start_default = date(start_month // 12, start_month % 12 + 1, 1)
+
+try:
+
+        if not snapshot_available():
+            st.info("📊 No analytics snapshot yet - run the `rebuild_snapshots` job in Dagster")
+            st.stop()
+
+        ############################ Inputs ############################
+
+        cols = st.columns([4, 8])
+        with cols[0]:
+            date_range = st.date_input(
+                "Period",
+                value=(start_default, today),
+                label_visibility="collapsed"
+            )
+
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+        else:
+            start_date = end_date = date_range[0]
+
+        items = get_snapshot(
+            "items", start_date, end_date,
+            columns=["transaction_date", "product_name", "category_main", "total_price"]
+        )
+        transactions = get_snapshot(
+            "transactions", start_date, end_date,
+            columns=["transaction_date", "store_name", "total", "item_count"]
+        )
+
+        if transactions.empty:
+            st.warning("No transactions in this period")
+            st.stop()
+
+        ############################ KPIs ############################
+
+        st.space(20)
+
+        months = transactions["transaction_date"].map(lambda day: day.replace(day=1)).nunique()
+        cols_kpis = st.columns(4)
+        cols_kpis[0].metric("Total Spent", f"{transactions['total'].sum():.0f} CHF", border=True)
+        cols_kpis[1].metric("Monthly Average", f"{transactions['total'].sum() / months:.0f} CHF", border=True)
+        cols_kpis[2].metric("Average Receipt", f"{transactions['total'].mean():.0f} CHF", border=True)
+        cols_kpis[3].metric("Items per Receipt", f"{transactions['item_count'].mean():.1f}", border=True)
+
+        ############################ Charts ############################
+
+        st.space(20)
+
+        charts_cols = st.columns(2)
+
+        # Dépenses mensuelles par catégorie principale
+        items["month"] = items["transaction_date"].map(lambda day: day.strftime("%Y-%m"))
+        by_month = (
+            items.groupby(["month", "category_main"], as_index=False)["total_price"].sum()
+        )
+        charts_cols[0].bar_chart(by_month, x="month", y="total_price", color="category_main")
+
+        # Dépenses par jour de la semaine
+        transactions["weekday"] = transactions["transaction_date"].map(lambda day: f"{day.isoweekday()} {day:%a}")
+        by_weekday = transactions.groupby("weekday", as_index=False)["total"].sum()
+        charts_cols[1].bar_chart(by_weekday, x="weekday", y="total")
+
+        # Produits les plus coûteux sur la période
+        st.markdown("### Top products")
+        top_products = (
+            items.groupby(["product_name", "category_main"], as_index=False)
+            .agg(purchases=("total_price", "size"), spent=("total_price", "sum"))
+            .nlargest(20, "spent")
+        )
+        st.dataframe(top_products, hide_index=True, use_container_width=True)
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
@@ -1,7 +1,14 @@
 """
 Page Categories
+
+Dépenses par catégorie d'article, lues dans le cube pré-calculé
+category_spending (jour, mois, année) : les catégories principales puis les
+sous-catégories de la catégorie sélectionnée
 """
+from datetime import date
+
 import streamlit as st
+from data import get_category_spending
 from components.styles import load_styles
 
 # Charger les styles
@@ -9,4 +16,94 @@ load_styles()
 
 st.markdown("# Categories")
 st.caption("Spending breakdown by category")
-st.info("📂 Categories page - coming soon!")
\ No newline at end of file
+
+GRAINS = {"Day": "day", "Month": "month", "Year": "year"}
+
+
+@st.fragment
+def category_breakdown(spending, currency: str, grain: str, from_date: date, to_date: date) -> None:
+    """Totaux par catégorie et détail de la catégorie sélectionnée (la sélection ne relance que ce fragment)"""
+    totals = (
+        spending.groupby("category_main", as_index=False)[["item_count", "total_spent"]]
+        .sum()
+        .sort_values("total_spent", ascending=False)
+        .reset_index(drop=True)
+    )
+    totals["share"] = totals["total_spent"] / totals["total_spent"].sum()
+
+    selection = st.dataframe(
+        totals,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        column_config={
+            "category_main": "Category",
+            "item_count": "Items",
+            "total_spent": st.column_config.NumberColumn(f"Total ({currency})", format="%.2f"),
+            "share": st.column_config.ProgressColumn("Share", format="percent", min_value=0, max_value=1),
+        },
+    )
+
+    ############################ Sous-catégories ############################
+
+    selected_rows = selection.selection.rows
+    if selected_rows:
+        category = totals.iloc[selected_rows[0]]["category_main"]
+        st.markdown(f"### {category}")
+
+        details = get_category_spending(grain, from_date, to_date, category_main=category)
+        details = details[details["currency"] == currency]
+
+        st.bar_chart(details, x="period", y="total_spent", color="category_sub")
+        st.dataframe(
+            details.groupby("category_sub", as_index=False)[["item_count", "total_spent"]]
+            .sum()
+            .sort_values("total_spent", ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "category_sub": "Subcategory",
+                "item_count": "Items",
+                "total_spent": st.column_config.NumberColumn(f"Total ({currency})", format="%.2f"),
+            },
+        )
+
+
+try:
+
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            today = date.today()
+            period = st.date_input(
+                "Period",
+                value=(today.replace(month=1, day=1), today),
+                max_value=today,
+            )
+        with col2:
+            grain = GRAINS[st.radio("Granularity", list(GRAINS), index=1, horizontal=True)]
+
+        if not isinstance(period, tuple) or len(period) != 2:
+            st.stop()
+        from_date, to_date = period
+
+        ############################ Catégories principales ############################
+
+        spending = get_category_spending(grain, from_date, to_date)
+
+        if spending.empty:
+            st.warning("No spending in this period")
+            st.stop()
+
+        currencies = sorted(spending["currency"].unique())
+        currency = st.selectbox("Currency", currencies) if len(currencies) > 1 else currencies[0]
+        spending = spending[spending["currency"] == currency]
+
+        st.bar_chart(spending, x="period", y="total_spent", color="category_main")
+
+        category_breakdown(spending, currency, grain, from_date, to_date)
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
@@ -1,12 +1,55 @@
 """
 Page History
+
+Journal complet des transactions, du plus récent au plus ancien, paginé en
+base (keyset) ; les articles d'une transaction ne sont lus qu'à son dépliage
 """
 import streamlit as st
+from data import TransactionFilters, get_transactions_page, get_transaction_items
 from components.styles import load_styles
+from components.pagination import current_cursor, pager
 
 # Charger les styles
 load_styles()
 
 st.markdown("# History")
 st.caption("Complete transaction log")
-st.info("📋 History page - coming soon!")
\ No newline at end of file
+
+PAGE_SIZE = 30
+
+try:
+
+        filters = TransactionFilters()
+        cursor = current_cursor("history_pages", filters)
+        page = get_transactions_page(filters, sort="date_desc", after=cursor, page_size=PAGE_SIZE)
+
+        if page.rows.empty:
+            st.info("📋 No transactions yet")
+            st.stop()
+
+        ############################ Journal par jour ############################
+
+        for transaction_date, day in page.rows.groupby("transaction_date", sort=False):
+            st.markdown(f"### {transaction_date:%A %d %B %Y}")
+            for transaction in day.itertuples():
+                cols = st.columns([4, 3, 2, 2])
+                cols[0].markdown(f"**{transaction.store_name}**" + (f" · {transaction.city}" if transaction.city else ""))
+                cols[1].caption(transaction.group or "-")
+                cols[2].markdown(f"{transaction.total:.2f} {transaction.currency}")
+                show_items = cols[3].toggle(
+                    f"{transaction.item_count} items",
+                    key=f"history_items_{transaction.transaction_id}"
+                )
+                if show_items:
+                    st.dataframe(
+                        get_transaction_items(int(transaction.transaction_id)),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+
+        pager("history_pages", page.next_cursor)
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
@@ -1,12 +1,147 @@
 """
 Page Transactions
+
+Tri, filtres et pagination faits en base (keyset) : une page ne lit que
+page_size transactions, les articles ne sont lus qu'à la sélection d'une ligne
 """
 import streamlit as st
+from datetime import datetime, timedelta
+from data import (
+    TransactionFilters, get_transactions_page, get_transaction_items, get_transaction_filter_options,
+)
 from components.styles import load_styles
+from components.pagination import current_cursor, pager
 
 # Charger les styles
 load_styles()
 
 st.markdown("# Transactions")
 st.caption("All transaction details")
-st.info("💳 Transactions page - coming soon!")
\ No newline at end of file
+
+SORTS = {
+    "Newest first": "date_desc",
+    "Oldest first": "date_asc",
+    "Highest amount": "amount_desc",
+    "Lowest amount": "amount_asc",
+}
+
+today = datetime.now().date()
+
+try:
+
+        ############################ Inputs ############################
+
+        options = get_transaction_filter_options()
+        store_labels = {
+            row.store_id: f"{row.store_name} - {row.city}" if row.city else row.store_name
+            for row in options["stores"].itertuples()
+        }
+        group_labels = dict(zip(options["groups"]["category_id"], options["groups"]["name"]))
+
+        cols = st.columns([4, 4, 4, 4])
+        with cols[0]:
+            date_range = st.date_input(
+                "Period",
+                value=(today - timedelta(days=90), today),
+                label_visibility="collapsed"
+            )
+        with cols[1]:
+            store_ids = st.multiselect(
+                "Stores",
+                list(store_labels),
+                format_func=store_labels.get,
+                label_visibility="collapsed",
+                placeholder="All stores"
+            )
+        with cols[2]:
+            group_ids = st.multiselect(
+                "Groups",
+                list(group_labels),
+                format_func=group_labels.get,
+                label_visibility="collapsed",
+                placeholder="All groups"
+            )
+        with cols[3]:
+            categories = st.multiselect(
+                "Categories",
+                options["categories"],
+                label_visibility="collapsed",
+                placeholder="All item categories"
+            )
+
+        cols = st.columns([2, 2, 4, 2])
+        with cols[0]:
+            min_amount = st.number_input("Min amount", min_value=0.0, value=None, placeholder="Min CHF",
+                                         label_visibility="collapsed")
+        with cols[1]:
+            max_amount = st.number_input("Max amount", min_value=0.0, value=None, placeholder="Max CHF",
+                                         label_visibility="collapsed")
+        with cols[2]:
+            sort = st.selectbox("Sort", list(SORTS), label_visibility="collapsed")
+        with cols[3]:
+            page_size = st.selectbox("Rows", [25, 50, 100], index=1, label_visibility="collapsed")
+
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+        else:
+            start_date = end_date = date_range[0]
+
+        filters = TransactionFilters(
+            from_date=start_date,
+            to_date=end_date,
+            store_ids=tuple(store_ids),
+            group_ids=tuple(group_ids),
+            categories=tuple(categories),
+            min_amount=min_amount,
+            max_amount=max_amount,
+        )
+
+        ############################ Page ############################
+
+        cursor = current_cursor("transactions_pages", (filters, SORTS[sort], page_size))
+        page = get_transactions_page(filters, sort=SORTS[sort], after=cursor, page_size=page_size)
+
+        if page.rows.empty:
+            st.warning("No transactions match these filters")
+            st.stop()
+
+        selection = st.dataframe(
+            page.rows.drop(columns=["transaction_id"]),
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            column_config={
+                "transaction_date": st.column_config.DateColumn("Date"),
+                "transaction_time": st.column_config.TimeColumn("Time", format="HH:mm"),
+                "store_name": "Store",
+                "city": "City",
+                "group": "Group",
+                "currency": None,
+                "total": st.column_config.NumberColumn("Total", format="%.2f"),
+                "payment_method": "Payment",
+                "item_count": "Items",
+            },
+        )
+
+        pager("transactions_pages", page.next_cursor)
+
+        ############################ Articles de la ligne sélectionnée ############################
+
+        selected_rows = selection.selection.rows
+        if selected_rows:
+            transaction = page.rows.iloc[selected_rows[0]]
+            st.markdown(
+                f"### {transaction['store_name']} - {transaction['transaction_date']:%d.%m.%Y} "
+                f"({transaction['total']:.2f} {transaction['currency']})"
+            )
+            st.dataframe(
+                get_transaction_items(int(transaction["transaction_id"])),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
@@ -1,12 +0,0 @@
-"""
-Page Settings
-"""
-import streamlit as st
-from components.styles import load_styles
-
-# Charger les styles
-load_styles()
-
-st.markdown("# Settings")
-st.caption("Application configuration")
-st.info("⚙️ Settings page - coming soon!")
\ No newline at end of file
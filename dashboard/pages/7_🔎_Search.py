@@ -0,0 +1,105 @@
+"""
+Page Search
+
+Recherche d'achats par produit ou marque (plein texte français / allemand et
+trigrammes, voir 16-product-search.sql) et historique de prix du produit
+sélectionné (product_price_observation, voir 18-price-observations.sql)
+"""
+import pandas as pd
+import streamlit as st
+from data import search_products, get_product_price_history
+from components.styles import load_styles
+
+# Charger les styles
+load_styles()
+
+st.markdown("# Search")
+st.caption("Find a product and its price history")
+
+
+@st.fragment
+def product_results(results: pd.DataFrame) -> None:
+    """Résultats et historique de prix du produit sélectionné (la sélection ne relance que ce fragment)"""
+    selection = st.dataframe(
+        results.drop(columns=["rank", "product_key"]),
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        column_config={
+            "product_name": "Product",
+            "brand": "Brand",
+            "purchases": "Purchases",
+            "avg_price": st.column_config.NumberColumn("Avg price", format="%.2f"),
+            "min_price": st.column_config.NumberColumn("Min", format="%.2f"),
+            "max_price": st.column_config.NumberColumn("Max", format="%.2f"),
+            "last_purchase": st.column_config.DateColumn("Last purchase"),
+        },
+    )
+
+    ############################ Historique de prix ############################
+
+    selected_rows = selection.selection.rows
+    if selected_rows:
+        product = results.iloc[selected_rows[0]]
+        st.markdown(f"### {product['product_name']}" + (f" · {product['brand']}" if product["brand"] else ""))
+
+        history = get_product_price_history(product["product_key"]) if pd.notna(product["product_key"]) else None
+        if history is None or history.empty:
+            st.info("No price history recorded for this product yet")
+            return
+
+        unit = history["quantity_unit"].mode().iloc[0]
+        history = history[history["quantity_unit"] == unit]
+
+        # Évolution du prix par magasin : première et dernière observation
+        changes = history.groupby("store_name")["price_per_unit"].agg(["first", "last"])
+        columns = st.columns(min(len(changes), 4))
+        for column, (store_name, prices) in zip(columns, changes.iterrows()):
+            column.metric(
+                store_name,
+                f"{prices['last']:.2f} / {unit}",
+                f"{(prices['last'] / prices['first'] - 1):+.1%}" if prices["first"] else None,
+                delta_color="inverse",
+            )
+
+        st.line_chart(history, x="observed_on", y="price_per_unit", color="store_name")
+        st.dataframe(
+            history,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "observed_on": st.column_config.DateColumn("Date"),
+                "store_name": "Store",
+                "currency": "Currency",
+                "unit_price": st.column_config.NumberColumn("Price", format="%.2f"),
+                "package_size": st.column_config.NumberColumn("Size", format="%.3f"),
+                "quantity_unit": "Unit",
+                "price_per_unit": st.column_config.NumberColumn("Price per unit", format="%.2f"),
+            },
+        )
+
+
+try:
+
+        query = st.text_input(
+            "Search",
+            placeholder="Product or brand (e.g. lait entier, Vollmilch, M-Budget)",
+            label_visibility="collapsed"
+        )
+
+        if not query.strip():
+            st.stop()
+
+        results = search_products(query)
+
+        if results.empty:
+            st.warning("No product matches this search")
+            st.stop()
+
+        product_results(results)
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
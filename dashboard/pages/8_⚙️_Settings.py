@@ -0,0 +1,76 @@
+"""
+Page Settings
+
+Panneau Performance : durée des requêtes du dashboard (p50 / p95 par
+requête, part Postgres / Parquet, taux de hit du cache) et plans des
+requêtes lentes. Le temps qui ne figure pas ici est celui du rendu.
+"""
+import streamlit as st
+from config import SLOW_QUERY_MS, QUERY_LOG_SIZE
+from data import get_query_stats, get_slow_queries, reset_query_log
+from components.styles import load_styles
+
+# Charger les styles
+load_styles()
+
+st.markdown("# Settings")
+st.caption("Application configuration")
+
+try:
+
+        ############################ Performance ############################
+
+        cols = st.columns([8, 1, 1])
+        with cols[0]:
+            st.markdown("### Performance")
+            st.caption(
+                f"Data-layer calls since the dashboard started (last {QUERY_LOG_SIZE:,}), all sessions. "
+                f"Source = Postgres or Parquet time on cache misses."
+            )
+        with cols[1]:
+            if st.button("↻", key="performance_refresh"):
+                st.rerun()
+        with cols[2]:
+            if st.button("Reset", key="performance_reset"):
+                reset_query_log()
+                st.rerun()
+
+        stats = get_query_stats()
+
+        if stats.empty:
+            st.info("No query recorded yet: open the other pages first")
+            st.stop()
+
+        st.bar_chart(stats, x="name", y=["p50_ms", "p95_ms"], stack=False, horizontal=True)
+        st.dataframe(
+            stats,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "name": "Query",
+                "calls": "Calls",
+                "hit_rate": st.column_config.ProgressColumn("Cache hits", format="percent", min_value=0, max_value=1),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                "source_p50_ms": st.column_config.NumberColumn("Source p50 (ms)", format="%.1f"),
+                "source_p95_ms": st.column_config.NumberColumn("Source p95 (ms)", format="%.1f"),
+                "rows": st.column_config.NumberColumn("Rows", format="%.0f"),
+                "bytes": st.column_config.NumberColumn("Bytes", format="%.0f"),
+                "last_call": st.column_config.DatetimeColumn("Last call", format="HH:mm:ss"),
+            },
+        )
+
+        ############################ Requêtes lentes ############################
+
+        st.markdown(f"### Slow queries (≥ {SLOW_QUERY_MS:.0f} ms)")
+        slow_queries = get_slow_queries()
+        if not slow_queries:
+            st.caption("No slow query recorded")
+        for query in slow_queries:
+            with st.expander(f"{query.name} · {query.source_ms:.0f} ms · {query.rows:,} rows · {query.at:%H:%M:%S}"):
+                st.code(query.plan, language="text")
+
+except Exception as e:
+    st.error(f"Error: {str(e)}")
+    import traceback
+    st.code(traceback.format_exc())
@@ -0,0 +1,153 @@
+-- ============================================================================
+-- BENCHMARK : TABLE DE MAPPING vs CLÉ DIRECTE item.transaction_id
+-- ============================================================================
+-- Génère 1M transactions et 8M items synthétiques dans un schéma jetable
+-- "bench", avec les deux modèles :
+--   - mapping : item + transaction_item_mapping (avant 09-flatten-mappings.sql)
+--   - direct  : item.transaction_id + index couvrant (après)
+-- puis exécute les requêtes de v_transactions_summary et v_spending_by_category
+-- sur chacun pour comparer temps et buffers lus.
+--
+-- Usage (psql, jamais sur la base de production) :
+--   psql -U receipt_user -d receipt_processing -f pg/benchmarks/flatten_mappings.sql
+
+\set transactions 1000000
+\set items_per_transaction 8
+\timing on
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+
+-- ============================================================================
+-- DONNÉES COMMUNES
+-- ============================================================================
+
+CREATE TABLE bench.item_category AS
+SELECT g AS category_id, 'Main ' || (g % 20) AS category_main, 'Sub ' || g AS category_sub
+FROM generate_series(1, 80) AS g;
+ALTER TABLE bench.item_category ADD PRIMARY KEY (category_id);
+
+CREATE TABLE bench.transaction AS
+SELECT
+    g AS transaction_id,
+    (g % 200) + 1 AS store_id,
+    DATE '2020-01-01' + (g % 2190) AS transaction_date,
+    'CHF'::char(3) AS currency,
+    round((random() * 200)::numeric, 2) AS total
+FROM generate_series(1, :transactions) AS g;
+ALTER TABLE bench.transaction ADD PRIMARY KEY (transaction_id);
+CREATE INDEX ON bench.transaction(transaction_date);
+
+-- ============================================================================
+-- MODÈLE 1 : TABLE DE MAPPING
+-- ============================================================================
+
+CREATE TABLE bench.item_mapped AS
+SELECT
+    g AS item_id,
+    'Produit ' || (g % 5000) AS product_name,
+    round((random() * 20)::numeric, 2) AS total_price,
+    (g % 80) + 1 AS category_id
+FROM generate_series(1, :transactions * :items_per_transaction) AS g;
+ALTER TABLE bench.item_mapped ADD PRIMARY KEY (item_id);
+CREATE INDEX ON bench.item_mapped(category_id);
+
+CREATE TABLE bench.transaction_item_mapping AS
+SELECT ((item_id - 1) / :items_per_transaction) + 1 AS transaction_id, item_id
+FROM bench.item_mapped;
+ALTER TABLE bench.transaction_item_mapping ADD PRIMARY KEY (transaction_id, item_id);
+CREATE INDEX ON bench.transaction_item_mapping(item_id);
+
+-- ============================================================================
+-- MODÈLE 2 : CLÉ DIRECTE + INDEX COUVRANT
+-- ============================================================================
+
+CREATE TABLE bench.item_direct AS
+SELECT ((item_id - 1) / :items_per_transaction) + 1 AS transaction_id, item_id,
+       product_name, total_price, category_id
+FROM bench.item_mapped;
+ALTER TABLE bench.item_direct ADD PRIMARY KEY (item_id);
+CREATE INDEX ON bench.item_direct(category_id);
+CREATE INDEX ON bench.item_direct(transaction_id) INCLUDE (category_id, total_price);
+
+VACUUM ANALYZE bench.transaction;
+VACUUM ANALYZE bench.item_mapped;
+VACUUM ANALYZE bench.transaction_item_mapping;
+VACUUM ANALYZE bench.item_direct;
+
+-- ============================================================================
+-- v_transactions_summary (un mois)
+-- ============================================================================
+
+\echo '--- Résumé des transactions d''un mois : mapping'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.transaction_id, t.total, COUNT(i.item_id)
+FROM bench.transaction t
+LEFT JOIN bench.transaction_item_mapping tim ON t.transaction_id = tim.transaction_id
+LEFT JOIN bench.item_mapped i ON tim.item_id = i.item_id
+WHERE t.transaction_date >= DATE '2024-03-01' AND t.transaction_date < DATE '2024-04-01'
+GROUP BY t.transaction_id;
+
+\echo '--- Résumé des transactions d''un mois : direct'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.transaction_id, t.total, COUNT(i.item_id)
+FROM bench.transaction t
+LEFT JOIN bench.item_direct i ON i.transaction_id = t.transaction_id
+WHERE t.transaction_date >= DATE '2024-03-01' AND t.transaction_date < DATE '2024-04-01'
+GROUP BY t.transaction_id;
+
+-- ============================================================================
+-- v_spending_by_category (une année, puis tout l'historique)
+-- ============================================================================
+
+\echo '--- Dépenses par catégorie sur un an : mapping'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.currency, c.category_main, c.category_sub, DATE_TRUNC('month', t.transaction_date) AS month,
+       COUNT(i.item_id), SUM(i.total_price)
+FROM bench.transaction_item_mapping tim
+JOIN bench.item_mapped i ON tim.item_id = i.item_id
+JOIN bench.item_category c ON i.category_id = c.category_id
+JOIN bench.transaction t ON tim.transaction_id = t.transaction_id
+WHERE t.transaction_date >= DATE '2024-01-01' AND t.transaction_date < DATE '2025-01-01'
+GROUP BY 1, 2, 3, 4;
+
+\echo '--- Dépenses par catégorie sur un an : direct'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.currency, c.category_main, c.category_sub, DATE_TRUNC('month', t.transaction_date) AS month,
+       COUNT(i.item_id), SUM(i.total_price)
+FROM bench.item_direct i
+JOIN bench.item_category c ON i.category_id = c.category_id
+JOIN bench.transaction t ON i.transaction_id = t.transaction_id
+WHERE t.transaction_date >= DATE '2024-01-01' AND t.transaction_date < DATE '2025-01-01'
+GROUP BY 1, 2, 3, 4;
+
+\echo '--- Dépenses par catégorie, tout l''historique : mapping'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.currency, c.category_main, c.category_sub, DATE_TRUNC('month', t.transaction_date) AS month,
+       COUNT(i.item_id), SUM(i.total_price)
+FROM bench.transaction_item_mapping tim
+JOIN bench.item_mapped i ON tim.item_id = i.item_id
+JOIN bench.item_category c ON i.category_id = c.category_id
+JOIN bench.transaction t ON tim.transaction_id = t.transaction_id
+GROUP BY 1, 2, 3, 4;
+
+\echo '--- Dépenses par catégorie, tout l''historique : direct'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT t.currency, c.category_main, c.category_sub, DATE_TRUNC('month', t.transaction_date) AS month,
+       COUNT(i.item_id), SUM(i.total_price)
+FROM bench.item_direct i
+JOIN bench.item_category c ON i.category_id = c.category_id
+JOIN bench.transaction t ON i.transaction_id = t.transaction_id
+GROUP BY 1, 2, 3, 4;
+
+-- ============================================================================
+-- TAILLES
+-- ============================================================================
+
+\echo '--- Taille totale (table + index)'
+SELECT 'mapping' AS model,
+       pg_size_pretty(pg_total_relation_size('bench.item_mapped') + pg_total_relation_size('bench.transaction_item_mapping')) AS size
+UNION ALL
+SELECT 'direct', pg_size_pretty(pg_total_relation_size('bench.item_direct'));
+
+DROP SCHEMA bench CASCADE;
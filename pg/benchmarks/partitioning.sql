@@ -0,0 +1,172 @@
+-- ============================================================================
+-- BENCHMARK : TABLE HEAP + B-TREE vs PARTITIONNEMENT MENSUEL + BRIN
+-- ============================================================================
+-- Génère 10M transactions synthétiques (6 ans d'historique) dans un schéma
+-- jetable "bench", avec les deux layouts :
+--   - bench.tx_heap : table unique, index B-tree de 01-creation-tables.sql
+--   - bench.tx_part : partitions mensuelles, BRIN sur transaction_date
+-- puis compare le temps de chargement, la taille des index et les scans par
+-- plage de dates typiques du dashboard.
+--
+-- Usage (psql, jamais sur la base de production) :
+--   psql -U receipt_user -d receipt_processing -f pg/benchmarks/partitioning.sql
+--
+-- Paramètres : nombre de lignes et période générée.
+
+\set rows 10000000
+\set start_date '''2020-01-01'''
+\set months 72
+\timing on
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+
+-- ============================================================================
+-- DONNÉES SOURCES (générées une fois, triées par date comme en production)
+-- ============================================================================
+
+CREATE UNLOGGED TABLE bench.source AS
+SELECT
+    g AS transaction_id,
+    (g % 50000) + 1 AS message_id,
+    (g % 200) + 1 AS store_id,
+    (g % 3) + 1 AS transaction_category_id,
+    (:start_date::date + ((g::bigint * :months * 30) / :rows)::int) AS transaction_date,
+    make_time((g % 14) + 8, g % 60, 0) AS transaction_time,
+    'CHF'::char(3) AS currency,
+    round((random() * 200)::numeric, 2) AS total,
+    'carte'::varchar(50) AS payment_method,
+    'signal'::varchar(50) AS source
+FROM generate_series(1, :rows) AS g;
+
+-- ============================================================================
+-- LAYOUT 1 : HEAP + B-TREE
+-- ============================================================================
+
+CREATE TABLE bench.tx_heap (
+    transaction_id INTEGER PRIMARY KEY,
+    message_id INTEGER,
+    store_id INTEGER NOT NULL,
+    transaction_category_id INTEGER,
+    transaction_date DATE NOT NULL,
+    transaction_time TIME,
+    currency CHAR(3) NOT NULL,
+    total DECIMAL(10, 2) NOT NULL,
+    payment_method VARCHAR(50),
+    source VARCHAR(50)
+);
+CREATE INDEX ON bench.tx_heap(store_id);
+CREATE INDEX ON bench.tx_heap(message_id);
+CREATE INDEX ON bench.tx_heap(transaction_category_id);
+CREATE INDEX ON bench.tx_heap(transaction_date);
+CREATE INDEX ON bench.tx_heap(currency);
+CREATE INDEX ON bench.tx_heap(transaction_date, store_id);
+CREATE INDEX ON bench.tx_heap(source);
+
+\echo '--- Chargement heap + 7 index B-tree'
+INSERT INTO bench.tx_heap SELECT * FROM bench.source;
+
+-- ============================================================================
+-- LAYOUT 2 : PARTITIONS MENSUELLES + BRIN
+-- ============================================================================
+
+CREATE TABLE bench.tx_part (
+    transaction_id INTEGER NOT NULL,
+    message_id INTEGER,
+    store_id INTEGER NOT NULL,
+    transaction_category_id INTEGER,
+    transaction_date DATE NOT NULL,
+    transaction_time TIME,
+    currency CHAR(3) NOT NULL,
+    total DECIMAL(10, 2) NOT NULL,
+    payment_method VARCHAR(50),
+    source VARCHAR(50),
+    PRIMARY KEY (transaction_id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+
+SELECT format(
+    'CREATE TABLE bench.tx_part_%s PARTITION OF bench.tx_part FOR VALUES FROM (%L) TO (%L)',
+    to_char(m, 'YYYYMM'), m::date, (m + INTERVAL '1 month')::date
+)
+FROM generate_series(:start_date::date, :start_date::date + make_interval(months => :months), INTERVAL '1 month') AS m
+\gexec
+CREATE TABLE bench.tx_part_default PARTITION OF bench.tx_part DEFAULT;
+
+CREATE INDEX ON bench.tx_part(transaction_id);
+CREATE INDEX ON bench.tx_part USING BRIN (transaction_date);
+CREATE INDEX ON bench.tx_part(store_id);
+CREATE INDEX ON bench.tx_part(message_id);
+CREATE INDEX ON bench.tx_part(transaction_category_id);
+CREATE INDEX ON bench.tx_part(transaction_date, store_id);
+
+\echo '--- Chargement partitionné + BRIN'
+INSERT INTO bench.tx_part SELECT * FROM bench.source;
+
+ANALYZE bench.tx_heap;
+ANALYZE bench.tx_part;
+
+-- ============================================================================
+-- TAILLES
+-- ============================================================================
+
+\echo '--- Taille des index'
+SELECT 'tx_heap' AS layout, pg_size_pretty(pg_indexes_size('bench.tx_heap')) AS index_size
+UNION ALL
+SELECT 'tx_part', pg_size_pretty(sum(pg_indexes_size(inhrelid))::bigint)
+FROM pg_inherits WHERE inhparent = 'bench.tx_part'::regclass;
+
+-- ============================================================================
+-- REQUÊTES (mois courant du dashboard, trimestre, année)
+-- ============================================================================
+
+\echo '--- Un mois : heap'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT transaction_date, store_id, count(*), sum(total)
+FROM bench.tx_heap
+WHERE transaction_date >= DATE '2025-03-01' AND transaction_date < DATE '2025-04-01'
+GROUP BY transaction_date, store_id;
+
+\echo '--- Un mois : partitionné'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT transaction_date, store_id, count(*), sum(total)
+FROM bench.tx_part
+WHERE transaction_date >= DATE '2025-03-01' AND transaction_date < DATE '2025-04-01'
+GROUP BY transaction_date, store_id;
+
+\echo '--- Deux semaines : heap'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT sum(total) FROM bench.tx_heap
+WHERE transaction_date BETWEEN DATE '2025-03-10' AND DATE '2025-03-24';
+
+\echo '--- Deux semaines : partitionné'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT sum(total) FROM bench.tx_part
+WHERE transaction_date BETWEEN DATE '2025-03-10' AND DATE '2025-03-24';
+
+\echo '--- Une année : heap'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT date_trunc('month', transaction_date), sum(total)
+FROM bench.tx_heap
+WHERE transaction_date >= DATE '2024-01-01' AND transaction_date < DATE '2025-01-01'
+GROUP BY 1;
+
+\echo '--- Une année : partitionné'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT date_trunc('month', transaction_date), sum(total)
+FROM bench.tx_part
+WHERE transaction_date >= DATE '2024-01-01' AND transaction_date < DATE '2025-01-01'
+GROUP BY 1;
+
+\echo '--- Insertion de 100k nouvelles lignes (coût d''écriture des index) : heap'
+INSERT INTO bench.tx_heap
+SELECT transaction_id + :rows, message_id, store_id, transaction_category_id,
+       transaction_date, transaction_time, currency, total, payment_method, source
+FROM bench.source WHERE transaction_id <= 100000;
+
+\echo '--- Insertion de 100k nouvelles lignes : partitionné'
+INSERT INTO bench.tx_part
+SELECT transaction_id + :rows, message_id, store_id, transaction_category_id,
+       transaction_date, transaction_time, currency, total, payment_method, source
+FROM bench.source WHERE transaction_id <= 100000;
+
+DROP SCHEMA bench CASCADE;
@@ -51,6 +51,110 @@ else
     echo "5️⃣  Fichier de vues non trouvé, ignoré."
 fi
 
+# File de traitement des tickets (workers)
+if [ -f "pg/init_scripts/07-creation-receipt-job.sql" ]; then
+    echo "7️⃣  Création de la file receipt_job..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/07-creation-receipt-job.sql
+else
+    echo "7️⃣  Fichier receipt_job non trouvé, ignoré."
+fi
+
+# Partitionnement mensuel (migration)
+if [ -f "pg/init_scripts/08-partitioning.sql" ]; then
+    echo "8️⃣  Partitionnement de transaction et signal_message..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/08-partitioning.sql
+else
+    echo "8️⃣  Fichier de partitionnement non trouvé, ignoré."
+fi
+
+# Clés directes item -> transaction et attachment -> message (migration)
+if [ -f "pg/init_scripts/09-flatten-mappings.sql" ]; then
+    echo "9️⃣  Aplatissement des tables de mapping..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/09-flatten-mappings.sql
+else
+    echo "9️⃣  Fichier d'aplatissement des mappings non trouvé, ignoré."
+fi
+
+# Agrégats quotidiens matérialisés (migration)
+if [ -f "pg/init_scripts/10-daily-spending.sql" ]; then
+    echo "🔟 Création des agrégats quotidiens daily_spending..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/10-daily-spending.sql
+else
+    echo "🔟 Fichier des agrégats quotidiens non trouvé, ignoré."
+fi
+
+# Version du prompt d'extraction (migration)
+if [ -f "pg/init_scripts/11-prompt-version.sql" ]; then
+    echo "1️⃣1️⃣ Création du compteur de version des catégories..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/11-prompt-version.sql
+else
+    echo "1️⃣1️⃣ Fichier de version du prompt non trouvé, ignoré."
+fi
+
+# Revue des catégories d'articles inconnues (migration)
+if [ -f "pg/init_scripts/12-category-review.sql" ]; then
+    echo "1️⃣2️⃣ Création de la revue des catégories..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/12-category-review.sql
+else
+    echo "1️⃣2️⃣ Fichier de revue des catégories non trouvé, ignoré."
+fi
+
+# Dictionnaire de produits (migration)
+if [ -f "pg/init_scripts/13-product-dictionary.sql" ]; then
+    echo "1️⃣3️⃣ Création du dictionnaire de produits..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/13-product-dictionary.sql
+else
+    echo "1️⃣3️⃣ Fichier du dictionnaire de produits non trouvé, ignoré."
+fi
+
+# Sorties des assets Dagster (migration)
+if [ -f "pg/init_scripts/14-asset-output.sql" ]; then
+    echo "1️⃣4️⃣ Création de la table des sorties d'assets..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/14-asset-output.sql
+else
+    echo "1️⃣4️⃣ Fichier des sorties d'assets non trouvé, ignoré."
+fi
+
+# Index de pagination des transactions (migration)
+if [ -f "pg/init_scripts/15-transaction-keyset.sql" ]; then
+    echo "1️⃣5️⃣ Création des index de pagination des transactions..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/15-transaction-keyset.sql
+else
+    echo "1️⃣5️⃣ Fichier des index de pagination non trouvé, ignoré."
+fi
+
+# Recherche de produits (migration)
+if [ -f "pg/init_scripts/16-product-search.sql" ]; then
+    echo "1️⃣6️⃣ Création de la recherche de produits..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/16-product-search.sql
+else
+    echo "1️⃣6️⃣ Fichier de recherche de produits non trouvé, ignoré."
+fi
+
+# Cube des dépenses par catégorie (migration)
+if [ -f "pg/init_scripts/17-category-spending.sql" ]; then
+    echo "1️⃣7️⃣ Création du cube des dépenses par catégorie..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/17-category-spending.sql
+else
+    echo "1️⃣7️⃣ Fichier du cube des dépenses par catégorie non trouvé, ignoré."
+fi
+
+# Suivi des prix par produit et magasin (migration)
+if [ -f "pg/init_scripts/18-price-observations.sql" ]; then
+    echo "1️⃣8️⃣ Création du suivi des prix..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/18-price-observations.sql
+else
+    echo "1️⃣8️⃣ Fichier du suivi des prix non trouvé, ignoré."
+fi
+
+# Un seul chemin de traitement par message (migration)
+if [ -f "pg/init_scripts/19-message-routing.sql" ]; then
+    echo "1️⃣9️⃣ Création du partage des messages entre pipeline et file..."
+    docker exec -i receipt-postgres psql -U receipt_user -d receipt_processing < pg/init_scripts/19-message-routing.sql
+else
+    echo "1️⃣9️⃣ Fichier du partage des messages non trouvé, ignoré."
+fi
+
 echo ""
 echo "✅ Base de données réinitialisée !"
 echo ""
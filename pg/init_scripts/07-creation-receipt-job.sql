@@ -0,0 +1,52 @@
+-- ============================================================================
+-- FILE DE TRAITEMENT DES TICKETS (RECEIPT_JOB)
+-- ============================================================================
+-- Une ligne par message Signal à traiter. Les workers (tickapp/workers)
+-- réclament les jobs avec SELECT ... FOR UPDATE SKIP LOCKED, les gardent via
+-- un bail (lease) prolongé par heartbeat, et les jobs dont le bail a expiré
+-- redeviennent visibles pour un autre worker.
+--
+-- Cycle de vie :
+--   pending -> running -> done
+--                      -> pending (retry, attempts < max_attempts)
+--                      -> dead    (dead-letter, attempts >= max_attempts)
+
+DROP TABLE IF EXISTS receipt_job CASCADE;
+
+CREATE TABLE receipt_job (
+    job_id BIGSERIAL PRIMARY KEY,
+    message_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Pas de reprise avant cette date (backoff)
+    locked_by VARCHAR(255),                                      -- Identifiant du worker propriétaire du bail
+    lease_expires_at TIMESTAMP,                                  -- Visibility timeout
+    heartbeat_at TIMESTAMP,
+    last_error TEXT,
+    transaction_id INTEGER,                                      -- Résultat (rempli quand status = 'done')
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    UNIQUE(message_id),  -- Un seul job par message (enqueue idempotent)
+    CHECK (status IN ('pending', 'running', 'done', 'dead')),
+    FOREIGN KEY (message_id) REFERENCES signal_message(message_id) ON DELETE CASCADE,
+    FOREIGN KEY (transaction_id) REFERENCES transaction(transaction_id) ON DELETE SET NULL
+);
+
+-- Jobs prêts à être réclamés
+CREATE INDEX idx_receipt_job_pending ON receipt_job(available_at, job_id)
+    WHERE status = 'pending';
+
+-- Jobs en cours dont le bail peut expirer
+CREATE INDEX idx_receipt_job_lease ON receipt_job(lease_expires_at)
+    WHERE status = 'running';
+
+-- Dead-letter à inspecter
+CREATE INDEX idx_receipt_job_dead ON receipt_job(updated_at)
+    WHERE status = 'dead';
+
+CREATE TRIGGER update_receipt_job_updated_at BEFORE UPDATE ON receipt_job
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+SELECT 'Table receipt_job créée avec succès!' as status;
@@ -0,0 +1,311 @@
+-- ============================================================================
+-- MIGRATION : PARTITIONNEMENT MENSUEL DE TRANSACTION ET SIGNAL_MESSAGE
+-- ============================================================================
+-- transaction est partitionnée par mois sur transaction_date, signal_message
+-- par mois sur timestamp. Les colonnes temporelles passent en index BRIN et
+-- les index B-tree redondants avec une contrainte UNIQUE / PRIMARY KEY sont
+-- supprimés.
+--
+-- PostgreSQL n'accepte une clé étrangère vers une table partitionnée que si
+-- elle inclut la clé de partition. Les FK qui pointaient vers transaction et
+-- signal_message (tables de mapping, transaction.message_id, receipt_job) sont
+-- donc remplacées par des triggers AFTER DELETE qui reproduisent leurs
+-- ON DELETE CASCADE / SET NULL.
+--
+-- Les partitions des mois futurs sont créées par maintain_monthly_partitions(),
+-- appelée par le job Dagster partition_maintenance. Une partition DEFAULT
+-- reçoit les dates hors plage (ex: date mal extraite) ; la maintenance les
+-- déplace dans leur partition mensuelle dès qu'elle est créée.
+--
+-- À exécuter une seule fois (sur une base neuve ou existante).
+
+-- ============================================================================
+-- FONCTIONS DE MAINTENANCE DES PARTITIONS
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION ensure_monthly_partition(p_parent TEXT, p_column TEXT, p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := format('%s_y%sm%s', p_parent, to_char(v_start, 'YYYY'), to_char(v_start, 'MM'));
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name, p_parent);
+
+    -- Sortir de la partition DEFAULT les lignes du mois (sinon ATTACH échoue).
+    -- Les triggers de cascade ne doivent pas voir ce déplacement comme une suppression.
+    PERFORM set_config('tickapp.partition_maintenance', 'on', true);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+        p_parent || '_default', p_column, v_start, p_column, v_end, v_name
+    );
+    PERFORM set_config('tickapp.partition_maintenance', 'off', true);
+
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   p_parent, v_name, v_start, v_end);
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_monthly_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_target RECORD;
+    v_month DATE;
+    v_created TEXT;
+BEGIN
+    FOR v_target IN SELECT * FROM (VALUES ('transaction', 'transaction_date'), ('signal_message', 'timestamp')) AS t(parent, col)
+    LOOP
+        -- Mois courant, mois précédent (tickets scannés en retard) et mois à venir
+        FOR v_month IN
+            SELECT generate_series(
+                date_trunc('month', CURRENT_DATE) - INTERVAL '1 month',
+                date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead),
+                INTERVAL '1 month'
+            )::date
+        LOOP
+            v_created := ensure_monthly_partition(v_target.parent, v_target.col, v_month);
+            IF v_created IS NOT NULL THEN
+                RETURN NEXT v_created;
+            END IF;
+        END LOOP;
+
+        -- Mois présents dans la partition DEFAULT
+        FOR v_month IN
+            EXECUTE format('SELECT DISTINCT date_trunc(''month'', %I)::date FROM %I',
+                           v_target.col, v_target.parent || '_default')
+        LOOP
+            v_created := ensure_monthly_partition(v_target.parent, v_target.col, v_month);
+            IF v_created IS NOT NULL THEN
+                RETURN NEXT v_created;
+            END IF;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- TRIGGERS REMPLAÇANT LES CLÉS ÉTRANGÈRES
+-- ============================================================================
+-- Un UPDATE qui change la clé de partition est exécuté comme DELETE + INSERT :
+-- la ligne existe toujours à la fin de l'instruction, on ne cascade pas.
+
+CREATE OR REPLACE FUNCTION cascade_transaction_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM transaction WHERE transaction_id = OLD.transaction_id) THEN
+        RETURN OLD;
+    END IF;
+    DELETE FROM transaction_item_mapping WHERE transaction_id = OLD.transaction_id;
+    DELETE FROM transaction_attachment_mapping WHERE transaction_id = OLD.transaction_id;
+    UPDATE receipt_job SET transaction_id = NULL WHERE transaction_id = OLD.transaction_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cascade_signal_message_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM signal_message WHERE message_id = OLD.message_id) THEN
+        RETURN OLD;
+    END IF;
+    DELETE FROM message_attachment_mapping WHERE message_id = OLD.message_id;
+    UPDATE transaction SET message_id = NULL WHERE message_id = OLD.message_id;
+    DELETE FROM receipt_job WHERE message_id = OLD.message_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- MIGRATION
+-- ============================================================================
+
+BEGIN;
+
+-- Les vues suivent l'OID des tables renommées : on les recrée à la fin
+DROP VIEW IF EXISTS daily_spending_summary;
+DROP VIEW IF EXISTS v_spending_by_category;
+DROP VIEW IF EXISTS v_transactions_summary;
+
+-- Clés étrangères vers les tables qui vont être partitionnées
+ALTER TABLE transaction_item_mapping DROP CONSTRAINT IF EXISTS transaction_item_mapping_transaction_id_fkey;
+ALTER TABLE transaction_attachment_mapping DROP CONSTRAINT IF EXISTS transaction_attachment_mapping_transaction_id_fkey;
+ALTER TABLE message_attachment_mapping DROP CONSTRAINT IF EXISTS message_attachment_mapping_message_id_fkey;
+ALTER TABLE transaction DROP CONSTRAINT IF EXISTS transaction_message_id_fkey;
+ALTER TABLE receipt_job DROP CONSTRAINT IF EXISTS receipt_job_message_id_fkey;
+ALTER TABLE receipt_job DROP CONSTRAINT IF EXISTS receipt_job_transaction_id_fkey;
+
+-- ----------------------------------------------------------------------------
+-- SIGNAL_MESSAGE
+-- ----------------------------------------------------------------------------
+
+ALTER TABLE signal_message RENAME TO signal_message_old;
+ALTER TABLE signal_message_old RENAME CONSTRAINT signal_message_pkey TO signal_message_old_pkey;
+
+CREATE TABLE signal_message (
+    message_id INTEGER NOT NULL DEFAULT nextval('signal_message_message_id_seq'),
+    sender_id INTEGER,
+    group_id INTEGER,
+    timestamp TIMESTAMP NOT NULL,
+    text_content TEXT,
+    is_group_message BOOLEAN DEFAULT FALSE,
+    signal_account VARCHAR(255),
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (message_id, timestamp),
+    FOREIGN KEY (sender_id) REFERENCES signal_sender(sender_id) ON DELETE SET NULL,
+    FOREIGN KEY (group_id) REFERENCES signal_group(group_id) ON DELETE SET NULL
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE signal_message_message_id_seq OWNED BY signal_message.message_id;
+
+CREATE TABLE signal_message_default PARTITION OF signal_message DEFAULT;
+
+SELECT ensure_monthly_partition('signal_message', 'timestamp', m)
+FROM (SELECT DISTINCT date_trunc('month', timestamp)::date AS m FROM signal_message_old) months;
+
+INSERT INTO signal_message SELECT * FROM signal_message_old;
+DROP TABLE signal_message_old;
+
+-- Lookup par ID (plus de PK sur message_id seul)
+CREATE INDEX idx_message_id ON signal_message(message_id);
+CREATE INDEX idx_message_timestamp ON signal_message USING BRIN (timestamp);
+CREATE INDEX idx_message_processed ON signal_message(processed);
+CREATE INDEX idx_message_sender ON signal_message(sender_id);
+CREATE INDEX idx_message_group ON signal_message(group_id);
+
+CREATE TRIGGER cascade_signal_message_delete AFTER DELETE ON signal_message
+    FOR EACH ROW EXECUTE FUNCTION cascade_signal_message_delete();
+
+-- ----------------------------------------------------------------------------
+-- TRANSACTION
+-- ----------------------------------------------------------------------------
+
+ALTER TABLE transaction RENAME TO transaction_old;
+ALTER TABLE transaction_old RENAME CONSTRAINT transaction_pkey TO transaction_old_pkey;
+
+CREATE TABLE transaction (
+    transaction_id INTEGER NOT NULL DEFAULT nextval('transaction_transaction_id_seq'),
+    message_id INTEGER,
+    store_id INTEGER NOT NULL,
+    transaction_category_id INTEGER,
+    receipt_number VARCHAR(100),
+    transaction_date DATE NOT NULL,
+    transaction_time TIME,
+    currency CHAR(3) NOT NULL,
+    total DECIMAL(10, 2) NOT NULL,
+    payment_method VARCHAR(50),
+    source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP,
+    PRIMARY KEY (transaction_id, transaction_date),
+    FOREIGN KEY (store_id) REFERENCES store(store_id) ON DELETE RESTRICT,
+    FOREIGN KEY (transaction_category_id) REFERENCES transaction_category(category_id) ON DELETE SET NULL
+) PARTITION BY RANGE (transaction_date);
+
+ALTER SEQUENCE transaction_transaction_id_seq OWNED BY transaction.transaction_id;
+
+CREATE TABLE transaction_default PARTITION OF transaction DEFAULT;
+
+SELECT ensure_monthly_partition('transaction', 'transaction_date', m)
+FROM (SELECT DISTINCT date_trunc('month', transaction_date)::date AS m FROM transaction_old) months;
+
+INSERT INTO transaction SELECT * FROM transaction_old;
+DROP TABLE transaction_old;
+
+-- idx_transaction_currency et idx_transaction_source ne sont pas recréés :
+-- faible sélectivité, jamais utilisés en filtre.
+-- Lookup par ID (plus de PK sur transaction_id seul)
+CREATE INDEX idx_transaction_id ON transaction(transaction_id);
+CREATE INDEX idx_transaction_date ON transaction USING BRIN (transaction_date);
+CREATE INDEX idx_transaction_store ON transaction(store_id);
+CREATE INDEX idx_transaction_message ON transaction(message_id);
+CREATE INDEX idx_transaction_category ON transaction(transaction_category_id);
+CREATE INDEX idx_transaction_date_store ON transaction(transaction_date, store_id);
+
+CREATE TRIGGER cascade_transaction_delete AFTER DELETE ON transaction
+    FOR EACH ROW EXECUTE FUNCTION cascade_transaction_delete();
+
+-- ----------------------------------------------------------------------------
+-- INDEX REDONDANTS
+-- ----------------------------------------------------------------------------
+
+-- Doublons des contraintes UNIQUE
+DROP INDEX IF EXISTS idx_store_location;            -- UNIQUE(store_name, city, postal_code)
+DROP INDEX IF EXISTS idx_sender_uuid;               -- UNIQUE(signal_uuid)
+DROP INDEX IF EXISTS idx_group_signal_id;           -- UNIQUE(signal_group_id)
+DROP INDEX IF EXISTS idx_transaction_category_name; -- UNIQUE(name)
+
+-- Doublons de la première colonne des PRIMARY KEY des tables de mapping
+DROP INDEX IF EXISTS idx_msg_att_mapping_message;
+DROP INDEX IF EXISTS idx_trans_item_mapping_transaction;
+DROP INDEX IF EXISTS idx_trans_att_mapping_transaction;
+
+-- ----------------------------------------------------------------------------
+-- PARTITIONS À VENIR
+-- ----------------------------------------------------------------------------
+
+SELECT maintain_monthly_partitions(3);
+
+-- ----------------------------------------------------------------------------
+-- VUES
+-- ----------------------------------------------------------------------------
+
+CREATE VIEW v_transactions_summary AS
+SELECT
+    t.transaction_id,
+    t.transaction_date,
+    t.transaction_time,
+    t.total,
+    t.currency,
+    t.payment_method,
+    s.store_name,
+    s.city,
+    s.country_code,
+    tc.name as transaction_category,
+    COUNT(i.item_id) as item_count,
+    t.source
+FROM transaction t
+JOIN store s ON t.store_id = s.store_id
+LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+LEFT JOIN transaction_item_mapping tim ON t.transaction_id = tim.transaction_id
+LEFT JOIN item i ON tim.item_id = i.item_id
+GROUP BY t.transaction_id, t.transaction_date, s.store_id, tc.category_id;
+
+CREATE VIEW v_spending_by_category AS
+SELECT
+    t.currency,
+    c.category_main,
+    c.category_sub,
+    DATE_TRUNC('month', t.transaction_date) as month,
+    COUNT(i.item_id) as item_count,
+    SUM(i.total_price) as total_spent
+FROM transaction_item_mapping tim
+JOIN item i ON tim.item_id = i.item_id
+JOIN item_category c ON i.category_id = c.category_id
+JOIN transaction t ON tim.transaction_id = t.transaction_id
+GROUP BY t.currency, c.category_main, c.category_sub, month;
+
+CREATE OR REPLACE VIEW daily_spending_summary AS
+SELECT
+    t.transaction_date,
+    s.store_name,
+    tc.name as group,
+    t.currency,
+    COUNT(t.transaction_id) as count,
+    SUM(t.total) as amout
+FROM transaction t
+JOIN store s ON t.store_id = s.store_id
+LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+GROUP BY s.store_name, tc.name, t.transaction_date, t.currency
+ORDER BY t.transaction_date DESC, s.store_name, tc.name;
+
+COMMIT;
+
+SELECT 'Partitionnement mensuel appliqué avec succès!' as status;
@@ -0,0 +1,189 @@
+-- ============================================================================
+-- MIGRATION : CLÉS DIRECTES item -> transaction ET attachment -> message
+-- ============================================================================
+-- Un item appartient à une seule transaction et un attachment à un seul
+-- message : transaction_item_mapping et message_attachment_mapping sont
+-- remplacées par les colonnes item.transaction_id et attachment.message_id,
+-- avec des index couvrants pour les vues d'analyse.
+--
+-- Les anciennes tables deviennent des vues de compatibilité du même nom.
+-- Les INSERT / DELETE sur ces vues renseignent / vident la colonne directe.
+--
+-- transaction et signal_message étant partitionnées (08-partitioning.sql),
+-- les nouvelles colonnes n'ont pas de FOREIGN KEY : les triggers de cascade
+-- sont mis à jour à la place.
+--
+-- À exécuter une seule fois, après 08-partitioning.sql.
+
+BEGIN;
+
+DROP VIEW IF EXISTS daily_spending_summary;
+DROP VIEW IF EXISTS v_spending_by_category;
+DROP VIEW IF EXISTS v_transactions_summary;
+
+-- ============================================================================
+-- ITEM.TRANSACTION_ID
+-- ============================================================================
+
+ALTER TABLE item ADD COLUMN transaction_id INTEGER;
+
+UPDATE item i
+SET transaction_id = tim.transaction_id
+FROM transaction_item_mapping tim
+WHERE tim.item_id = i.item_id;
+
+DROP TABLE transaction_item_mapping;
+
+-- Couvrant pour les agrégats par transaction (nombre d'items, montant par catégorie)
+CREATE INDEX idx_item_transaction ON item(transaction_id) INCLUDE (category_id, total_price);
+
+-- ============================================================================
+-- ATTACHMENT.MESSAGE_ID
+-- ============================================================================
+
+ALTER TABLE attachment ADD COLUMN message_id INTEGER;
+
+UPDATE attachment a
+SET message_id = mam.message_id
+FROM message_attachment_mapping mam
+WHERE mam.attachment_id = a.attachment_id;
+
+DROP TABLE message_attachment_mapping;
+
+-- Couvrant pour la reconstruction des messages (chemins des images)
+CREATE INDEX idx_attachment_message ON attachment(message_id) INCLUDE (content_type, file_path);
+
+-- ============================================================================
+-- CASCADES (remplacent celles de 08-partitioning.sql)
+-- ============================================================================
+
+-- Les items appartiennent à la transaction : ils sont supprimés avec elle
+CREATE OR REPLACE FUNCTION cascade_transaction_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM transaction WHERE transaction_id = OLD.transaction_id) THEN
+        RETURN OLD;
+    END IF;
+    DELETE FROM item WHERE transaction_id = OLD.transaction_id;
+    DELETE FROM transaction_attachment_mapping WHERE transaction_id = OLD.transaction_id;
+    UPDATE receipt_job SET transaction_id = NULL WHERE transaction_id = OLD.transaction_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Les attachments restent liés aux transactions : ils sont seulement détachés du message
+CREATE OR REPLACE FUNCTION cascade_signal_message_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM signal_message WHERE message_id = OLD.message_id) THEN
+        RETURN OLD;
+    END IF;
+    UPDATE attachment SET message_id = NULL WHERE message_id = OLD.message_id;
+    UPDATE transaction SET message_id = NULL WHERE message_id = OLD.message_id;
+    DELETE FROM receipt_job WHERE message_id = OLD.message_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- VUES DE COMPATIBILITÉ
+-- ============================================================================
+
+CREATE VIEW transaction_item_mapping AS
+SELECT transaction_id, item_id
+FROM item
+WHERE transaction_id IS NOT NULL;
+
+CREATE VIEW message_attachment_mapping AS
+SELECT message_id, attachment_id
+FROM attachment
+WHERE message_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION transaction_item_mapping_write()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE item SET transaction_id = NEW.transaction_id WHERE item_id = NEW.item_id;
+        RETURN NEW;
+    END IF;
+    UPDATE item SET transaction_id = NULL
+    WHERE item_id = OLD.item_id AND transaction_id = OLD.transaction_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION message_attachment_mapping_write()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE attachment SET message_id = NEW.message_id WHERE attachment_id = NEW.attachment_id;
+        RETURN NEW;
+    END IF;
+    UPDATE attachment SET message_id = NULL
+    WHERE attachment_id = OLD.attachment_id AND message_id = OLD.message_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_item_mapping_write INSTEAD OF INSERT OR DELETE ON transaction_item_mapping
+    FOR EACH ROW EXECUTE FUNCTION transaction_item_mapping_write();
+
+CREATE TRIGGER message_attachment_mapping_write INSTEAD OF INSERT OR DELETE ON message_attachment_mapping
+    FOR EACH ROW EXECUTE FUNCTION message_attachment_mapping_write();
+
+-- ============================================================================
+-- VUES D'ANALYSE
+-- ============================================================================
+
+CREATE VIEW v_transactions_summary AS
+SELECT
+    t.transaction_id,
+    t.transaction_date,
+    t.transaction_time,
+    t.total,
+    t.currency,
+    t.payment_method,
+    s.store_name,
+    s.city,
+    s.country_code,
+    tc.name as transaction_category,
+    COUNT(i.item_id) as item_count,
+    t.source
+FROM transaction t
+JOIN store s ON t.store_id = s.store_id
+LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+LEFT JOIN item i ON i.transaction_id = t.transaction_id
+GROUP BY t.transaction_id, t.transaction_date, s.store_id, tc.category_id;
+
+CREATE VIEW v_spending_by_category AS
+SELECT
+    t.currency,
+    c.category_main,
+    c.category_sub,
+    DATE_TRUNC('month', t.transaction_date) as month,
+    COUNT(i.item_id) as item_count,
+    SUM(i.total_price) as total_spent
+FROM item i
+JOIN item_category c ON i.category_id = c.category_id
+JOIN transaction t ON i.transaction_id = t.transaction_id
+GROUP BY t.currency, c.category_main, c.category_sub, month;
+
+CREATE OR REPLACE VIEW daily_spending_summary AS
+SELECT
+    t.transaction_date,
+    s.store_name,
+    tc.name as group,
+    t.currency,
+    COUNT(t.transaction_id) as count,
+    SUM(t.total) as amout
+FROM transaction t
+JOIN store s ON t.store_id = s.store_id
+LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+GROUP BY s.store_name, tc.name, t.transaction_date, t.currency
+ORDER BY t.transaction_date DESC, s.store_name, tc.name;
+
+COMMIT;
+
+SELECT 'Mappings aplatis avec succès!' as status;
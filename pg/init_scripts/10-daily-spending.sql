@@ -0,0 +1,144 @@
+-- ============================================================================
+-- AGRÉGATS QUOTIDIENS MATÉRIALISÉS : daily_spending
+-- ============================================================================
+-- daily_spending_summary était une vue GROUP BY sur toute la table
+-- transaction, recalculée à chaque chargement du dashboard. Les agrégats par
+-- jour, magasin, catégorie de transaction et devise sont désormais stockés
+-- dans daily_spending, tenue à jour par trigger dans la même transaction que
+-- l'écriture du ticket (DatabaseClient, AsyncDatabaseClient, receipt_job).
+--
+-- daily_spending_summary garde son nom et ses colonnes et lit cette table.
+-- rebuild_daily_spending(from, to) recalcule une plage (reprise d'historique).
+--
+-- À exécuter une seule fois, après 09-flatten-mappings.sql.
+
+BEGIN;
+
+-- ============================================================================
+-- TABLE
+-- ============================================================================
+
+CREATE TABLE daily_spending (
+    transaction_date DATE NOT NULL,
+    store_id INTEGER NOT NULL REFERENCES store(store_id),
+    transaction_category_id INTEGER REFERENCES transaction_category(category_id),
+    currency CHAR(3) NOT NULL,
+    transaction_count INTEGER NOT NULL,
+    total_amount DECIMAL(12, 2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Transactions sans catégorie : une seule ligne NULL par jour/magasin/devise
+    CONSTRAINT uq_daily_spending UNIQUE NULLS NOT DISTINCT
+        (transaction_date, store_id, transaction_category_id, currency)
+);
+
+-- ============================================================================
+-- MISE À JOUR INCRÉMENTALE
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION daily_spending_apply(
+    p_date DATE, p_store_id INTEGER, p_category_id INTEGER, p_currency CHAR(3),
+    p_count INTEGER, p_amount DECIMAL
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO daily_spending AS ds
+        (transaction_date, store_id, transaction_category_id, currency, transaction_count, total_amount)
+    VALUES (p_date, p_store_id, p_category_id, p_currency, p_count, p_amount)
+    ON CONFLICT ON CONSTRAINT uq_daily_spending DO UPDATE
+    SET transaction_count = ds.transaction_count + EXCLUDED.transaction_count,
+        total_amount = ds.total_amount + EXCLUDED.total_amount,
+        updated_at = CURRENT_TIMESTAMP;
+
+    -- Plus aucune transaction pour ce groupe
+    IF p_count < 0 THEN
+        DELETE FROM daily_spending
+        WHERE transaction_date = p_date
+          AND store_id = p_store_id
+          AND transaction_category_id IS NOT DISTINCT FROM p_category_id
+          AND currency = p_currency
+          AND transaction_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Un UPDATE qui change de partition arrive en DELETE + INSERT : les deltas
+-- s'annulent correctement. Le déplacement de lignes par ensure_monthly_partition
+-- ne change aucun agrégat et est ignoré.
+CREATE OR REPLACE FUNCTION daily_spending_maintain()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM daily_spending_apply(OLD.transaction_date, OLD.store_id, OLD.transaction_category_id,
+                                     OLD.currency, -1, -OLD.total);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM daily_spending_apply(NEW.transaction_date, NEW.store_id, NEW.transaction_category_id,
+                                     NEW.currency, 1, NEW.total);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_daily_spending
+    AFTER INSERT OR DELETE OR UPDATE OF transaction_date, store_id, transaction_category_id, currency, total
+    ON transaction
+    FOR EACH ROW EXECUTE FUNCTION daily_spending_maintain();
+
+-- ============================================================================
+-- RECONSTRUCTION (reprise d'historique, correction manuelle)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION rebuild_daily_spending(p_from DATE DEFAULT NULL, p_to DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    -- Bloque les triggers concurrents jusqu'au COMMIT : aucun delta perdu
+    LOCK TABLE daily_spending IN EXCLUSIVE MODE;
+
+    DELETE FROM daily_spending
+    WHERE (p_from IS NULL OR transaction_date >= p_from)
+      AND (p_to IS NULL OR transaction_date <= p_to);
+
+    INSERT INTO daily_spending
+        (transaction_date, store_id, transaction_category_id, currency, transaction_count, total_amount)
+    SELECT transaction_date, store_id, transaction_category_id, currency, COUNT(*), SUM(total)
+    FROM transaction
+    WHERE (p_from IS NULL OR transaction_date >= p_from)
+      AND (p_to IS NULL OR transaction_date <= p_to)
+    GROUP BY transaction_date, store_id, transaction_category_id, currency;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_daily_spending();
+
+-- ============================================================================
+-- VUE LUE PAR LE DASHBOARD (mêmes colonnes qu'avant)
+-- ============================================================================
+
+DROP VIEW IF EXISTS daily_spending_summary;
+
+CREATE VIEW daily_spending_summary AS
+SELECT
+    ds.transaction_date,
+    s.store_name,
+    tc.name as group,
+    ds.currency,
+    SUM(ds.transaction_count) as count,
+    SUM(ds.total_amount) as amout
+FROM daily_spending ds
+JOIN store s ON ds.store_id = s.store_id
+LEFT JOIN transaction_category tc ON ds.transaction_category_id = tc.category_id
+GROUP BY s.store_name, tc.name, ds.transaction_date, ds.currency
+ORDER BY ds.transaction_date DESC, s.store_name, tc.name;
+
+COMMIT;
+
+SELECT 'Agrégats quotidiens créés avec succès!' as status;
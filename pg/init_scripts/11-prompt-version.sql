@@ -0,0 +1,59 @@
+-- ============================================================================
+-- VERSION DU PROMPT D'EXTRACTION
+-- ============================================================================
+-- Le prompt d'extraction embarque les listes item_category et
+-- transaction_category. PromptClient le garde en cache tant que :
+--   - le compteur catalog_version('categories') n'a pas changé (incrémenté
+--     par trigger à chaque modification d'une des deux tables)
+--   - le template (prompts/tickets.txt) n'a pas été modifié
+--
+-- Chaque transaction enregistre la version (hash) du prompt qui l'a extraite.
+--
+-- À exécuter une seule fois, après 10-daily-spending.sql.
+
+BEGIN;
+
+CREATE TABLE catalog_version (
+    catalog VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO catalog_version (catalog) VALUES ('categories');
+
+-- Trigger par ligne : un INSERT ... ON CONFLICT DO NOTHING sans nouvelle
+-- catégorie (cas de presque tous les tickets) n'invalide pas le cache
+CREATE OR REPLACE FUNCTION bump_categories_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE catalog_version
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE catalog = 'categories';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER item_category_version
+    AFTER INSERT OR DELETE OR UPDATE OF category_main, category_sub, active ON item_category
+    FOR EACH ROW EXECUTE FUNCTION bump_categories_version();
+
+CREATE TRIGGER item_category_version_truncate
+    AFTER TRUNCATE ON item_category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_categories_version();
+
+CREATE TRIGGER transaction_category_version
+    AFTER INSERT OR DELETE OR UPDATE OF name ON transaction_category
+    FOR EACH ROW EXECUTE FUNCTION bump_categories_version();
+
+CREATE TRIGGER transaction_category_version_truncate
+    AFTER TRUNCATE ON transaction_category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_categories_version();
+
+-- Hash court du prompt (PromptClient.PROMPT_VERSION_LENGTH caractères)
+ALTER TABLE transaction ADD COLUMN prompt_version VARCHAR(16);
+
+COMMENT ON COLUMN transaction.prompt_version IS 'Version (hash) du prompt ayant produit l''extraction';
+
+COMMIT;
+
+SELECT 'Version du prompt créée avec succès!' as status;
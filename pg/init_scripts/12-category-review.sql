@@ -0,0 +1,42 @@
+-- ============================================================================
+-- CATÉGORIES D'ARTICLES À REVOIR
+-- ============================================================================
+-- Avant insertion, chaque article est rapproché d'une catégorie active
+-- existante (DataValidator.validate_categories). Quand aucune ne convient,
+-- l'article est rangé dans la catégorie de repli ('Divers', 'Divers') et la
+-- catégorie proposée par l'extraction est conservée sur l'article pour revue,
+-- au lieu de créer une nouvelle ligne item_category à chaque variante.
+--
+-- À exécuter une seule fois, après 11-prompt-version.sql.
+
+BEGIN;
+
+ALTER TABLE item ADD COLUMN proposed_category_main VARCHAR(100);
+ALTER TABLE item ADD COLUMN proposed_category_sub VARCHAR(100);
+
+COMMENT ON COLUMN item.proposed_category_main IS 'Catégorie proposée par l''extraction, inconnue du référentiel (à revoir)';
+COMMENT ON COLUMN item.proposed_category_sub IS 'Sous-catégorie proposée par l''extraction, inconnue du référentiel (à revoir)';
+
+-- File de revue : seulement les articles signalés
+CREATE INDEX idx_item_category_review ON item(proposed_category_main, proposed_category_sub)
+    WHERE proposed_category_main IS NOT NULL;
+
+-- Une ligne par catégorie proposée, les plus fréquentes d'abord
+CREATE VIEW v_category_review AS
+SELECT
+    i.proposed_category_main,
+    i.proposed_category_sub,
+    COUNT(*) as item_count,
+    COUNT(DISTINCT i.transaction_id) as transaction_count,
+    (ARRAY_AGG(i.product_name ORDER BY i.item_id DESC))[1:5] as sample_products,
+    c.category_main as assigned_category_main,
+    c.category_sub as assigned_category_sub
+FROM item i
+JOIN item_category c ON i.category_id = c.category_id
+WHERE i.proposed_category_main IS NOT NULL
+GROUP BY i.proposed_category_main, i.proposed_category_sub, c.category_main, c.category_sub
+ORDER BY item_count DESC;
+
+COMMIT;
+
+SELECT 'Revue des catégories créée avec succès!' as status;
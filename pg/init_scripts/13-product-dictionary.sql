@@ -0,0 +1,58 @@
+-- ============================================================================
+-- DICTIONNAIRE DE PRODUITS
+-- ============================================================================
+-- Un même article ("M-Budget Milch 1L") revient sur des dizaines de tickets
+-- et était recatégorisé par Claude à chaque fois. product_dictionary associe
+-- un nom normalisé (+ magasin) à un produit canonique, sa marque et sa
+-- catégorie. Elle est apprise des extractions passées
+-- (DatabaseClient.learn_product_dictionary) et chargée en mémoire par
+-- PromptClient.get_product_dictionary pour ReceiptTransformer.
+--
+-- Les clés normalisées sont calculées côté Python
+-- (tickapp.transformers.category_matcher.normalize_key) :
+--   - normalized_name : nom d'article normalisé
+--   - store_key : nom de magasin normalisé, '' = tous magasins
+--
+-- À exécuter une seule fois, après 12-category-review.sql.
+
+BEGIN;
+
+CREATE TABLE product_dictionary (
+    product_id SERIAL PRIMARY KEY,
+    normalized_name VARCHAR(500) NOT NULL,
+    store_key VARCHAR(255) NOT NULL DEFAULT '',
+    canonical_name VARCHAR(500) NOT NULL,
+    brand VARCHAR(100),
+    category_id INTEGER NOT NULL REFERENCES item_category(category_id) ON DELETE CASCADE,
+    occurrences INTEGER NOT NULL DEFAULT 0,
+    -- 'learned' : recalculée par l'apprentissage ; 'manual' : jamais écrasée
+    source VARCHAR(20) NOT NULL DEFAULT 'learned' CHECK (source IN ('learned', 'manual')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (normalized_name, store_key)
+);
+
+CREATE TRIGGER update_product_dictionary_updated_at BEFORE UPDATE ON product_dictionary
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Le dictionnaire en mémoire est rechargé quand ce compteur change
+INSERT INTO catalog_version (catalog) VALUES ('products');
+
+CREATE OR REPLACE FUNCTION bump_products_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE catalog_version
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE catalog = 'products';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Par instruction : un apprentissage complet ne compte que pour une version
+CREATE TRIGGER product_dictionary_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON product_dictionary
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_products_version();
+
+COMMIT;
+
+SELECT 'Dictionnaire de produits créé avec succès!' as status;
@@ -0,0 +1,52 @@
+-- ============================================================================
+-- SORTIES DES ASSETS DAGSTER
+-- ============================================================================
+-- Les sorties des assets du pipeline par message étaient picklées (objets
+-- Message complets, extractions, ReceiptData) dans le storage Dagster à
+-- chaque run. MessageIOManager (tickapp/io_managers.py) les écrit ici, une
+-- ligne par (message, asset), en msgpack compact (tickapp.serialization),
+-- et les relit seulement quand un asset aval en a besoin.
+--
+-- payload NULL : la sortie est déjà en base (le message Signal lui-même),
+-- seule la référence et son hash sont gardés.
+--
+-- À exécuter une seule fois, après 13-product-dictionary.sql.
+
+BEGIN;
+
+CREATE TABLE asset_output (
+    message_id INTEGER NOT NULL,
+    asset_key VARCHAR(255) NOT NULL,
+    schema_version SMALLINT NOT NULL,
+    content_hash CHAR(64) NOT NULL,  -- SHA-256 du payload (ou de la référence)
+    payload BYTEA,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    run_id VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (message_id, asset_key)
+);
+
+CREATE TRIGGER update_asset_output_updated_at BEFORE UPDATE ON asset_output
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- signal_message est partitionnée : pas de clé étrangère sur message_id seul,
+-- la suppression en cascade passe par le trigger de 08-partitioning.sql
+CREATE OR REPLACE FUNCTION cascade_signal_message_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM signal_message WHERE message_id = OLD.message_id) THEN
+        RETURN OLD;
+    END IF;
+    DELETE FROM message_attachment_mapping WHERE message_id = OLD.message_id;
+    UPDATE transaction SET message_id = NULL WHERE message_id = OLD.message_id;
+    DELETE FROM receipt_job WHERE message_id = OLD.message_id;
+    DELETE FROM asset_output WHERE message_id = OLD.message_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+SELECT 'Table asset_output créée avec succès!' as status;
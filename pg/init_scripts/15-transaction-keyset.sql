@@ -0,0 +1,42 @@
+-- ============================================================================
+-- INDEX DE PAGINATION PAR CLÉ (pages Transactions et History)
+-- ============================================================================
+-- Les pages du dashboard lisent les transactions page par page, triées par
+-- date ou par montant, en reprenant après la dernière ligne affichée
+-- (keyset : (clé de tri, transaction_id) < dernière ligne) au lieu d'un
+-- OFFSET. Chaque tri / filtre a un index dont l'ordre est celui de la page :
+-- une page coûte page_size lignes lues quelle que soit la taille de
+-- l'historique.
+--
+--   - (transaction_date, transaction_id) : tri par date, filtre de dates
+--   - (store_id, transaction_date, transaction_id) : filtre magasin
+--   - (transaction_category_id, transaction_date, transaction_id) : filtre groupe
+--   - (total, transaction_id) : tri par montant, filtre de montant
+--
+-- Les index composites par magasin et par groupe remplacent les index simples
+-- idx_transaction_store et idx_transaction_category (même préfixe).
+--
+-- À exécuter une seule fois, après 14-asset-output.sql.
+
+BEGIN;
+
+CREATE INDEX idx_transaction_keyset_date
+    ON transaction(transaction_date DESC, transaction_id DESC);
+
+CREATE INDEX idx_transaction_keyset_store
+    ON transaction(store_id, transaction_date DESC, transaction_id DESC);
+DROP INDEX IF EXISTS idx_transaction_store;
+
+CREATE INDEX idx_transaction_keyset_category
+    ON transaction(transaction_category_id, transaction_date DESC, transaction_id DESC);
+DROP INDEX IF EXISTS idx_transaction_category;
+
+CREATE INDEX idx_transaction_keyset_total
+    ON transaction(total DESC, transaction_id DESC);
+
+-- Articles d'une transaction dans l'ordre du ticket (dépliage d'une ligne)
+CREATE INDEX idx_item_transaction_line ON item(transaction_id, line_number);
+
+COMMIT;
+
+SELECT 'Index de pagination des transactions créés avec succès!' as status;
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- RECHERCHE DE PRODUITS (plein texte + trigrammes)
+-- ============================================================================
+-- Les achats n'étaient pas cherchables par produit ou marque :
+-- idx_item_product_name (B-tree) ne sert pas un ILIKE '%lait%'.
+--
+--   - item.search_vector : tsvector généré (nom en français et en allemand,
+--     les tickets suisses mélangent les deux, marque sans racinisation),
+--     index GIN : recherche par mots ("lait entier", "Vollmilch")
+--   - index GIN pg_trgm sur product_name et brand : sous-chaînes (ILIKE) et
+--     fautes de frappe / abréviations des tickets (word_similarity, <%)
+--
+-- Les requêtes sont dans dashboard/data.py (search_products,
+-- get_product_price_history).
+--
+-- À exécuter une seule fois, après 15-transaction-keyset.sql.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Colonne générée : tenue à jour par Postgres à chaque INSERT / UPDATE
+ALTER TABLE item ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('french', coalesce(product_name, '')), 'A') ||
+    setweight(to_tsvector('german', coalesce(product_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(brand, '')), 'B')
+) STORED;
+
+CREATE INDEX idx_item_search ON item USING GIN (search_vector);
+
+CREATE INDEX idx_item_product_name_trgm ON item USING GIN (product_name gin_trgm_ops);
+CREATE INDEX idx_item_brand_trgm ON item USING GIN (brand gin_trgm_ops);
+
+COMMIT;
+
+SELECT 'Recherche de produits créée avec succès!' as status;
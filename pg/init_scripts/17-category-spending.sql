@@ -0,0 +1,279 @@
+-- ============================================================================
+-- CUBE DES DÉPENSES PAR CATÉGORIE : category_spending
+-- ============================================================================
+-- v_spending_by_category refaisait une jointure à quatre tables et un
+-- GROUP BY sur tous les articles à chaque lecture. Les dépenses par catégorie
+-- d'article sont désormais stockées dans category_spending, par jour, mois et
+-- année (grain, period = premier jour de la période) et par devise, avec les
+-- totaux de la hiérarchie :
+--
+--   - category_main + category_sub : sous-catégorie
+--   - category_main, category_sub NULL : total de la catégorie principale
+--   - category_main NULL, category_sub NULL : total toutes catégories
+--
+-- La table est tenue à jour par trigger dans la même transaction que
+-- l'écriture du ticket ; rebuild_category_spending(from, to) recalcule une
+-- plage (mois et années touchés recalculés en entier).
+--
+-- v_spending_by_category garde son nom et ses colonnes et lit cette table.
+--
+-- À exécuter une seule fois, après 16-product-search.sql.
+
+BEGIN;
+
+-- ============================================================================
+-- TABLE
+-- ============================================================================
+
+CREATE TABLE category_spending (
+    grain VARCHAR(5) NOT NULL CHECK (grain IN ('day', 'month', 'year')),
+    period DATE NOT NULL,
+    currency CHAR(3) NOT NULL,
+    category_main VARCHAR(100),
+    category_sub VARCHAR(100),
+    item_count INTEGER NOT NULL,
+    total_spent DECIMAL(14, 2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Totaux de la hiérarchie : une seule ligne NULL par niveau
+    CONSTRAINT uq_category_spending UNIQUE NULLS NOT DISTINCT
+        (grain, period, currency, category_main, category_sub)
+);
+
+-- Détail d'une période : (grain, period) est le préfixe de uq_category_spending
+-- Historique d'une catégorie :
+CREATE INDEX idx_category_spending_category
+    ON category_spending(grain, category_main, category_sub, period);
+
+-- ============================================================================
+-- MISE À JOUR INCRÉMENTALE
+-- ============================================================================
+
+-- Applique un delta aux 9 lignes concernées (3 grains x 3 niveaux)
+CREATE OR REPLACE FUNCTION category_spending_apply(
+    p_date DATE, p_currency CHAR(3), p_category_main VARCHAR, p_category_sub VARCHAR,
+    p_count INTEGER, p_amount DECIMAL
+)
+RETURNS VOID AS $$
+BEGIN
+    -- Les totaux sont partagés par tous les tickets de la période : les
+    -- écritures concurrentes sont sérialisées jusqu'au COMMIT plutôt que de
+    -- verrouiller les mêmes lignes dans des ordres différents (interblocage)
+    PERFORM pg_advisory_xact_lock(hashtext('category_spending'));
+
+    INSERT INTO category_spending AS cs
+        (grain, period, currency, category_main, category_sub, item_count, total_spent)
+    SELECT g.grain, date_trunc(g.grain, p_date::timestamp)::date, p_currency, l.category_main, l.category_sub,
+           p_count, p_amount
+    FROM (VALUES ('day'), ('month'), ('year')) AS g(grain)
+    CROSS JOIN (VALUES
+        (p_category_main::VARCHAR, p_category_sub::VARCHAR),
+        (p_category_main::VARCHAR, NULL::VARCHAR),
+        (NULL::VARCHAR, NULL::VARCHAR)
+    ) AS l(category_main, category_sub)
+    ON CONFLICT ON CONSTRAINT uq_category_spending DO UPDATE
+    SET item_count = cs.item_count + EXCLUDED.item_count,
+        total_spent = cs.total_spent + EXCLUDED.total_spent,
+        updated_at = CURRENT_TIMESTAMP;
+
+    -- Plus aucun article pour ces lignes
+    IF p_count < 0 THEN
+        DELETE FROM category_spending
+        WHERE grain IN ('day', 'month', 'year')
+          AND period = date_trunc(grain, p_date::timestamp)::date
+          AND currency = p_currency
+          AND (category_main IS NULL OR category_main = p_category_main)
+          AND (category_sub IS NULL OR category_sub = p_category_sub)
+          AND item_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Applique (p_sign = 1) ou retire (p_sign = -1) tous les articles d'une transaction
+CREATE OR REPLACE FUNCTION category_spending_apply_transaction(
+    p_transaction_id INTEGER, p_date DATE, p_currency CHAR(3), p_sign INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.category_main, c.category_sub, COUNT(*)::int AS item_count, SUM(i.total_price) AS total_spent
+        FROM item i
+        JOIN item_category c ON i.category_id = c.category_id
+        WHERE i.transaction_id = p_transaction_id
+        GROUP BY c.category_main, c.category_sub
+        ORDER BY c.category_main, c.category_sub
+    LOOP
+        PERFORM category_spending_apply(p_date, p_currency, r.category_main, r.category_sub,
+                                        p_sign * r.item_count, p_sign * r.total_spent);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Articles : un article d'une transaction supprimée a déjà été retiré par
+-- cascade_transaction_delete (la transaction n'est plus lisible ici)
+CREATE OR REPLACE FUNCTION category_spending_item_maintain()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_date DATE;
+    v_currency CHAR(3);
+    v_main VARCHAR;
+    v_sub VARCHAR;
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT t.transaction_date, t.currency INTO v_date, v_currency
+        FROM transaction t WHERE t.transaction_id = OLD.transaction_id;
+        IF FOUND THEN
+            SELECT category_main, category_sub INTO v_main, v_sub
+            FROM item_category WHERE category_id = OLD.category_id;
+            PERFORM category_spending_apply(v_date, v_currency, v_main, v_sub, -1, -OLD.total_price);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT t.transaction_date, t.currency INTO v_date, v_currency
+        FROM transaction t WHERE t.transaction_id = NEW.transaction_id;
+        IF FOUND THEN
+            SELECT category_main, category_sub INTO v_main, v_sub
+            FROM item_category WHERE category_id = NEW.category_id;
+            PERFORM category_spending_apply(v_date, v_currency, v_main, v_sub, 1, NEW.total_price);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER item_category_spending
+    AFTER INSERT OR DELETE OR UPDATE OF transaction_id, category_id, total_price
+    ON item
+    FOR EACH ROW EXECUTE FUNCTION category_spending_item_maintain();
+
+-- Transactions : changement de date ou de devise. Un UPDATE qui change de
+-- partition arrive en DELETE (la ligne existe encore, à sa nouvelle date)
+-- + INSERT : la branche DELETE retire les articles de l'ancienne date et
+-- les ajoute à la nouvelle. Rien à l'INSERT : les articles d'un nouveau
+-- ticket sont comptés par item_category_spending, qu'ils soient insérés
+-- après lui ou dans la même requête (CTE de
+-- AsyncDatabaseClient.insert_receipt).
+CREATE OR REPLACE FUNCTION category_spending_transaction_maintain()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_date DATE;
+    v_currency CHAR(3);
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        -- Vraie suppression : traitée par cascade_transaction_delete
+        SELECT t.transaction_date, t.currency INTO v_date, v_currency
+        FROM transaction t WHERE t.transaction_id = OLD.transaction_id;
+        IF FOUND THEN
+            PERFORM category_spending_apply_transaction(OLD.transaction_id, OLD.transaction_date, OLD.currency, -1);
+            PERFORM category_spending_apply_transaction(OLD.transaction_id, v_date, v_currency, 1);
+        END IF;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM category_spending_apply_transaction(OLD.transaction_id, OLD.transaction_date, OLD.currency, -1);
+        PERFORM category_spending_apply_transaction(NEW.transaction_id, NEW.transaction_date, NEW.currency, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_category_spending
+    AFTER DELETE OR UPDATE OF transaction_date, currency
+    ON transaction
+    FOR EACH ROW EXECUTE FUNCTION category_spending_transaction_maintain();
+
+-- Remplace la version de 09-flatten-mappings.sql : les articles sont retirés
+-- du cube avant leur suppression, tant que leur catégorie est lisible
+CREATE OR REPLACE FUNCTION cascade_transaction_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM transaction WHERE transaction_id = OLD.transaction_id) THEN
+        RETURN OLD;
+    END IF;
+    PERFORM category_spending_apply_transaction(OLD.transaction_id, OLD.transaction_date, OLD.currency, -1);
+    DELETE FROM item WHERE transaction_id = OLD.transaction_id;
+    DELETE FROM transaction_attachment_mapping WHERE transaction_id = OLD.transaction_id;
+    UPDATE receipt_job SET transaction_id = NULL WHERE transaction_id = OLD.transaction_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- RECONSTRUCTION (reprise d'historique, correction manuelle)
+-- ============================================================================
+
+-- Recalcule un grain sur les périodes qui touchent [p_from, p_to]
+CREATE OR REPLACE FUNCTION category_spending_refresh(p_grain VARCHAR, p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    v_from DATE := date_trunc(p_grain, p_from::timestamp)::date;
+    v_to DATE := date_trunc(p_grain, p_to::timestamp)::date;
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM category_spending
+    WHERE grain = p_grain
+      AND (v_from IS NULL OR period >= v_from)
+      AND (v_to IS NULL OR period <= v_to);
+
+    INSERT INTO category_spending
+        (grain, period, currency, category_main, category_sub, item_count, total_spent)
+    SELECT p_grain, period, currency, category_main, category_sub, COUNT(*), SUM(total_price)
+    FROM (
+        SELECT date_trunc(p_grain, t.transaction_date::timestamp)::date AS period, t.currency,
+               c.category_main, c.category_sub, i.total_price
+        FROM item i
+        JOIN transaction t ON i.transaction_id = t.transaction_id
+        JOIN item_category c ON i.category_id = c.category_id
+        WHERE (v_from IS NULL OR t.transaction_date >= v_from)
+          AND (v_to IS NULL OR t.transaction_date < v_to + ('1 ' || p_grain)::interval)
+    ) items
+    GROUP BY GROUPING SETS (
+        (period, currency, category_main, category_sub),
+        (period, currency, category_main),
+        (period, currency)
+    );
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_category_spending(p_from DATE DEFAULT NULL, p_to DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+BEGIN
+    -- Bloque les triggers concurrents jusqu'au COMMIT : aucun delta perdu
+    LOCK TABLE category_spending IN EXCLUSIVE MODE;
+
+    RETURN category_spending_refresh('day', p_from, p_to)
+         + category_spending_refresh('month', p_from, p_to)
+         + category_spending_refresh('year', p_from, p_to);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_category_spending();
+
+-- ============================================================================
+-- VUE (mêmes colonnes qu'avant)
+-- ============================================================================
+
+DROP VIEW IF EXISTS v_spending_by_category;
+
+CREATE VIEW v_spending_by_category AS
+SELECT
+    currency,
+    category_main,
+    category_sub,
+    period::timestamp as month,
+    item_count::bigint as item_count,
+    total_spent
+FROM category_spending
+WHERE grain = 'month'
+  AND category_sub IS NOT NULL;
+
+COMMIT;
+
+SELECT 'Cube des dépenses par catégorie créé avec succès!' as status;
@@ -0,0 +1,83 @@
+-- ============================================================================
+-- SUIVI DES PRIX : product_price_observation
+-- ============================================================================
+-- "Comment a évolué le prix du lait chez Migros ?" demandait un parcours de
+-- item par libellé exact (ou ILIKE), joint à transaction et store.
+-- product_price_observation garde une ligne par article acheté :
+--
+--   - product_key : nom normalisé du produit canonique (dictionnaire de
+--     produits, sinon libellé du ticket ; normalize_key côté Python)
+--   - store_id, observed_on, currency : magasin, date et devise du ticket
+--   - unit_price : prix unitaire du ticket
+--   - package_size, quantity_unit, price_per_unit : contenance lue dans le
+--     libellé et prix au kg / au litre / à la pièce, comparable entre
+--     conditionnements
+--
+-- Les lignes sont écrites après receipt_in_db (asset price_observations,
+-- DatabaseClient.record_price_observations) et supprimées avec leur article.
+-- La normalisation étant faite en Python, l'historique est rempli par le job
+-- Dagster rebuild_price_observations.
+--
+-- À exécuter une seule fois, après 17-category-spending.sql.
+
+BEGIN;
+
+CREATE TABLE product_price_observation (
+    item_id INTEGER PRIMARY KEY REFERENCES item(item_id) ON DELETE CASCADE,
+    transaction_id INTEGER NOT NULL,
+    product_key VARCHAR(500) NOT NULL,
+    product_name VARCHAR(500) NOT NULL,
+    brand VARCHAR(100),
+    store_id INTEGER NOT NULL REFERENCES store(store_id),
+    observed_on DATE NOT NULL,
+    currency CHAR(3) NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    quantity DECIMAL(10, 3) NOT NULL,
+    package_size DECIMAL(10, 3) NOT NULL CHECK (package_size > 0),
+    quantity_unit VARCHAR(3) NOT NULL CHECK (quantity_unit IN ('kg', 'l', 'pce')),
+    price_per_unit DECIMAL(12, 4) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Historique complet d'un produit (tous magasins) en un seul parcours
+-- d'index, sans lecture de la table
+CREATE INDEX idx_price_observation_product
+    ON product_price_observation(product_key, observed_on)
+    INCLUDE (store_id, currency, unit_price, package_size, quantity_unit, price_per_unit);
+
+-- Série d'un produit dans un magasin
+CREATE INDEX idx_price_observation_product_store
+    ON product_price_observation(product_key, store_id, observed_on);
+
+-- Réécriture des observations d'une transaction
+CREATE INDEX idx_price_observation_transaction
+    ON product_price_observation(transaction_id);
+
+-- Correction du magasin, de la date ou de la devise d'un ticket. Un UPDATE
+-- qui change de partition arrive en DELETE + INSERT : l'INSERT suffit (un
+-- nouveau ticket n'a pas encore d'observations)
+CREATE OR REPLACE FUNCTION price_observation_transaction_maintain()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE product_price_observation
+    SET store_id = NEW.store_id,
+        observed_on = NEW.transaction_date,
+        currency = NEW.currency
+    WHERE transaction_id = NEW.transaction_id
+      AND (store_id, observed_on, currency) IS DISTINCT FROM (NEW.store_id, NEW.transaction_date, NEW.currency);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transaction_price_observation
+    AFTER INSERT OR UPDATE OF store_id, transaction_date, currency
+    ON transaction
+    FOR EACH ROW EXECUTE FUNCTION price_observation_transaction_maintain();
+
+COMMIT;
+
+SELECT 'Suivi des prix créé avec succès!' as status;
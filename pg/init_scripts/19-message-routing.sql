@@ -0,0 +1,51 @@
+-- ============================================================================
+-- UN SEUL CHEMIN DE TRAITEMENT PAR MESSAGE : message_partition
+-- ============================================================================
+-- Un message non traité peut être pris par deux chemins :
+--
+--   - le pipeline Dagster par message (sensor, partitions signal_message)
+--   - la file receipt_job (tickapp/workers, micro-lots receipt_batch)
+--
+-- Les messages confiés au pipeline par message sont enregistrés dans
+-- message_partition : la file ne leur crée pas de job, et le pipeline ne
+-- prend pas un message qui a déjà un job. Les deux affectations prennent le
+-- même verrou consultatif (hashtext('message_routing')) : un message ne peut
+-- pas être affecté aux deux en même temps.
+--
+-- À exécuter une seule fois, après 18-price-observations.sql.
+
+BEGIN;
+
+CREATE TABLE message_partition (
+    message_id INTEGER PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Messages déjà passés par le pipeline par message (sorties d'assets)
+INSERT INTO message_partition (message_id)
+SELECT DISTINCT o.message_id
+FROM asset_output o
+WHERE NOT EXISTS (SELECT 1 FROM receipt_job j WHERE j.message_id = o.message_id)
+ON CONFLICT (message_id) DO NOTHING;
+
+-- signal_message est partitionnée : pas de clé étrangère sur message_id seul,
+-- la suppression en cascade passe par le trigger de 08-partitioning.sql
+CREATE OR REPLACE FUNCTION cascade_signal_message_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('tickapp.partition_maintenance', true) = 'on'
+       OR EXISTS (SELECT 1 FROM signal_message WHERE message_id = OLD.message_id) THEN
+        RETURN OLD;
+    END IF;
+    DELETE FROM message_attachment_mapping WHERE message_id = OLD.message_id;
+    UPDATE transaction SET message_id = NULL WHERE message_id = OLD.message_id;
+    DELETE FROM receipt_job WHERE message_id = OLD.message_id;
+    DELETE FROM asset_output WHERE message_id = OLD.message_id;
+    DELETE FROM message_partition WHERE message_id = OLD.message_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+SELECT 'Table message_partition créée avec succès!' as status;
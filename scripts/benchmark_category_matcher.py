@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark : CategoryMatcher (index de trigrammes) vs ancien scan difflib
+de PromptClient.find_closest_category
+
+Les catégories sont lues dans pg/init_scripts/02-post-creation.sql (pas
+besoin de base). Les requêtes sont des variantes bruitées de ces catégories
+(casse, accents, fautes de frappe, mots tronqués) et quelques libellés
+inconnus, comme celles que renvoie Claude.
+
+Usage:
+    python scripts/benchmark_category_matcher.py --lookups 100000
+    python scripts/benchmark_category_matcher.py --lookups 100000 --legacy-lookups 2000
+"""
+import argparse
+import difflib
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tickapp.transformers.category_matcher import CategoryMatcher
+
+
+CATEGORIES_SQL = Path(__file__).parent.parent / "pg" / "init_scripts" / "02-post-creation.sql"
+
+
+def load_categories():
+    """Couples (category_main, category_sub) du référentiel initial"""
+    sql = CATEGORIES_SQL.read_text(encoding="utf-8")
+    return re.findall(r"\('([^']*)',\s*'([^']*)',\s*'[^']*'\)", sql)
+
+
+def legacy_find_closest_category(categories, category_name, subcategory_name=None):
+    """Algorithme de find_closest_category avant CategoryMatcher (hors accès base)"""
+    category_name_lower = category_name.lower().strip()
+    subcategory_name_lower = subcategory_name.lower().strip() if subcategory_name else None
+
+    for main, sub in categories:
+        if main.lower() == category_name_lower:
+            if subcategory_name_lower and sub.lower() == subcategory_name_lower:
+                return (main, sub)
+            elif not subcategory_name_lower:
+                return (main, sub)
+
+    best_match = None
+    best_score = 0.0
+    for main, sub in categories:
+        main_score = difflib.SequenceMatcher(None, category_name_lower, main.lower()).ratio()
+        if subcategory_name_lower:
+            sub_score = difflib.SequenceMatcher(None, subcategory_name_lower, sub.lower()).ratio()
+            total_score = (main_score * 0.6) + (sub_score * 0.4)
+        else:
+            total_score = main_score
+        if total_score > best_score:
+            best_score = total_score
+            best_match = (main, sub)
+
+    if best_score > 0.5:
+        return best_match
+    return None
+
+
+def add_noise(text, rng):
+    """Variante d'un libellé : casse, accents, faute de frappe ou mot tronqué"""
+    variant = rng.choice(["exact", "case", "accents", "typo", "truncate"])
+    if variant == "case":
+        return text.upper() if rng.random() < 0.5 else text.lower()
+    if variant == "accents":
+        return text.translate(str.maketrans("éèêàâçôûœ", "eeeaacouo"))
+    if variant == "typo" and len(text) > 3:
+        pos = rng.randrange(len(text))
+        return text[:pos] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[pos + 1:]
+    if variant == "truncate":
+        words = text.split()
+        return " ".join(words[:max(1, len(words) - 1)])
+    return text
+
+
+def make_queries(categories, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            queries.append((f"Inconnu {rng.randrange(1000)}", f"Divers {rng.randrange(1000)}"))
+            continue
+        main, sub = rng.choice(categories)
+        queries.append((add_noise(main, rng), add_noise(sub, rng)))
+    return queries
+
+
+def timed(label, func, lookups):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    per_lookup = f"  {elapsed / lookups * 1e6:9.1f} µs/lookup" if lookups else ""
+    print(f"   {label:<32} {elapsed:9.3f} s{per_lookup}")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CategoryMatcher vs difflib")
+    parser.add_argument("--lookups", type=int, default=100_000, help="Nombre de requêtes")
+    parser.add_argument("--legacy-lookups", type=int, default=None,
+                        help="Requêtes pour difflib (défaut: --lookups ; extrapolé sinon)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    categories = load_categories()
+    queries = make_queries(categories, args.lookups, args.seed)
+    legacy_lookups = min(args.legacy_lookups or args.lookups, args.lookups)
+    print(f"📂 {len(categories)} catégories, {args.lookups:,} requêtes "
+          f"({len(set(queries)):,} distinctes)")
+
+    print("⏱️  Temps")
+    matcher, _ = timed("CategoryMatcher (construction)", lambda: CategoryMatcher(categories), None)
+    _, matcher_time = timed("CategoryMatcher.match", lambda: [matcher.match(*q) for q in queries], args.lookups)
+    many, many_time = timed("CategoryMatcher.match_many", lambda: matcher.match_many(queries), args.lookups)
+    legacy, legacy_time = timed(
+        f"difflib ({legacy_lookups:,} requêtes)",
+        lambda: [legacy_find_closest_category(categories, *q) for q in queries[:legacy_lookups]],
+        legacy_lookups
+    )
+
+    legacy_total = legacy_time / legacy_lookups * args.lookups
+    if legacy_lookups < args.lookups:
+        print(f"   difflib extrapolé à {args.lookups:,} requêtes : {legacy_total:.1f} s")
+    print(f"🚀 Gain match : x{legacy_total / matcher_time:.0f}, match_many : x{legacy_total / many_time:.0f}")
+
+    agreement = sum(a == b for a, b in zip(many, legacy)) / legacy_lookups
+    print(f"🎯 Même résultat que difflib sur {agreement:.1%} des requêtes")
+    # Seuil : une requête acceptée par difflib doit l'être par le matcher, et inversement
+    threshold_mismatches = sum((a is None) != (b is None) for a, b in zip(many, legacy))
+    print(f"🚧 Acceptée par un seul des deux (seuil min_score={matcher.min_score}) : "
+          f"{threshold_mismatches} requête(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Export des transactions ou des articles en Parquet, CSV ou Arrow IPC
+
+Les lignes sont lues et écrites par lots (curseur côté serveur) : la mémoire
+ne dépend pas de la taille de l'export. Le watermark affiché en fin
+d'export se passe à --since pour l'export incrémental suivant.
+
+Usage:
+    python scripts/export_data.py transactions exports/transactions.parquet
+    python scripts/export_data.py items exports/items.csv --format csv --from 2025-01-01 --to 2025-03-31
+    python scripts/export_data.py items exports/items_lait.arrow --format arrow --category Alimentation --store Migros
+    python scripts/export_data.py transactions exports/new.parquet --since 1532
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tickapp.clients.database_client import DatabaseClient
+from tickapp.exports import EXPORT_FORMATS, ExportFilters, export_dataset
+from tickapp.snapshots import SNAPSHOT_SCHEMAS
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Export des transactions / articles")
+    parser.add_argument("dataset", choices=list(SNAPSHOT_SCHEMAS), help="Données à exporter")
+    parser.add_argument("output", type=Path, help="Fichier de destination")
+    parser.add_argument("--format", dest="export_format", choices=list(EXPORT_FORMATS),
+                        help="Format (déduit de l'extension du fichier par défaut)")
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, help="Première date incluse (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat, help="Dernière date incluse (YYYY-MM-DD)")
+    parser.add_argument("--store", action="append", default=[], help="Magasin (répétable)")
+    parser.add_argument("--group", action="append", default=[], help="Catégorie de transaction (répétable)")
+    parser.add_argument("--category", action="append", default=[], help="Catégorie principale d'article (répétable)")
+    parser.add_argument("--since", type=int, help="Watermark de l'export précédent (transaction_id)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Lignes par lot")
+    args = parser.parse_args()
+
+    export_format = args.export_format
+    if export_format is None:
+        export_format = next(
+            (name for name, suffix in EXPORT_FORMATS.items() if args.output.suffix == suffix), None
+        )
+        if export_format is None:
+            parser.error(f"Format non déduit de '{args.output.suffix}', préciser --format")
+
+    db_client = DatabaseClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+
+    start = time.perf_counter()
+    result = export_dataset(
+        db_client,
+        args.dataset,
+        args.output,
+        export_format=export_format,
+        filters=ExportFilters(
+            from_date=args.from_date,
+            to_date=args.to_date,
+            stores=args.store,
+            groups=args.group,
+            categories=args.category,
+            since_transaction_id=args.since,
+        ),
+        batch_size=args.batch_size,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ {result.rows} ligne(s) exportée(s) en {result.batches} lot(s) vers {result.path} ({elapsed:.1f} s)")
+    watermark = result.watermark if result.watermark is not None else args.since
+    if watermark is not None:
+        print(f"   Watermark : {watermark} (--since {watermark} pour l'export suivant)")
+
+
+if __name__ == "__main__":
+    main()
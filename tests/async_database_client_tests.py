@@ -0,0 +1,534 @@
+"""
+Tests de parité entre DatabaseClient (psycopg2) et AsyncDatabaseClient (psycopg3)
+
+Nécessitent un PostgreSQL local JETABLE : le schéma public est recréé
+dans la base désignée par TICKAPP_TEST_DB_NAME. Ignorés si elle n'est pas définie.
+
+Run avec:
+    TICKAPP_TEST_DB_NAME=receipt_test python -m pytest tests/async_database_client_tests.py -v
+"""
+
+import asyncio
+import os
+from datetime import datetime, date, time
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("psycopg")
+
+from tickapp.clients.database_client import DatabaseClient, LeaseLostError
+from tickapp.clients.async_database_client import AsyncDatabaseClient
+from tickapp.clients.signal_client import Message, Attachment, Contact, Group
+from tickapp.models import Store, Transaction, Item, ReceiptData
+
+
+TEST_DB_NAME = os.getenv("TICKAPP_TEST_DB_NAME")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DB_NAME,
+    reason="TICKAPP_TEST_DB_NAME non défini (base PostgreSQL de test jetable)"
+)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+@pytest.fixture
+def conn(db_params):
+    """Connexion psycopg2 pour relire les lignes insérées"""
+    connection = psycopg2.connect(**db_params)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def sync_client(db_params):
+    return DatabaseClient(**db_params)
+
+
+@pytest.fixture
+def async_client(db_params):
+    """Exécute une méthode d'AsyncDatabaseClient dans sa propre boucle asyncio"""
+    def run(method: str, *args, **kwargs):
+        async def _run():
+            async with AsyncDatabaseClient(**db_params) as client:
+                return await getattr(client, method)(*args, **kwargs)
+        return asyncio.run(_run())
+    return run
+
+
+def make_message(uuid_suffix: str) -> Message:
+    """Message de groupe avec deux images"""
+    return Message(
+        sender=Contact(
+            number="+41797654321",
+            name="Test User",
+            uuid=f"00000000-0000-0000-0000-{uuid_suffix:0>12}"
+        ),
+        timestamp=datetime(2025, 3, 14, 12, 30, 0),
+        text="Ticket Migros",
+        attachments=[
+            Attachment(id="att-1", content_type="image/jpeg", filename="ticket_1.jpg",
+                       size=12345, upload_timestamp_ms=1741955400000, path=Path("/tmp/ticket_1.jpg")),
+            Attachment(id="att-2", content_type="image/jpeg", filename="ticket_2.jpg",
+                       size=23456, upload_timestamp_ms=1741955400001, path=None),
+        ],
+        group=Group(id="group-abc", name="Tickets 🧾"),
+        is_group_message=True,
+        account="+41791234567"
+    )
+
+
+def make_receipt(category_sub: str = "Produits laitiers et œufs") -> ReceiptData:
+    """Ticket avec une catégorie existante et une catégorie nouvelle"""
+    return ReceiptData(
+        store=Store(store_name="Migros", address="Rue du Test 1", postal_code="1000",
+                    city="Lausanne", country_code="CH", phone=None),
+        transaction=Transaction(
+            store_id=0,
+            transaction_category_name="  Carmelo ",
+            receipt_number="R-42",
+            transaction_date=date(2025, 3, 14),
+            transaction_time=time(12, 29, 5),
+            currency="CHF",
+            total=Decimal("7.40"),
+            payment_method="carte",
+            prompt_version="0123456789abcdef"
+        ),
+        items=[
+            Item(transaction_id=0, product_name="M-Budget Milch 1L", quantity=Decimal("2"),
+                 unit_price=Decimal("1.20"), total_price=Decimal("2.40"), vat_rate="2.6%",
+                 category_main="Alimentation et supermarchés", category_sub=category_sub, line_number=1),
+            Item(transaction_id=0, product_name="Piles AA", brand="Varta", quantity=Decimal("1"),
+                 unit_price=Decimal("5.00"), total_price=Decimal("5.00"),
+                 category_main="Test parité", category_sub="Nouvelle catégorie", line_number=2,
+                 proposed_category_main="Électronique", proposed_category_sub="Piles"),
+        ]
+    )
+
+
+def snapshot_message(conn, message_id: int) -> dict:
+    """Contenu d'un message sans les IDs techniques"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT s.signal_uuid::text, s.phone_number, s.contact_name, g.signal_group_id, g.group_name,
+                   m.timestamp, m.text_content, m.is_group_message, m.signal_account
+            FROM signal_message m
+            LEFT JOIN signal_sender s ON m.sender_id = s.sender_id
+            LEFT JOIN signal_group g ON m.group_id = g.group_id
+            WHERE m.message_id = %s
+        """, (message_id,))
+        message = cursor.fetchone()
+        cursor.execute("""
+            SELECT a.signal_attachment_id, a.content_type, a.filename, a.file_size,
+                   a.upload_timestamp_ms, a.file_path
+            FROM attachment a
+            WHERE a.message_id = %s
+            ORDER BY a.attachment_id
+        """, (message_id,))
+        return {"message": message, "attachments": cursor.fetchall()}
+
+
+def snapshot_transaction(conn, transaction_id: int) -> dict:
+    """Contenu d'une transaction sans les IDs techniques"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT s.store_name, s.address, s.postal_code, s.city, s.country_code, tc.name,
+                   t.receipt_number, t.transaction_date, t.transaction_time, t.currency, t.total,
+                   t.payment_method, t.source, t.prompt_version, t.processed_at IS NOT NULL
+            FROM transaction t
+            JOIN store s ON t.store_id = s.store_id
+            LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+            WHERE t.transaction_id = %s
+        """, (transaction_id,))
+        transaction = cursor.fetchone()
+        cursor.execute("""
+            SELECT i.product_name, i.product_reference, i.brand, i.quantity, i.unit_price,
+                   i.total_price, i.vat_rate, c.category_main, c.category_sub, i.line_number,
+                   i.proposed_category_main, i.proposed_category_sub
+            FROM item i
+            JOIN item_category c ON i.category_id = c.category_id
+            WHERE i.transaction_id = %s
+            ORDER BY i.item_id
+        """, (transaction_id,))
+        items = cursor.fetchall()
+        cursor.execute("""
+            SELECT a.filename
+            FROM transaction_attachment_mapping tam
+            JOIN attachment a ON tam.attachment_id = a.attachment_id
+            WHERE tam.transaction_id = %s
+            ORDER BY a.filename
+        """, (transaction_id,))
+        return {"transaction": transaction, "items": items, "attachments": cursor.fetchall()}
+
+
+# =============================================================================
+# Tests de parité
+# =============================================================================
+
+def test_insert_signal_message_parity(conn, sync_client, async_client):
+    """Les deux clients écrivent le même message et les mêmes attachments"""
+    sync_id, sync_attachments = sync_client.insert_signal_message(make_message("1"))
+    async_id, async_attachments = async_client("insert_signal_message", make_message("1"))
+
+    assert async_id != sync_id
+    assert len(async_attachments) == len(sync_attachments) == 2
+    assert snapshot_message(conn, async_id) == snapshot_message(conn, sync_id)
+
+
+def test_insert_signal_message_without_sender_uuid(conn, sync_client, async_client):
+    """Sans UUID, aucun sender n'est créé"""
+    message = make_message("2")
+    message.sender.uuid = None
+    message.attachments = []
+    sync_id, _ = sync_client.insert_signal_message(message)
+    async_id, async_attachments = async_client("insert_signal_message", message)
+
+    assert async_attachments == []
+    assert snapshot_message(conn, async_id) == snapshot_message(conn, sync_id)
+
+
+def test_insert_receipt_parity(conn, sync_client, async_client):
+    """Même ticket (catégories existantes et nouvelles, attachments du message)"""
+    sync_message_id, _ = sync_client.insert_signal_message(make_message("3"))
+    async_message_id, _ = async_client("insert_signal_message", make_message("3"))
+
+    sync_tx = sync_client.insert_receipt(make_receipt(), message_id=sync_message_id)
+    async_tx = async_client("insert_receipt", make_receipt(), message_id=async_message_id)
+
+    sync_snapshot = snapshot_transaction(conn, sync_tx)
+    assert snapshot_transaction(conn, async_tx) == sync_snapshot
+    assert sync_snapshot["transaction"][5] == "carmelo"
+    assert [item[0] for item in sync_snapshot["items"]] == ["M-Budget Milch 1L", "Piles AA"]
+    assert len(sync_snapshot["attachments"]) == 2
+
+
+def test_insert_receipt_explicit_attachments(conn, sync_client, async_client):
+    """Les attachment_ids explicites priment sur ceux du message"""
+    message_id, attachment_ids = sync_client.insert_signal_message(make_message("4"))
+
+    sync_tx = sync_client.insert_receipt(make_receipt(), message_id=message_id,
+                                         attachment_ids=attachment_ids[:1])
+    async_tx = async_client("insert_receipt", make_receipt(), message_id=message_id,
+                            attachment_ids=attachment_ids[:1])
+
+    assert snapshot_transaction(conn, async_tx) == snapshot_transaction(conn, sync_tx)
+    assert snapshot_transaction(conn, async_tx)["attachments"] == [("ticket_1.jpg",)]
+
+
+def test_insert_receipt_rolls_back_on_error(conn, async_client):
+    """Une erreur (catégorie NULL) n'écrit rien"""
+    receipt = make_receipt(category_sub=None)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM transaction")
+        before = cursor.fetchone()[0]
+
+    with pytest.raises(Exception):
+        async_client("insert_receipt", receipt)
+
+    conn.rollback()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM transaction")
+        assert cursor.fetchone()[0] == before
+
+
+def test_prepared_statement_reuse(conn, db_params):
+    """Plusieurs tickets sur la même connexion réutilisent la requête préparée"""
+    async def _run():
+        async with AsyncDatabaseClient(**db_params) as client:
+            return [await client.insert_receipt(make_receipt()) for _ in range(3)]
+
+    transaction_ids = asyncio.run(_run())
+    assert len(set(transaction_ids)) == 3
+    snapshots = [snapshot_transaction(conn, tx) for tx in transaction_ids]
+    assert snapshots[0] == snapshots[1] == snapshots[2]
+
+
+def test_daily_spending_matches_transactions(conn, sync_client, async_client):
+    """Les agrégats tenus par trigger égalent un recalcul complet, même après suppression"""
+    sync_client.insert_receipt(make_receipt())
+    transaction_id = async_client("insert_receipt", make_receipt())
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM transaction WHERE transaction_id = %s", (transaction_id,))
+    conn.commit()
+
+    aggregates_query = """
+        SELECT transaction_date, store_id, transaction_category_id, currency, transaction_count, total_amount
+        FROM daily_spending
+        ORDER BY 1, 2, 3, 4
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(aggregates_query)
+        maintained = cursor.fetchall()
+    conn.commit()
+
+    sync_client.rebuild_daily_spending()
+    with conn.cursor() as cursor:
+        cursor.execute(aggregates_query)
+        assert cursor.fetchall() == maintained
+
+
+CUBE_QUERY = """
+    SELECT grain, period, currency, category_main, category_sub, item_count, total_spent
+    FROM category_spending
+    ORDER BY 1, 2, 3, 4 NULLS FIRST, 5 NULLS FIRST
+"""
+
+
+def category_day_count(conn, day: str) -> int:
+    """Nombre d'articles CHF du jour dans le cube, toutes catégories"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(SUM(item_count), 0)
+            FROM category_spending
+            WHERE grain = 'day' AND period = %s AND currency = 'CHF' AND category_main IS NULL
+        """, (day,))
+        count = cursor.fetchone()[0]
+    conn.commit()
+    return count
+
+
+def assert_category_spending_rebuilt_equal(conn, sync_client):
+    """Le cube tenu par trigger égale un recalcul complet"""
+    with conn.cursor() as cursor:
+        cursor.execute(CUBE_QUERY)
+        maintained = cursor.fetchall()
+    conn.commit()
+
+    sync_client.rebuild_category_spending()
+    with conn.cursor() as cursor:
+        cursor.execute(CUBE_QUERY)
+        assert cursor.fetchall() == maintained
+    conn.commit()
+
+
+def test_category_spending_matches_items(conn, sync_client):
+    """Le cube tenu par trigger égale un recalcul, après changement de date et suppression"""
+    before = {day: category_day_count(conn, day) for day in ("2025-03-14", "2025-03-20")}
+
+    kept_id = sync_client.insert_receipt(make_receipt())
+    deleted_id = sync_client.insert_receipt(make_receipt())
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE transaction SET transaction_date = '2025-03-20' WHERE transaction_id = %s",
+                       (kept_id,))
+        cursor.execute("DELETE FROM transaction WHERE transaction_id = %s", (deleted_id,))
+    conn.commit()
+
+    # Un seul ticket restant : 2 articles de plus au 20 mars, rien de plus au 14
+    assert category_day_count(conn, "2025-03-14") == before["2025-03-14"]
+    assert category_day_count(conn, "2025-03-20") == before["2025-03-20"] + 2
+
+    assert_category_spending_rebuilt_equal(conn, sync_client)
+
+
+def test_category_spending_async_insert(conn, sync_client, async_client):
+    """Ticket et articles insérés en une requête : articles comptés une fois, puis changés de partition"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT ensure_monthly_partition('transaction', 'transaction_date', '2025-03-01')")
+        cursor.execute("SELECT ensure_monthly_partition('transaction', 'transaction_date', '2025-04-01')")
+    conn.commit()
+    before = {day: category_day_count(conn, day) for day in ("2025-03-14", "2025-04-02")}
+
+    transaction_id = async_client("insert_receipt", make_receipt())
+    assert category_day_count(conn, "2025-03-14") == before["2025-03-14"] + 2
+    assert_category_spending_rebuilt_equal(conn, sync_client)
+
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE transaction SET transaction_date = '2025-04-02' WHERE transaction_id = %s",
+                       (transaction_id,))
+    conn.commit()
+    assert category_day_count(conn, "2025-03-14") == before["2025-03-14"]
+    assert category_day_count(conn, "2025-04-02") == before["2025-04-02"] + 2
+    assert_category_spending_rebuilt_equal(conn, sync_client)
+
+
+def test_price_observations_follow_items(conn, sync_client):
+    """Une observation par article à prix, réécrite sans doublon, supprimée avec le ticket"""
+    transaction_id = sync_client.insert_receipt(make_receipt())
+    assert sync_client.record_price_observations([transaction_id]) == 2
+    assert sync_client.record_price_observations([transaction_id]) == 2
+
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE transaction SET transaction_date = '2025-03-20' WHERE transaction_id = %s",
+                       (transaction_id,))
+        cursor.execute("""
+            SELECT product_key, observed_on::text, package_size, quantity_unit, price_per_unit
+            FROM product_price_observation
+            WHERE transaction_id = %s
+            ORDER BY product_key
+        """, (transaction_id,))
+        assert cursor.fetchall() == [
+            ("m budget milch 1l", "2025-03-20", Decimal("1.000"), "l", Decimal("1.2000")),
+            ("piles aa", "2025-03-20", Decimal("1.000"), "pce", Decimal("5.0000")),
+        ]
+
+        cursor.execute("DELETE FROM transaction WHERE transaction_id = %s", (transaction_id,))
+        cursor.execute("SELECT COUNT(*) FROM product_price_observation WHERE transaction_id = %s",
+                       (transaction_id,))
+        assert cursor.fetchone()[0] == 0
+    conn.commit()
+
+
+def test_pending_messages_until_transaction(sync_client):
+    """Un message reste à traiter jusqu'à sa transaction, et n'est pas réinséré"""
+    message = make_message("5")
+    assert sync_client.find_signal_message_id(message) is None
+
+    message_id, attachment_ids = sync_client.insert_signal_message(message)
+    assert sync_client.find_signal_message_id(make_message("5")) == message_id
+    assert message_id in sync_client.assign_partition_messages()
+    assert sync_client.get_message_transaction(message_id) is None
+
+    transaction_id = sync_client.insert_receipt(make_receipt(), message_id=message_id,
+                                                attachment_ids=attachment_ids)
+    assert message_id not in sync_client.assign_partition_messages()
+    assert sync_client.get_message_transaction(message_id) == {
+        "transaction_id": transaction_id, "store_name": "Migros", "total": Decimal("7.40")
+    }
+
+
+def test_record_price_observations_counts_rows(conn, sync_client):
+    """Tout l'historique par petits lots : le nombre renvoyé égale les lignes écrites"""
+    sync_client.insert_receipt(make_receipt())
+
+    recorded = sync_client.record_price_observations(batch_size=1)
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM product_price_observation")
+        assert recorded == cursor.fetchone()[0] >= 2
+    conn.commit()
+
+
+def test_asset_output_round_trip(conn, sync_client):
+    """Sorties d'assets : upsert par (message, asset), supprimées avec le message"""
+    from tickapp import serialization
+
+    message_id, _ = sync_client.insert_signal_message(make_message("9"))
+    payload = serialization.dumps(make_receipt())
+    sync_client.save_asset_output(message_id, "transformed_receipt", serialization.SCHEMA_VERSION, "a" * 64)
+    sync_client.save_asset_output(message_id, "transformed_receipt", serialization.SCHEMA_VERSION, "b" * 64,
+                                  payload=payload, run_id="run-1")
+
+    schema_version, stored = sync_client.get_asset_output(message_id, "transformed_receipt")
+    assert schema_version == serialization.SCHEMA_VERSION
+    assert serialization.loads(stored) == make_receipt()
+    assert sync_client.get_asset_output(message_id, "validated_receipt") is None
+
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM signal_message WHERE message_id = %s", (message_id,))
+    conn.commit()
+    assert sync_client.get_asset_output(message_id, "transformed_receipt") is None
+
+
+def test_receipt_jobs_batch(conn, sync_client):
+    """Réclamation et complétion par lot : un bail perdu n'annule pas le reste du lot"""
+    message_ids = [sync_client.insert_signal_message(make_message(f"5{i}"))[0] for i in range(3)]
+    for message_id in message_ids:
+        sync_client.enqueue_receipt_job(message_id)
+
+    jobs = sync_client.claim_receipt_jobs("worker-a", limit=10)
+    assert [message_id for _, message_id, _ in jobs] == message_ids
+    assert sync_client.claim_receipt_jobs("worker-b", limit=10) == []
+    assert set(sync_client.get_signal_messages(message_ids)) == set(message_ids)
+
+    # Le troisième job a été repris par un autre worker
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE receipt_job SET locked_by = 'worker-b' WHERE job_id = %s", (jobs[2][0],))
+    conn.commit()
+
+    results = sync_client.complete_receipt_jobs(
+        "worker-a", [(job_id, message_id, make_receipt()) for job_id, message_id, _ in jobs]
+    )
+    assert isinstance(results[jobs[2][0]], LeaseLostError)
+    assert all(isinstance(results[job_id], int) for job_id, _, _ in jobs[:2])
+    assert sync_client.fail_receipt_jobs("worker-a", {jobs[2][0]: "bail perdu"}) == {}
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT j.status, t.message_id IS NOT NULL
+            FROM receipt_job j
+            LEFT JOIN transaction t ON t.transaction_id = j.transaction_id
+            WHERE j.job_id = ANY(%s)
+            ORDER BY j.job_id
+        """, ([job_id for job_id, _, _ in jobs],))
+        assert cursor.fetchall() == [("done", True), ("done", True), ("running", False)]
+
+
+def test_complete_receipt_job_keeps_existing_transaction(conn, sync_client):
+    """Un job dont le message a déjà sa transaction est terminé sans second ticket"""
+    message_id, attachment_ids = sync_client.insert_signal_message(make_message("6"))
+    transaction_id = sync_client.insert_receipt(make_receipt(), message_id=message_id,
+                                                attachment_ids=attachment_ids)
+    sync_client.enqueue_receipt_job(message_id)
+    job_id, claimed_message_id, _ = sync_client.claim_receipt_job("worker-c")
+    assert claimed_message_id == message_id
+
+    assert sync_client.complete_receipt_job(job_id, "worker-c", make_receipt(), message_id) == transaction_id
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM transaction WHERE message_id = %s", (message_id,))
+        assert cursor.fetchone()[0] == 1
+        cursor.execute("SELECT status, transaction_id FROM receipt_job WHERE job_id = %s", (job_id,))
+        assert cursor.fetchone() == ("done", transaction_id)
+    conn.commit()
+
+
+def test_iter_dataset_rows_filters_and_batches(sync_client):
+    """Lecture par lots (curseur côté serveur) avec filtres et watermark"""
+    first_id = sync_client.insert_receipt(make_receipt())
+    second_id = sync_client.insert_receipt(make_receipt())
+
+    batches = list(sync_client.iter_dataset_rows("items", batch_size=3, since_transaction_id=first_id - 1))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert {row[1] for batch in batches for row in batch} == {first_id, second_id}
+
+    rows = [row for batch in sync_client.iter_dataset_rows(
+        "transactions", since_transaction_id=first_id, stores=["Migros"], from_date=date(2025, 3, 14),
+        categories=["Alimentation et supermarchés"]
+    ) for row in batch]
+    assert [(row[0], row[-1]) for row in rows] == [(second_id, 2)]
+    assert list(sync_client.iter_dataset_rows("transactions", since_transaction_id=second_id)) == []
+
+    # Horizon : aucune insertion en cours, tout ID validé est exporté
+    horizon = sync_client.get_committed_transaction_horizon()
+    assert horizon >= second_id
+    rows = [row for batch in sync_client.iter_dataset_rows(
+        "transactions", since_transaction_id=first_id - 1, until_transaction_id=first_id
+    ) for row in batch]
+    assert [row[0] for row in rows] == [first_id]
+
+
+def test_message_routing_single_path(conn, sync_client):
+    """Un message va au pipeline par message ou à la file, jamais aux deux"""
+    partition_message_id, _ = sync_client.insert_signal_message(make_message("7"))
+    queued_message_id, _ = sync_client.insert_signal_message(make_message("8"))
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO message_partition (message_id) VALUES (%s)", (partition_message_id,))
+    conn.commit()
+
+    sync_client.enqueue_pending_messages()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT message_id FROM receipt_job WHERE message_id = ANY(%s)",
+                       ([partition_message_id, queued_message_id],))
+        assert cursor.fetchall() == [(queued_message_id,)]
+    conn.commit()
+
+    assigned = sync_client.assign_partition_messages()
+    assert partition_message_id in assigned
+    assert queued_message_id not in assigned
+
+    # Ticket déjà inséré pour le message en file : le lot le reprend sans doublon
+    transaction_id = sync_client.insert_receipt(make_receipt(), message_id=queued_message_id)
+    jobs = sync_client.claim_receipt_jobs("worker-d", limit=100)
+    job_id = next(job_id for job_id, message_id, _ in jobs if message_id == queued_message_id)
+    results = sync_client.complete_receipt_jobs("worker-d", [(job_id, queued_message_id, make_receipt())])
+    assert results == {job_id: transaction_id}
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM transaction WHERE message_id = %s", (queued_message_id,))
+        assert cursor.fetchone()[0] == 1
+    conn.commit()
@@ -0,0 +1,110 @@
+"""
+Tests unitaires de CategoryMatcher et de la validation des catégories d'articles
+
+Run avec:
+    python -m pytest tests/category_matcher_tests.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from tickapp.models import Item
+from tickapp.transformers.category_matcher import CategoryMatcher, normalize_key
+from tickapp.transformers.validators import DataValidator
+
+
+CATEGORIES = [
+    ("Alimentation et supermarchés", "Produits laitiers et œufs"),
+    ("Alimentation et supermarchés", "Fruits et légumes frais"),
+    ("Alimentation et supermarchés", "Boissons non alcoolisées"),
+    ("Maison et entretien", "Produits ménagers"),
+    ("Divers", "Divers"),
+]
+
+
+@pytest.fixture
+def matcher():
+    return CategoryMatcher(CATEGORIES)
+
+
+def make_item(category_main, category_sub):
+    return Item(transaction_id=0, product_name="Article", quantity=Decimal("1"),
+                unit_price=Decimal("1.00"), total_price=Decimal("1.00"),
+                category_main=category_main, category_sub=category_sub)
+
+
+def test_normalize_key():
+    assert normalize_key("  Produits LAITIERS & Œufs ") == "produits laitiers oeufs"
+    assert normalize_key("Fruits et légumes") == "fruits et legumes"
+    assert normalize_key(None) == ""
+
+
+def test_exact_match_ignores_case_and_accents(matcher):
+    assert matcher.match("ALIMENTATION ET SUPERMARCHES", "produits laitiers et oeufs") == CATEGORIES[0]
+
+
+def test_main_only_returns_first_sub(matcher):
+    assert matcher.match("Alimentation et supermarchés") == (
+        "Alimentation et supermarchés", "Boissons non alcoolisées")
+
+
+def test_fuzzy_match(matcher):
+    assert matcher.match("Alimentation et supermarche", "Fruit et legume frais") == CATEGORIES[1]
+    assert matcher.match("Entretien maison", "Produit menager") == CATEGORIES[3]
+
+
+def test_no_match_under_threshold(matcher):
+    assert matcher.match("Électronique", "Piles et batteries") is None
+
+
+def test_default_threshold_matches_legacy_difflib_decisions():
+    """Seuil par défaut : mêmes acceptations / rejets que l'ancien scan difflib (> 0.5)"""
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+    from benchmark_category_matcher import legacy_find_closest_category, load_categories, make_queries
+
+    categories = load_categories()
+    queries = make_queries(categories, 500, seed=7)
+    matches = CategoryMatcher(categories).match_many(queries)
+    legacy = [legacy_find_closest_category(categories, *query) for query in queries]
+
+    assert [match is None for match in matches] == [match is None for match in legacy]
+
+
+def test_match_many_keeps_order_and_duplicates(matcher):
+    queries = [
+        ("alimentation et supermarchés", "Produits laitiers et œufs"),
+        ("Inconnu", "Inconnu"),
+        ("ALIMENTATION ET SUPERMARCHÉS", "PRODUITS LAITIERS ET ŒUFS"),
+    ]
+    assert matcher.match_many(queries) == [CATEGORIES[0], None, CATEGORIES[0]]
+    assert matcher.match_many(queries) == [matcher.match(*q) for q in queries]
+
+
+def test_validate_categories_flags_unknown(matcher):
+    known = make_item("Alimentation et supermarches", "Produits laitiers")
+    new_sub = make_item("Alimentation et supermarchés", "Piles")
+    unknown = make_item("Électronique", "Piles et batteries")
+
+    flagged = DataValidator.validate_categories([known, new_sub, unknown], matcher)
+
+    assert flagged == [new_sub, unknown]
+    assert (known.category_main, known.category_sub) == CATEGORIES[0]
+    assert known.proposed_category_main is None
+    assert (unknown.category_main, unknown.category_sub) == DataValidator.FALLBACK_CATEGORY
+    assert (unknown.proposed_category_main, unknown.proposed_category_sub) == ("Électronique", "Piles et batteries")
+    assert (new_sub.category_main, new_sub.category_sub) == DataValidator.FALLBACK_CATEGORY
+
+
+def test_validate_categories_flags_missing_category(matcher):
+    missing = make_item(None, "")
+
+    flagged = DataValidator.validate_categories([missing], matcher)
+
+    assert flagged == [missing]
+    assert (missing.category_main, missing.category_sub) == DataValidator.FALLBACK_CATEGORY
+    # Catégorie vide, pas NULL : reste à revoir, jamais apprise
+    assert (missing.proposed_category_main, missing.proposed_category_sub) == ("", "")
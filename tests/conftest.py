@@ -0,0 +1,41 @@
+"""
+Fixtures partagées des tests sur base PostgreSQL
+
+La base désignée par TICKAPP_TEST_DB_NAME doit être JETABLE : son schéma
+public est recréé à partir de pg/init_scripts.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+
+INIT_SCRIPTS = Path(__file__).parent.parent / "pg" / "init_scripts"
+TEST_DB_NAME = os.getenv("TICKAPP_TEST_DB_NAME")
+
+
+@pytest.fixture(scope="session")
+def db_params():
+    """Paramètres de connexion à la base de test, schéma recréé"""
+    psycopg2 = pytest.importorskip("psycopg2")
+    if not TEST_DB_NAME:
+        pytest.skip("TICKAPP_TEST_DB_NAME non défini (base PostgreSQL de test jetable)")
+    params = {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "5434")),
+        "database": TEST_DB_NAME,
+        "user": os.getenv("DB_USER", "receipt_user"),
+        "password": os.getenv("DB_PASSWORD", "SuperSecretPassword123!"),
+    }
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+        for script in sorted(INIT_SCRIPTS.glob("*.sql")):
+            # Ni données fictives, ni base Metabase (commandes psql)
+            if script.name.startswith(("04-", "06-")):
+                continue
+            cursor.execute(script.read_text(encoding="utf-8"))
+    conn.close()
+    return params
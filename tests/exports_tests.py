@@ -0,0 +1,106 @@
+"""
+Tests unitaires de l'export des transactions et articles
+
+Run avec:
+    python -m pytest tests/exports_tests.py -v
+"""
+
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from tickapp.exports import ExportFilters, export_dataset
+
+
+class BatchSource:
+    """Source de lots à la place de DatabaseClient.iter_dataset_rows"""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.calls = []
+
+    def iter_dataset_rows(self, dataset, batch_size=10000, **filters):
+        self.calls.append((dataset, batch_size, filters))
+        since = filters.get("since_transaction_id")
+        until = filters.get("until_transaction_id")
+        rows = [row for row in self.rows
+                if (since is None or row[0] > since) and (until is None or row[0] <= until)]
+        for index in range(0, len(rows), batch_size):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise RuntimeError("connexion perdue")
+            yield rows[index:index + batch_size]
+
+
+def transaction_rows(count):
+    return [
+        (transaction_id, None, date(2025, 3, 1), time(9, 30), 1, "Migros", "Lausanne",
+         "Courses", "CHF", Decimal("10.05"), "card", 2)
+        for transaction_id in range(1, count + 1)
+    ]
+
+
+def test_parquet_export_in_batches(tmp_path):
+    source = BatchSource(transaction_rows(25))
+    result = export_dataset(source, "transactions", tmp_path / "t.parquet", batch_size=10)
+
+    assert (result.rows, result.batches, result.watermark) == (25, 3, 25)
+    parquet = pq.ParquetFile(result.path)
+    # Un groupe de lignes par lot
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("total").to_pylist()[0] == Decimal("10.05")
+
+
+def test_incremental_export_and_filters(tmp_path):
+    source = BatchSource(transaction_rows(25))
+    filters = ExportFilters(stores=["Migros"], since_transaction_id=20)
+    result = export_dataset(source, "transactions", tmp_path / "t.csv", export_format="csv", filters=filters)
+
+    assert (result.rows, result.watermark) == (5, 25)
+    assert source.calls[0][2]["stores"] == ["Migros"]
+    table = pa_csv.read_csv(result.path)
+    assert table.column("transaction_id").to_pylist() == [21, 22, 23, 24, 25]
+
+
+def test_incremental_export_stops_at_horizon(tmp_path):
+    source = BatchSource(transaction_rows(25))
+    filters = ExportFilters(since_transaction_id=10, until_transaction_id=18)
+    result = export_dataset(source, "transactions", tmp_path / "t.parquet", filters=filters)
+
+    assert (result.rows, result.watermark) == (8, 18)
+    assert source.calls[0][2]["until_transaction_id"] == 18
+
+
+def test_scope_ignores_watermarks_only():
+    scope = ExportFilters(stores=["Migros", "Coop"], since_transaction_id=10).scope()
+
+    assert ExportFilters(stores=["Coop", "Migros"], until_transaction_id=30).scope() == scope
+    assert ExportFilters().scope() != scope
+    assert ExportFilters(stores=["Migros", "Coop"], from_date=date(2025, 1, 1)).scope() != scope
+
+
+def test_empty_arrow_export(tmp_path):
+    result = export_dataset(BatchSource([]), "transactions", tmp_path / "t.arrow", export_format="arrow")
+
+    assert (result.rows, result.watermark) == (0, None)
+    with pa.ipc.open_file(result.path) as reader:
+        assert reader.read_all().num_rows == 0
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    source = BatchSource(transaction_rows(25), fail_after=10)
+    with pytest.raises(RuntimeError):
+        export_dataset(source, "transactions", tmp_path / "t.parquet", batch_size=10)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_format_or_dataset(tmp_path):
+    with pytest.raises(ValueError):
+        export_dataset(BatchSource([]), "transactions", tmp_path / "t.xlsx", export_format="xlsx")
+    with pytest.raises(ValueError):
+        export_dataset(BatchSource([]), "stores", tmp_path / "s.parquet")
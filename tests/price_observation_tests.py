@@ -0,0 +1,58 @@
+"""
+Tests unitaires des observations de prix
+
+Run avec:
+    python -m pytest tests/price_observation_tests.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from tickapp.transformers.price_observation import observe, package_size
+from tickapp.transformers.product_dictionary import ProductDictionary, ProductEntry
+
+
+@pytest.mark.parametrize("product_name, expected", [
+    ("M-Budget Milch 1L", (Decimal("1"), "l")),
+    ("Vollmilch 1,5 l", (Decimal("1.5"), "l")),
+    ("Rivella Rot 6x1.5L", (Decimal("9"), "l")),
+    ("Coca-Cola 6 x 33cl", (Decimal("1.98"), "l")),
+    ("Gruyère AOP 250g", (Decimal("0.25"), "kg")),
+    ("Eier Freiland 10 Stk", (Decimal("10"), "pce")),
+    ("Bio Avocado 2 Stk 500g", (Decimal("0.5"), "kg")),
+    ("Bananen", None),
+    ("M-Budget", None),
+])
+def test_package_size(product_name, expected):
+    assert package_size(product_name) == expected
+
+
+def test_observe_uses_price_per_unit():
+    observation = observe("Coca-Cola 6 x 33cl", "Coca-Cola", Decimal("1"), Decimal("7.92"))
+
+    assert observation.product_key == "coca cola 6 x 33cl"
+    assert observation.quantity_unit == "l"
+    assert observation.price_per_unit == Decimal("4.0000")
+
+
+def test_observe_weighed_and_unpriced_items():
+    bananas = observe("Bananen", None, Decimal("0.532"), Decimal("2.95"))
+    assert (bananas.package_size, bananas.quantity_unit, bananas.price_per_unit) == (
+        Decimal("1"), "kg", Decimal("2.9500")
+    )
+    assert observe("Rabatt Aktion", None, Decimal("1"), Decimal("-1.00")) is None
+    assert observe("Depot PET", None, Decimal("1"), Decimal("0.00")) is None
+
+
+def test_observe_groups_variants_under_canonical_product():
+    dictionary = ProductDictionary([
+        ("m budget vollmilch 1l", "migros", ProductEntry("M-Budget Milch 1L", "M-Budget", "Alimentation", "Lait")),
+        ("m budget milch 1l", "", ProductEntry("M-Budget Milch 1L", "M-Budget", "Alimentation", "Lait")),
+    ])
+
+    variant = observe("M-BUDGET VOLLMILCH 1L", None, Decimal("1"), Decimal("1.20"), "Migros", dictionary)
+    canonical = observe("M-Budget Milch 1L", None, Decimal("1"), Decimal("1.25"), "Coop", dictionary)
+
+    assert variant.product_key == canonical.product_key == "m budget milch 1l"
+    assert variant.brand == "M-Budget"
@@ -0,0 +1,82 @@
+"""
+Tests unitaires du dictionnaire de produits
+
+Run avec:
+    python -m pytest tests/product_dictionary_tests.py -v
+"""
+
+from decimal import Decimal
+
+from tickapp.models import Item
+from tickapp.transformers.product_dictionary import ProductDictionary
+from tickapp.transformers.receipt_transformer import ReceiptTransformer
+
+
+DAIRY = ("Alimentation et supermarchés", "Produits laitiers et œufs")
+DRINKS = ("Alimentation et supermarchés", "Boissons non alcoolisées")
+
+ROWS = [
+    # product_name, brand, store_name, category_main, category_sub, count
+    ("M-Budget Milch 1L", "M-Budget", "Migros", *DAIRY, 5),
+    ("M-BUDGET MILCH 1L", None, "Migros", *DAIRY, 2),
+    ("M-Budget Milch 1L", None, "Migros", *DRINKS, 1),
+    ("Rivella Rot 1.5L", "Rivella", "Coop", *DRINKS, 3),
+    ("Rivella Rot 1.5L", "Rivella", "Migros", *DAIRY, 1),
+]
+
+
+def make_item(product_name, category=(None, None), brand=None):
+    return Item(transaction_id=0, product_name=product_name, brand=brand, quantity=Decimal("1"),
+                unit_price=Decimal("1.00"), total_price=Decimal("1.00"),
+                category_main=category[0], category_sub=category[1])
+
+
+def test_learn_keeps_most_frequent_values():
+    entries = {(name, store): entry for name, store, entry in ProductDictionary.learn(ROWS)}
+
+    milk = entries[("m budget milch 1l", "migros")]
+    assert (milk.category_main, milk.category_sub) == DAIRY
+    assert milk.canonical_name == "M-Budget Milch 1L"
+    assert milk.brand == "M-Budget"
+    assert milk.occurrences == 8
+    assert entries[("m budget milch 1l", "")].occurrences == 8
+
+
+def test_learn_min_occurrences():
+    entries = {(name, store) for name, store, _ in ProductDictionary.learn(ROWS, min_occurrences=2)}
+    assert ("rivella rot 1 5l", "coop") in entries
+    assert ("rivella rot 1 5l", "migros") not in entries
+    assert ("rivella rot 1 5l", "") in entries
+
+
+def test_lookup_prefers_store_entry():
+    dictionary = ProductDictionary(ProductDictionary.learn(ROWS))
+    assert dictionary.lookup("Rivella Rot 1.5L", "MIGROS").category_sub == DAIRY[1]
+    assert dictionary.lookup("Rivella Rot 1.5L", "Denner").category_sub == DRINKS[1]
+    assert dictionary.lookup("Inconnu", "Migros") is None
+
+
+def test_apply_prefills_known_items():
+    dictionary = ProductDictionary(ProductDictionary.learn(ROWS))
+    milk = make_item("m-budget milch 1l", category=DRINKS)
+    unknown = make_item("Piles AA", category=("Maison", "Divers"))
+
+    assert dictionary.apply([milk, unknown], "Migros") == [unknown]
+    assert (milk.category_main, milk.category_sub) == DAIRY
+    assert milk.brand == "M-Budget"
+    assert (unknown.category_main, unknown.category_sub) == ("Maison", "Divers")
+
+
+def test_transformer_accepts_missing_categories_for_known_products():
+    dictionary = ProductDictionary(ProductDictionary.learn(ROWS))
+    claude_json = {
+        "magasin": {"nom": "Migros"},
+        "transaction": {"date": "2025-03-14"},
+        "devise": "CHF",
+        "total": 1.2,
+        "articles": [
+            {"nom": "M-Budget Milch 1L", "quantite": 1, "prix_unitaire": 1.2, "prix_total": 1.2},
+        ],
+    }
+    receipt = ReceiptTransformer.transform_claude_json(claude_json, product_dictionary=dictionary)
+    assert (receipt.items[0].category_main, receipt.items[0].category_sub) == DAIRY
@@ -0,0 +1,82 @@
+"""
+Tests du cache de prompt de PromptClient
+
+Nécessitent un PostgreSQL local JETABLE (voir conftest.py).
+
+Run avec:
+    TICKAPP_TEST_DB_NAME=receipt_test python -m pytest tests/prompt_client_tests.py -v
+"""
+
+import os
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from tickapp.clients.prompt_client import PromptClient
+
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TICKAPP_TEST_DB_NAME"),
+    reason="TICKAPP_TEST_DB_NAME non défini (base PostgreSQL de test jetable)"
+)
+
+
+@pytest.fixture
+def prompt_client(db_params):
+    PromptClient.clear_cache()
+    yield PromptClient(**db_params)
+    PromptClient.clear_cache()
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "tickets.txt"
+    path.write_text("Catégories:\n[item_categories]\nGroupes:\n[transaction_categories]\n", encoding="utf-8")
+    return path
+
+
+def test_prompt_is_cached(prompt_client, template):
+    """Sans changement, le même rendu est réutilisé"""
+    first = prompt_client.get_prompt(template)
+    assert prompt_client.get_prompt(template) is first
+    assert len(first.version) == PromptClient.PROMPT_VERSION_LENGTH
+    assert "[item_categories]" not in first.text
+
+
+def test_category_change_invalidates(prompt_client, template, db_params):
+    """Une nouvelle catégorie change la version ; un ON CONFLICT sans insertion non"""
+    first = prompt_client.get_prompt(template)
+
+    conn = psycopg2.connect(**db_params)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO item_category (category_main, category_sub)
+            SELECT category_main, category_sub FROM item_category LIMIT 1
+            ON CONFLICT (category_main, category_sub) DO NOTHING
+        """)
+    assert prompt_client.get_prompt(template) is first
+
+    with conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO item_category (category_main, category_sub)
+            VALUES ('Test cache', 'Nouvelle sous-catégorie')
+        """)
+    conn.close()
+
+    second = prompt_client.get_prompt(template)
+    assert second.catalog_version > first.catalog_version
+    assert second.version != first.version
+    assert "Nouvelle sous-catégorie" in second.text
+
+
+def test_template_change_invalidates(prompt_client, template):
+    """Un template modifié (mtime) est relu"""
+    first = prompt_client.get_prompt(template)
+    stat = template.stat()
+    template.write_text("Autre template\n[item_categories]\n", encoding="utf-8")
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = prompt_client.get_prompt(template)
+    assert second.text.startswith("Autre template")
+    assert second.version != first.version
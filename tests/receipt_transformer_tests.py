@@ -0,0 +1,73 @@
+"""
+Tests unitaires de ReceiptTransformer (ticket seul et lot)
+
+Run avec:
+    python -m pytest tests/receipt_transformer_tests.py -v
+"""
+
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from tickapp.transformers.receipt_transformer import ReceiptTransformer
+
+
+def make_json(store="Migros", date_str="2025-03-14", heure="12:29", articles=None):
+    return {
+        "magasin": {"nom": store, "ville": "Lausanne", "pays": "CH"},
+        "transaction": {"date": date_str, "heure": heure, "category_id": 3, "mode_paiement": "carte"},
+        "devise": "CHF",
+        "total": 7.4,
+        "articles": articles if articles is not None else [
+            {"nom": "M-Budget Milch 1L", "quantite": 2, "prix_unitaire": 1.2, "prix_total": 2.4,
+             "categorie": "Alimentation", "sous_categorie": "Lait"},
+            {"nom": "Piles AA", "marque": "Varta", "quantite": 1, "prix_unitaire": "5.00", "prix_total": 5,
+             "categorie": "Maison", "sous_categorie": "Divers", "tva": "8.1%"},
+        ],
+    }
+
+
+def test_transform_many_matches_transform_claude_json():
+    batch = [make_json(), make_json(store="Coop", heure="08:01:02", articles=[]), make_json(heure=None)]
+    result = ReceiptTransformer.transform_many(batch, message_ids=[10, 11, None])
+
+    assert result.errors == {}
+    for index, receipt in enumerate(result.to_receipt_data()):
+        expected = ReceiptTransformer.transform_claude_json(batch[index], message_id=[10, 11, None][index])
+        assert receipt == expected
+
+
+def test_transform_many_parses_columns():
+    result = ReceiptTransformer.transform_many([make_json(), make_json(heure="8h30")])
+
+    assert list(result.receipts["transaction_date"]) == [date(2025, 3, 14)] * 2
+    assert list(result.receipts["transaction_time"]) == [time(12, 29), None]
+    assert list(result.items["unit_price"]) == ["1.2", "5.00"] * 2
+    assert list(result.items["receipt_index"]) == [0, 0, 1, 1]
+    assert result.to_receipt_data()[0].items[1].unit_price == Decimal("5.00")
+
+
+def test_transform_many_captures_errors_per_receipt():
+    batch = [
+        make_json(),
+        make_json(date_str="14.03.2025"),
+        {"magasin": {"nom": "Coop"}},
+        make_json(articles=[{"nom": "X", "quantite": 1, "prix_unitaire": "abc", "prix_total": 1}]),
+        make_json(articles=[{"quantite": 1, "prix_unitaire": 1, "prix_total": 1}]),
+    ]
+    result = ReceiptTransformer.transform_many(batch)
+
+    assert set(result.errors) == {1, 2, 3, 4}
+    assert result.errors[1] == "Date invalide"
+    assert list(result.receipts.index) == [0]
+    assert set(result.items["receipt_index"]) == {0}
+    receipts = result.to_receipt_data()
+    assert receipts[0] is not None and receipts[1:] == [None] * 4
+
+
+def test_transform_many_empty():
+    result = ReceiptTransformer.transform_many([])
+    assert result.to_receipt_data() == [] and result.errors == {}
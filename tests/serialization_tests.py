@@ -0,0 +1,63 @@
+"""
+Tests unitaires de la sérialisation compacte des modèles
+
+Run avec:
+    python -m pytest tests/serialization_tests.py -v
+"""
+
+import pickle
+from datetime import date, time
+from decimal import Decimal
+
+import msgpack
+import pytest
+
+from tickapp import serialization
+from tickapp.models import Item, ReceiptData, Store, Transaction
+
+
+def make_receipt(items=3):
+    return ReceiptData(
+        store=Store(store_name="Migros", city="Lausanne", country_code="CH"),
+        transaction=Transaction(
+            store_id=None, message_id=42, transaction_category_id=3,
+            transaction_date=date(2025, 3, 14), transaction_time=time(12, 29),
+            currency="CHF", total=Decimal("7.40"), prompt_version="abcdef0123456789"
+        ),
+        items=[
+            Item(transaction_id=None, product_name=f"Article {i}", quantity=Decimal("2"),
+                 unit_price=Decimal("1.20"), total_price=Decimal("2.40"),
+                 category_main="Alimentation", category_sub="Lait", line_number=i)
+            for i in range(1, items + 1)
+        ]
+    )
+
+
+def test_round_trip_receipts_and_dicts():
+    receipt = make_receipt()
+    assert serialization.loads(serialization.dumps(receipt)) == receipt
+
+    batch = [make_receipt(), make_receipt(items=0)]
+    assert serialization.loads(serialization.dumps(batch)) == batch
+
+    payload = {"extraction": {"total": 7.4, "articles": []}, "image_paths": ["/tmp/a.jpg"], "receipt": receipt}
+    assert serialization.loads(serialization.dumps(payload)) == payload
+
+
+def test_smaller_than_pickle():
+    batch = [make_receipt(items=20) for _ in range(10)]
+    assert len(serialization.dumps(batch)) < len(pickle.dumps(batch))
+
+
+def test_models_have_slots():
+    with pytest.raises(AttributeError):
+        make_receipt().store.unknown_field = 1
+
+
+def test_schema_version():
+    # Payload d'une version antérieure sans les derniers champs : valeurs par défaut
+    store = msgpack.ExtType(10, msgpack.packb(["Coop"]))
+    assert serialization.loads(msgpack.packb([0, store])) == Store(store_name="Coop")
+
+    with pytest.raises(ValueError):
+        serialization.loads(msgpack.packb([serialization.SCHEMA_VERSION + 1, None]))
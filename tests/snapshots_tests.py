@@ -0,0 +1,68 @@
+"""
+Tests unitaires des snapshots Parquet du dashboard
+
+Run avec:
+    python -m pytest tests/snapshots_tests.py -v
+"""
+
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+from tickapp import snapshots
+
+
+def transaction_row(transaction_id, day, total="12.50"):
+    return (transaction_id, 100 + transaction_id, day, time(12, 29), 1, "Migros", "Lausanne",
+            "Courses", "CHF", Decimal(total), None, 3)
+
+
+def test_write_month_round_trip(tmp_path):
+    month = date(2025, 3, 1)
+    rows = [transaction_row(1, date(2025, 3, 2)), transaction_row(2, date(2025, 3, 14), "7.40")]
+
+    assert snapshots.write_month(tmp_path, "transactions", month, rows) == 2
+
+    path = snapshots.month_path(tmp_path, "transactions", month)
+    assert path.parent.name == "month=2025-03"
+    table = ds.dataset(path, format="parquet").to_table()
+    assert table.schema == snapshots.SNAPSHOT_SCHEMAS["transactions"]
+    assert table.column("total").to_pylist() == [Decimal("12.50"), Decimal("7.40")]
+    # Aucun fichier temporaire laissé à côté
+    assert [p.name for p in path.parent.iterdir()] == [snapshots.DATA_FILE]
+
+
+def test_months_share_schema_and_filter(tmp_path):
+    snapshots.write_month(tmp_path, "transactions", date(2025, 2, 1), [transaction_row(1, date(2025, 2, 27))])
+    # Mois dont une colonne n'a que des NULL : même schéma
+    snapshots.write_month(tmp_path, "transactions", date(2025, 3, 1),
+                          [(2, None, date(2025, 3, 1), None, 1, "Coop", None, None, "CHF", Decimal("1"), None, 0)])
+
+    dataset = ds.dataset(tmp_path / "transactions", format="parquet", partitioning="hive")
+    table = dataset.to_table(
+        columns=["transaction_id"],
+        filter=ds.field("transaction_date") >= date(2025, 3, 1)
+    )
+    assert table.column("transaction_id").to_pylist() == [2]
+
+
+def test_empty_month_removes_partition(tmp_path):
+    month = date(2025, 3, 1)
+    snapshots.write_month(tmp_path, "items", month, [
+        (1, 1, date(2025, 3, 2), "Migros", "Lait", None, Decimal("1.000"),
+         Decimal("1.20"), Decimal("1.20"), "CHF", "Alimentation", "Lait")
+    ])
+    assert snapshots.snapshot_months(tmp_path, "items") == [month]
+
+    assert snapshots.write_month(tmp_path, "items", month, []) == 0
+    assert snapshots.snapshot_months(tmp_path, "items") == []
+
+
+def test_to_table_empty():
+    table = snapshots.to_table("items", [])
+    assert table.num_rows == 0
+    assert table.schema == snapshots.SNAPSHOT_SCHEMAS["items"]
@@ -0,0 +1,73 @@
+"""
+Tests unitaires des contrôles de cohérence de DataValidator
+
+Run avec:
+    python -m pytest tests/validators_tests.py -v
+"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from tickapp.transformers.receipt_transformer import ReceiptTransformer
+from tickapp.transformers.validators import DataValidator
+
+
+TODAY = date(2025, 6, 1)
+
+
+def make_json(total=7.4, date_str="2025-03-14", devise="CHF", articles=None):
+    return {
+        "magasin": {"nom": "Migros"},
+        "transaction": {"date": date_str},
+        "devise": devise,
+        "total": total,
+        "articles": articles if articles is not None else [
+            {"nom": "Lait", "quantite": 2, "prix_unitaire": 1.2, "prix_total": 2.4},
+            {"nom": "Piles AA", "quantite": 1, "prix_unitaire": "5.00", "prix_total": 5},
+        ],
+    }
+
+
+def test_check_consistency_flags_each_rule():
+    batch = [
+        make_json(),
+        make_json(total=9),
+        make_json(articles=[{"nom": "Lait", "quantite": 3, "prix_unitaire": 1.2, "prix_total": 2.4},
+                            {"nom": "Pain", "quantite": 1, "prix_unitaire": 5, "prix_total": 5}]),
+        make_json(date_str="2030-01-01", devise="XYZ"),
+    ]
+    result = ReceiptTransformer.transform_many(batch)
+    report = DataValidator.check_consistency(result.receipts, result.items, today=TODAY)
+
+    assert report["passed"].tolist() == [True, False, False, False]
+    assert report.loc[1, "total_gap"] == pytest.approx(-1.6)
+    assert report.loc[2, "bad_lines"] == [1]
+    assert not report.loc[3, "date_ok"] and not report.loc[3, "currency_ok"]
+    assert report.loc[3, "score"] == 0.5
+    assert len(report.loc[3, "issues"]) == 2
+
+
+def test_check_consistency_tolerates_rounding_and_weighed_items():
+    articles = [
+        # Article au poids : 0.347 kg x 12.90 = 4.4763, imprimé 4.48
+        {"nom": "Gruyère", "quantite": 0.347, "prix_unitaire": 12.90, "prix_total": 4.48},
+        {"nom": "Pain", "quantite": 1, "prix_unitaire": 2.2, "prix_total": 2.2},
+    ]
+    # Arrondi à 5 centimes : 6.68 -> 6.70
+    result = ReceiptTransformer.transform_many([make_json(total=6.70, articles=articles)])
+    report = DataValidator.check_consistency(result.receipts, result.items, today=TODAY)
+
+    assert report["passed"].all()
+
+
+def test_check_extraction():
+    assert DataValidator.check_extraction(make_json(), today=TODAY) == {"score": 1.0, "passed": True, "issues": []}
+
+    report = DataValidator.check_extraction(make_json(total=9), today=TODAY)
+    assert not report["passed"] and report["score"] == 0.75
+
+    report = DataValidator.check_extraction({"magasin": {"nom": "Migros"}}, today=TODAY)
+    assert report["score"] == 0.0 and report["issues"]
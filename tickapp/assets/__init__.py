@@ -12,12 +12,20 @@ env_file = project_root / ".env"
 if env_file.exists():
     load_dotenv(env_file)
 
-from . import message_pipeline
+from tickapp.io_managers import MessageIOManager
+from . import message_pipeline, batch_pipeline, maintenance
 from .message_pipeline import process_signal_message
+from .batch_pipeline import process_receipt_batch
+from .maintenance import (
+    partition_maintenance, partition_maintenance_schedule, rebuild_daily_spending, rebuild_category_spending,
+    product_dictionary_job, product_dictionary_schedule, register_message_partitions,
+    rebuild_snapshots, rebuild_snapshots_schedule, export_data, rebuild_price_observations,
+)
 
-# Charger uniquement les assets du pipeline par message (utilisé par le sensor)
+# Charger uniquement les assets du pipeline par message (utilisé par le sensor),
+# du pipeline par micro-lots (file receipt_job) et ceux de maintenance de la base.
 # L'ancien pipeline batch (signal, claude, transform, db) n'est plus utilisé
-all_assets = load_assets_from_modules([message_pipeline])
+all_assets = load_assets_from_modules([message_pipeline, batch_pipeline, maintenance])
 
 # Importer les sensors
 from tickapp.sensors import signal_message_sensor, signal_message_sensor_test
@@ -25,7 +33,14 @@ from tickapp.sensors import signal_message_sensor, signal_message_sensor_test
 # Définitions Dagster
 defs = Definitions(
     assets=all_assets,
-    jobs=[process_signal_message],
-    sensors=[signal_message_sensor, signal_message_sensor_test]
+    jobs=[
+        process_signal_message, process_receipt_batch, partition_maintenance, rebuild_daily_spending,
+        rebuild_category_spending,
+        product_dictionary_job, register_message_partitions, rebuild_snapshots, export_data,
+        rebuild_price_observations,
+    ],
+    schedules=[partition_maintenance_schedule, product_dictionary_schedule, rebuild_snapshots_schedule],
+    sensors=[signal_message_sensor, signal_message_sensor_test],
+    resources={"message_io_manager": MessageIOManager()}
 )
 
@@ -0,0 +1,163 @@
+# tickapp/assets/batch_pipeline.py
+"""
+Asset Dagster de traitement des tickets par micro-lots
+
+Un run traite jusqu'à batch_size messages de la file receipt_job : les
+clients, le prompt, le dictionnaire de produits et le référentiel de
+catégories sont chargés une fois par lot, les extractions Claude tournent en
+parallèle et les tickets sont écrits en une transaction. Les mois touchés
+sont ensuite réexportés dans les snapshots Parquet du dashboard et les prix
+des articles enregistrés pour le suivi des prix.
+"""
+from dagster import asset, AssetExecutionContext, Config, MaterializeResult, MetadataValue, define_asset_job
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+from dotenv import load_dotenv
+from pydantic import Field
+
+from tickapp.clients.database_client import DatabaseClient
+from tickapp.clients.prompt_client import PromptClient
+from tickapp.snapshots import SnapshotExporter
+from tickapp.transformers.receipt_transformer import ReceiptTransformer
+from tickapp.transformers.validators import DataValidator
+from tickapp.workers.receipt_worker import ReceiptWorker
+
+load_dotenv()
+
+
+class ReceiptBatchConfig(Config):
+    """Taille et parallélisme d'un micro-lot"""
+    batch_size: int = Field(default=20, description="Nombre maximal de messages traités par run")
+    max_concurrency: int = Field(default=4, description="Extractions Claude simultanées")
+    lease_seconds: int = Field(default=900, description="Bail des jobs réclamés (durée maximale du lot)")
+    retry_delay: float = Field(default=30.0, description="Délai de base entre deux tentatives d'un job")
+
+
+@asset
+def receipt_batch(context: AssetExecutionContext, config: ReceiptBatchConfig) -> MaterializeResult:
+    """
+    Asset qui réclame un micro-lot de jobs receipt_job et les traite :
+    extraction Claude en parallèle, transformation en colonnes
+    (ReceiptTransformer.transform_many) puis écriture groupée
+    (DatabaseClient.complete_receipt_jobs)
+    """
+    db_params = dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    db_client = DatabaseClient(**db_params)
+    prompt_client = PromptClient(**db_params)
+    worker = ReceiptWorker(
+        db_client=db_client,
+        prompt_client=prompt_client,
+        api_key=os.getenv("ANTHROPIC_API_KEY"),
+        worker_id=f"dagster-{context.run_id[:8]}",
+        lease_seconds=config.lease_seconds,
+        retry_delay=config.retry_delay
+    )
+
+    enqueued = db_client.enqueue_pending_messages()
+    jobs = db_client.claim_receipt_jobs(worker.worker_id, config.batch_size, config.lease_seconds)
+    context.log.info(f"📥 {len(jobs)} job(s) réclamé(s) ({enqueued} nouveau(x) message(s) en file)")
+    if not jobs:
+        return MaterializeResult(metadata={"claimed": 0, "done": 0, "failed": 0})
+
+    start = time.perf_counter()
+    prompt = prompt_client.get_prompt()
+    messages = db_client.get_signal_messages([message_id for _, message_id, _ in jobs])
+
+    def extract(job):
+        job_id, message_id, _ = job
+        message = messages.get(message_id)
+        if message is None:
+            raise ValueError(f"Message {message_id} introuvable")
+        return worker.extract(message_id, message, prompt.text)
+
+    # Extractions Claude en parallèle (appels réseau), dans l'ordre des jobs
+    errors = {}
+    extractions = []
+    with ThreadPoolExecutor(max_workers=max(1, config.max_concurrency)) as pool:
+        futures = [(job, pool.submit(extract, job)) for job in jobs]
+        for job, future in futures:
+            try:
+                extractions.append((job, future.result()))
+            except Exception as e:
+                errors[job[0]] = e
+    extraction_seconds = time.perf_counter() - start
+
+    # Transformation et validation du lot
+    batch = ReceiptTransformer.transform_many(
+        [claude_json for _, claude_json in extractions],
+        message_ids=[job[1] for job, _ in extractions],
+        product_dictionary=prompt_client.get_product_dictionary()
+    )
+    matcher = prompt_client.get_category_matcher()
+    completions = []
+    for index, ((job, _), receipt_data) in enumerate(zip(extractions, batch.to_receipt_data())):
+        if receipt_data is None:
+            errors[job[0]] = ValueError(batch.errors[index])
+            continue
+        receipt_data.transaction.prompt_version = prompt.version
+        DataValidator.validate_categories(receipt_data.items, matcher)
+        completions.append((job[0], job[1], receipt_data))
+
+    # Écriture groupée, puis échecs en une requête
+    results = db_client.complete_receipt_jobs(worker.worker_id, completions) if completions else {}
+    errors.update({job_id: result for job_id, result in results.items() if isinstance(result, Exception)})
+    statuses = db_client.fail_receipt_jobs(worker.worker_id, errors, config.retry_delay)
+
+    outcomes = {}
+    for job_id, message_id, attempts in jobs:
+        if job_id in errors:
+            outcomes[str(message_id)] = {
+                "job_id": job_id,
+                "status": statuses.get(job_id, "bail perdu"),
+                "attempt": attempts,
+                "error": str(errors[job_id])[:200]
+            }
+            context.log.warning(f"❌ Message {message_id} : {errors[job_id]}")
+        else:
+            outcomes[str(message_id)] = {"job_id": job_id, "status": "done", "transaction_id": results[job_id]}
+
+    # Mois des tickets écrits réexportés en Parquet pour le dashboard
+    transaction_ids = [result for result in results.values() if not isinstance(result, Exception)]
+    snapshot_months = []
+    if transaction_ids:
+        try:
+            snapshot_months = list(SnapshotExporter(db_client).export_transactions(transaction_ids))
+        except Exception as e:
+            context.log.warning(f"⚠️  Snapshots Parquet non mis à jour : {e}")
+    price_observations = 0
+    if transaction_ids:
+        try:
+            price_observations = db_client.record_price_observations(
+                transaction_ids, product_dictionary=prompt_client.get_product_dictionary()
+            )
+        except Exception as e:
+            context.log.warning(f"⚠️  Observations de prix non enregistrées : {e}")
+
+    done = len(jobs) - len(errors)
+    elapsed = time.perf_counter() - start
+    context.log.info(f"✅ {done}/{len(jobs)} ticket(s) traité(s) en {elapsed:.1f} s")
+
+    return MaterializeResult(metadata={
+        "claimed": len(jobs),
+        "done": done,
+        "failed": len(errors),
+        "extraction_seconds": round(extraction_seconds, 2),
+        "seconds_per_receipt": round(elapsed / len(jobs), 2),
+        "snapshot_months": ", ".join(snapshot_months) or "-",
+        "price_observations": price_observations,
+        "outcomes": MetadataValue.json(outcomes)
+    })
+
+
+# Lancé à la main (Launchpad) pour absorber un afflux de tickets ou reprendre la file
+process_receipt_batch = define_asset_job(
+    name="process_receipt_batch",
+    selection=[receipt_batch],
+)
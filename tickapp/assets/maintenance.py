@@ -0,0 +1,344 @@
+# tickapp/assets/maintenance.py
+"""
+Assets Dagster de maintenance de la base de données
+"""
+from dagster import asset, AssetExecutionContext, Config, MaterializeResult, define_asset_job, ScheduleDefinition
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional
+from dotenv import load_dotenv
+from pydantic import Field
+
+from tickapp.clients.database_client import DatabaseClient
+from tickapp.clients.prompt_client import PromptClient
+from tickapp.assets.message_pipeline import signal_message_partitions
+from tickapp.exports import EXPORT_FORMATS, ExportFilters, export_dataset
+from tickapp.snapshots import SnapshotExporter
+
+load_dotenv()
+
+
+def _db_params() -> dict:
+    return dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+
+
+def _get_db_client() -> DatabaseClient:
+    return DatabaseClient(**_db_params())
+
+
+@asset
+def table_partitions(context: AssetExecutionContext) -> MaterializeResult:
+    """
+    Asset qui crée à l'avance les partitions mensuelles de transaction et
+    signal_message, et range dans leur partition les lignes tombées dans la
+    partition DEFAULT
+    """
+    context.log.info("🗂️  Maintenance des partitions mensuelles...")
+    
+    db_client = _get_db_client()
+    
+    created = db_client.maintain_partitions(months_ahead=int(os.getenv("PARTITION_MONTHS_AHEAD", "3")))
+    
+    if created:
+        context.log.info(f"✅ {len(created)} partition(s) créée(s) : {', '.join(created)}")
+    else:
+        context.log.info("✅ Toutes les partitions existent déjà")
+    
+    return MaterializeResult(metadata={
+        "created_partitions": len(created),
+        "partitions": ", ".join(created) or "-"
+    })
+
+
+class DailySpendingRebuildConfig(Config):
+    """Plage de dates à recalculer (tout l'historique si vide)"""
+    from_date: Optional[str] = Field(default=None, description="Première date incluse (YYYY-MM-DD)")
+    to_date: Optional[str] = Field(default=None, description="Dernière date incluse (YYYY-MM-DD)")
+
+
+@asset
+def daily_spending(context: AssetExecutionContext, config: DailySpendingRebuildConfig) -> MaterializeResult:
+    """
+    Asset qui reconstruit les agrégats quotidiens de daily_spending
+    
+    La table est tenue à jour par trigger à chaque ticket : cet asset ne sert
+    qu'aux reprises d'historique (import en masse, correction manuelle)
+    """
+    period = f"{config.from_date or '…'} → {config.to_date or '…'}"
+    context.log.info(f"📊 Reconstruction des agrégats quotidiens ({period})...")
+    
+    rows = _get_db_client().rebuild_daily_spending(config.from_date, config.to_date)
+    
+    context.log.info(f"✅ {rows} ligne(s) d'agrégats écrite(s)")
+    
+    return MaterializeResult(metadata={
+        "period": period,
+        "aggregate_rows": rows
+    })
+
+
+@asset
+def category_spending(context: AssetExecutionContext, config: DailySpendingRebuildConfig) -> MaterializeResult:
+    """
+    Asset qui reconstruit le cube des dépenses par catégorie
+    (category_spending : jour, mois, année)
+    
+    Le cube est tenu à jour par trigger à chaque ticket : cet asset ne sert
+    qu'aux reprises d'historique et aux renommages de catégories
+    """
+    period = f"{config.from_date or '…'} → {config.to_date or '…'}"
+    context.log.info(f"📊 Reconstruction du cube des catégories ({period})...")
+    
+    rows = _get_db_client().rebuild_category_spending(config.from_date, config.to_date)
+    
+    context.log.info(f"✅ {rows} ligne(s) du cube écrite(s)")
+    
+    return MaterializeResult(metadata={
+        "period": period,
+        "cube_rows": rows
+    })
+
+
+@asset
+def product_dictionary(context: AssetExecutionContext) -> MaterializeResult:
+    """
+    Asset qui réapprend le dictionnaire de produits à partir des articles
+    déjà extraits (nom normalisé + magasin -> catégorie, marque)
+    """
+    context.log.info("📚 Apprentissage du dictionnaire de produits...")
+    
+    entries = _get_db_client().learn_product_dictionary(
+        min_occurrences=int(os.getenv("PRODUCT_DICTIONARY_MIN_OCCURRENCES", "2"))
+    )
+    
+    context.log.info(f"✅ {entries} produit(s) appris")
+    
+    return MaterializeResult(metadata={
+        "learned_entries": entries
+    })
+
+
+@asset(deps=[product_dictionary])
+def product_price_observations(context: AssetExecutionContext) -> MaterializeResult:
+    """
+    Asset qui réécrit toutes les observations de prix (product_price_observation)
+    
+    Chaque ticket enregistre déjà ses prix (price_observations) : cet asset
+    remplit l'historique et rattache les anciens articles aux produits
+    canoniques appris depuis par le dictionnaire
+    """
+    context.log.info("🏷️  Reconstruction des observations de prix...")
+    
+    recorded = _get_db_client().record_price_observations(
+        product_dictionary=PromptClient(**_db_params()).get_product_dictionary()
+    )
+    
+    context.log.info(f"✅ {recorded} observation(s) de prix enregistrée(s)")
+    
+    return MaterializeResult(metadata={
+        "observations": recorded
+    })
+
+
+@asset
+def message_partitions(context: AssetExecutionContext) -> MaterializeResult:
+    """
+    Asset qui déclare une partition signal_message pour chaque message en
+    base encore sans transaction et sans job receipt_job
+    
+    Le sensor ajoute les partitions des nouveaux messages ; celui-ci rattrape
+    les messages antérieurs non traités, qui peuvent ensuite être traités par
+    backfill. Un message déjà lié à une transaction n'est pas redéclaré : le
+    retraiter créerait un second ticket. Un message en file receipt_job reste
+    aux workers.
+    """
+    context.log.info("🗂️  Déclaration des partitions de messages...")
+    
+    existing = set(context.instance.get_dynamic_partitions(signal_message_partitions.name))
+    missing = [
+        str(message_id) for message_id in _get_db_client().assign_partition_messages()
+        if str(message_id) not in existing
+    ]
+    if missing:
+        context.instance.add_dynamic_partitions(signal_message_partitions.name, missing)
+    
+    context.log.info(f"✅ {len(missing)} partition(s) ajoutée(s), {len(existing)} existante(s)")
+    
+    return MaterializeResult(metadata={
+        "added_partitions": len(missing),
+        "total_partitions": len(existing) + len(missing)
+    })
+
+
+@asset
+def receipt_snapshots(context: AssetExecutionContext) -> MaterializeResult:
+    """
+    Asset qui réécrit tous les mois des snapshots Parquet du dashboard
+    
+    Chaque ticket réécrit déjà son mois (receipt_snapshot) : cet asset
+    rattrape les corrections et suppressions faites directement en base
+    """
+    exporter = SnapshotExporter(_get_db_client())
+    context.log.info(f"🗃️  Reconstruction des snapshots Parquet dans {exporter.root}...")
+    
+    exported = exporter.export_all()
+    transactions = sum(rows["transactions"] for rows in exported.values())
+    items = sum(rows["items"] for rows in exported.values())
+    
+    context.log.info(f"✅ {len(exported)} mois : {transactions} transaction(s), {items} article(s)")
+    
+    return MaterializeResult(metadata={
+        "months": len(exported),
+        "transactions": transactions,
+        "items": items,
+        "snapshot_dir": str(exporter.root)
+    })
+
+
+class DataExportConfig(Config):
+    """Format, filtres et mode de l'export"""
+    export_format: str = Field(default="parquet", description="parquet, csv ou arrow (Arrow IPC)")
+    incremental: bool = Field(default=True, description="Seulement les transactions depuis l'export précédent")
+    from_date: Optional[str] = Field(default=None, description="Première date incluse (YYYY-MM-DD)")
+    to_date: Optional[str] = Field(default=None, description="Dernière date incluse (YYYY-MM-DD)")
+    stores: List[str] = Field(default=[], description="Magasins (tous si vide)")
+    groups: List[str] = Field(default=[], description="Catégories de transaction (toutes si vide)")
+    categories: List[str] = Field(default=[], description="Catégories principales d'articles (toutes si vide)")
+    batch_size: int = Field(default=10000, description="Lignes lues et écrites par lot")
+
+
+@asset
+def data_export(context: AssetExecutionContext, config: DataExportConfig) -> MaterializeResult:
+    """
+    Asset qui exporte les transactions et les articles dans EXPORT_DIR
+    (un fichier par dataset et par run), pour les tableurs et notebooks
+    
+    En mode incrémental, le watermark (dernier transaction_id exporté) est
+    repris de la matérialisation précédente de l'asset, si elle avait les
+    mêmes filtres ; sinon l'export est complet. L'export s'arrête à l'horizon
+    des transactions validées : un ticket d'ID plus petit encore en cours
+    d'insertion n'est pas sauté.
+    """
+    filters = ExportFilters(
+        from_date=date.fromisoformat(config.from_date) if config.from_date else None,
+        to_date=date.fromisoformat(config.to_date) if config.to_date else None,
+        stores=config.stores,
+        groups=config.groups,
+        categories=config.categories,
+    )
+    scope = filters.scope()
+    
+    since = None
+    if config.incremental:
+        event = context.instance.get_latest_materialization_event(context.asset_key)
+        previous_metadata = event.asset_materialization.metadata if event else {}
+        previous = previous_metadata.get("watermark")
+        previous_scope = previous_metadata.get("filters")
+        if previous and previous_scope and previous_scope.value == scope:
+            since = previous.value
+        elif previous:
+            context.log.info("🔁 Filtres différents de l'export précédent : export complet")
+    
+    db_client = _get_db_client()
+    filters.since_transaction_id = since
+    filters.until_transaction_id = db_client.get_committed_transaction_horizon()
+    export_dir = Path(os.getenv("EXPORT_DIR", Path(__file__).parent.parent.parent / "data" / "exports"))
+    suffix = EXPORT_FORMATS.get(config.export_format, "")
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    context.log.info(
+        f"📤 Export {config.export_format} des transaction_id {since or '-'} → "
+        f"{filters.until_transaction_id or '-'}..."
+    )
+    
+    metadata = {"filters": scope}
+    if since is not None:
+        metadata["since"] = since
+    watermark = since
+    for dataset in ("transactions", "items"):
+        result = export_dataset(
+            db_client, dataset, export_dir / f"{dataset}_{stamp}{suffix}",
+            export_format=config.export_format, filters=filters, batch_size=config.batch_size
+        )
+        context.log.info(f"✅ {dataset} : {result.rows} ligne(s) → {result.path}")
+        metadata[f"{dataset}_rows"] = result.rows
+        metadata[f"{dataset}_path"] = str(result.path)
+        if result.watermark is not None:
+            watermark = max(watermark or 0, result.watermark)
+    
+    # Watermark inchangé si rien de nouveau (reprise au même point)
+    if watermark is not None:
+        metadata["watermark"] = watermark
+    return MaterializeResult(metadata=metadata)
+
+
+partition_maintenance = define_asset_job(
+    name="partition_maintenance",
+    selection=[table_partitions],
+)
+
+# Tous les jours à 3h : les partitions du mois suivant existent toujours à l'avance
+partition_maintenance_schedule = ScheduleDefinition(
+    name="partition_maintenance_schedule",
+    job=partition_maintenance,
+    cron_schedule="0 3 * * *",
+)
+
+# Lancé à la main (Launchpad) avec la plage à recalculer
+rebuild_daily_spending = define_asset_job(
+    name="rebuild_daily_spending",
+    selection=[daily_spending],
+)
+
+rebuild_category_spending = define_asset_job(
+    name="rebuild_category_spending",
+    selection=[category_spending],
+)
+
+# Lancé à la main avant un backfill du pipeline par message
+register_message_partitions = define_asset_job(
+    name="register_message_partitions",
+    selection=[message_partitions],
+)
+
+product_dictionary_job = define_asset_job(
+    name="product_dictionary_job",
+    selection=[product_dictionary],
+)
+
+# Toutes les nuits, après la maintenance des partitions
+product_dictionary_schedule = ScheduleDefinition(
+    name="product_dictionary_schedule",
+    job=product_dictionary_job,
+    cron_schedule="30 3 * * *",
+)
+
+# Lancé à la main (Launchpad) : remplissage de l'historique, nouveau dictionnaire
+rebuild_price_observations = define_asset_job(
+    name="rebuild_price_observations",
+    selection=[product_price_observations],
+)
+
+rebuild_snapshots = define_asset_job(
+    name="rebuild_snapshots",
+    selection=[receipt_snapshots],
+)
+
+# Toutes les nuits, après l'apprentissage du dictionnaire de produits
+rebuild_snapshots_schedule = ScheduleDefinition(
+    name="rebuild_snapshots_schedule",
+    job=rebuild_snapshots,
+    cron_schedule="0 4 * * *",
+)
+
+# Lancé à la main (Launchpad) avec le format et les filtres de l'export
+export_data = define_asset_job(
+    name="export_data",
+    selection=[data_export],
+)
@@ -3,21 +3,19 @@
 Assets Dagster pour traiter un seul message Signal (pipeline par message)
 Utilise la nouvelle API @asset au lieu de @op
 """
-from dagster import asset, AssetExecutionContext, Config, define_asset_job
-from typing import Optional, Dict
-from datetime import datetime
+from dagster import asset, AssetExecutionContext, DynamicPartitionsDefinition, MaterializeResult, Output, define_asset_job
+from typing import Dict
 import os
 from dotenv import load_dotenv
-from pydantic import Field
 
-from tickapp.clients.signal_client import SignalClient, Message, Attachment, Contact, Group
-from pathlib import Path
-import json
+from tickapp.clients.signal_client import SignalClient, Message
 from tickapp.clients.database_client import DatabaseClient
 from tickapp.clients.claude_client import ClaudeClient
 from tickapp.clients.prompt_client import PromptClient
 from tickapp.transformers.receipt_transformer import ReceiptTransformer
+from tickapp.transformers.validators import DataValidator
 from tickapp.models import ReceiptData
+from tickapp.snapshots import SnapshotExporter
 
 load_dotenv()
 
@@ -26,133 +24,45 @@ load_dotenv()
 # ASSETS
 # ============================================================================
 
-class MessageConfig(Config):
-    """Configuration pour un message Signal"""
-    message_timestamp: str = Field(description="Timestamp ISO du message")
-    sender_uuid: Optional[str] = Field(default=None, description="UUID du sender")
-    sender_number: Optional[str] = Field(default=None, description="Numéro de téléphone du sender")
+# Une partition par message Signal, clé = signal_message.message_id
+# (ajoutées par le sensor et par l'asset de maintenance message_partitions)
+signal_message_partitions = DynamicPartitionsDefinition(name="signal_message")
 
 
-@asset
+def _get_message_id(context: AssetExecutionContext) -> int:
+    """ID du message à traiter (clé de partition du run)"""
+    return int(context.partition_key)
+
+
+@asset(
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
+)
 def message_from_signal(context: AssetExecutionContext) -> Message:
     """
-    Asset pour récupérer un message Signal spécifique depuis Signal
+    Asset pour récupérer le message Signal à traiter
     
-    Utilise les tags du run pour identifier le message à traiter
+    Le sensor a déjà inséré le message en base : il est relu par son ID
+    (clé de partition)
     """
-    # Récupérer la config depuis les run tags (passés par le sensor)
-    tags = {}
-    if hasattr(context, 'run') and context.run:
-        tags = context.run.tags
-    elif hasattr(context, 'dagster_run') and context.dagster_run:
-        tags = context.dagster_run.tags
-    
-    # Essayer aussi depuis op_execution_context si disponible
-    if not tags and hasattr(context, 'op_execution_context') and context.op_execution_context:
-        op_config = context.op_execution_context.op_config or {}
-        if op_config:
-            tags = {
-                "message_timestamp": op_config.get("message_timestamp", ""),
-                "sender_uuid": op_config.get("sender_uuid"),
-                "sender_number": op_config.get("sender_number")
-            }
-    
-    # Extraire les valeurs depuis les tags
-    config = {
-        "message_timestamp": tags.get("message_timestamp", ""),
-        "sender_uuid": tags.get("sender_uuid"),
-        "sender_number": tags.get("sender_number")
-    }
+    message_id = _get_message_id(context)
+    context.log.info(f"📱 Lecture du message Signal {message_id}...")
     
-    message_timestamp = config.get("message_timestamp", "")
-    sender_uuid = config.get("sender_uuid")
-    sender_number = config.get("sender_number")
-    
-    # Valider que message_timestamp n'est pas vide
-    if not message_timestamp:
-        raise ValueError(
-            "message_timestamp manquant dans les tags du run. "
-            "Assurez-vous que le sensor passe 'message_timestamp' dans les tags."
-        )
-    
-    # Reconstruire le message depuis les tags (méthode simplifiée)
-    context.log.info(f"📱 Reconstruction du message Signal depuis les tags (timestamp: {message_timestamp})...")
-    
-    # Parser le timestamp
-    try:
-        if 'Z' in message_timestamp or '+' in message_timestamp:
-            target_timestamp = datetime.fromisoformat(message_timestamp.replace('Z', '+00:00'))
-        else:
-            target_timestamp = datetime.fromisoformat(message_timestamp)
-    except ValueError as e:
-        try:
-            target_timestamp = datetime.fromisoformat(message_timestamp.replace('Z', ''))
-        except ValueError:
-            raise ValueError(
-                f"Impossible de parser le timestamp '{message_timestamp}': {e}. "
-                f"Format attendu: ISO 8601"
-            )
-    
-    # Normaliser pour comparaison (enlever timezone si présent)
-    if target_timestamp.tzinfo:
-        target_timestamp = target_timestamp.replace(tzinfo=None)
-    
-    # Reconstruire les attachments depuis les tags
-    attachment_paths_json = tags.get("attachment_paths", "[]")
-    try:
-        attachment_paths = json.loads(attachment_paths_json)
-    except json.JSONDecodeError:
-        attachment_paths = []
-    
-    attachments = []
-    for att_data in attachment_paths:
-        if Path(att_data.get("path", "")).exists():
-            attachments.append(Attachment(
-                id=att_data.get("id", ""),
-                content_type=att_data.get("content_type", ""),
-                filename=att_data.get("filename", ""),
-                size=0,
-                upload_timestamp_ms=0,
-                path=Path(att_data.get("path", ""))
-            ))
-    
-    if not attachments:
-        raise ValueError("Aucun attachment trouvé dans les tags. Le message doit avoir des images.")
-    
-    # Reconstruire le contact
-    sender_name = tags.get("sender_name", "")
-    contact = Contact(
-        number=sender_number or "",
-        name=sender_name if sender_name else None,
-        uuid=sender_uuid if sender_uuid else None
-    )
-    
-    # Reconstruire le groupe si disponible
-    group = None
-    group_id = tags.get("group_id", "")
-    group_name = tags.get("group_name", "")
-    if group_id:
-        group = Group(id=group_id, name=group_name)
-    
-    # Reconstruire le message
-    message_text = tags.get("message_text", "")
-    is_group_message = tags.get("is_group_message", "False").lower() == "true"
-    
-    message = Message(
-        sender=contact,
-        timestamp=target_timestamp,
-        text=message_text if message_text else None,
-        attachments=attachments,
-        group=group,
-        is_group_message=is_group_message,
-        account=None
+    db_client = DatabaseClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
     )
     
-    context.log.info(f"✅ Message reconstruit depuis tags avec {len(attachments)} attachment(s)")
+    message = db_client.get_signal_message(message_id)
+    if message is None:
+        raise ValueError(f"Message {message_id} introuvable")
     
     # Vérifier qu'il y a des images
     has_images = any(
-        att.content_type and att.content_type.startswith("image/") 
+        att.path and att.content_type and att.content_type.startswith("image/")
         for att in message.attachments
     )
     
@@ -164,11 +74,13 @@ def message_from_signal(context: AssetExecutionContext) -> Message:
 
 
 @asset(
-    deps=[message_from_signal]
+    deps=[message_from_signal],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
 )
 def message_in_db(context: AssetExecutionContext, message_from_signal: Message) -> Dict:
     """
-    Asset pour insérer un message Signal dans la base de données
+    Asset avec les identifiants en base du message Signal (inséré par le sensor)
     
     Args:
         message_from_signal: Message Signal récupéré (depuis l'asset message_from_signal)
@@ -176,8 +88,6 @@ def message_in_db(context: AssetExecutionContext, message_from_signal: Message)
     Returns:
         Dictionnaire avec message_id et attachment_ids
     """
-    context.log.info("💾 Insertion du message Signal en base de données...")
-    
     db_client = DatabaseClient(
         host=os.getenv("DB_HOST", "localhost"),
         port=int(os.getenv("DB_PORT", "5434")),
@@ -186,36 +96,35 @@ def message_in_db(context: AssetExecutionContext, message_from_signal: Message)
         password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
     )
     
-    try:
-        message_id, attachment_ids = db_client.insert_signal_message(message_from_signal)
-        context.log.info(f"✅ Message {message_id} inséré avec {len(attachment_ids)} attachments")
-        return {
-            "message_id": message_id,
-            "attachment_ids": attachment_ids
-        }
-    except Exception as e:
-        context.log.error(f"❌ Erreur lors de l'insertion: {e}")
-        raise
+    message_id = _get_message_id(context)
+    attachment_ids = db_client.get_attachment_ids(message_id)
+    context.log.info(f"✅ Message {message_id} en base avec {len(attachment_ids)} attachments")
+    return {
+        "message_id": message_id,
+        "attachment_ids": attachment_ids
+    }
 
 
 @asset(
-    deps=[message_from_signal]
+    deps=[message_from_signal],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager",
+    output_required=False
 )
-def claude_extraction(context: AssetExecutionContext, message_from_signal: Message) -> Dict:
+def claude_extraction(context: AssetExecutionContext, message_from_signal: Message):
     """
     Asset pour extraire les données du ticket avec Claude API
     
+    Un message déjà lié à une transaction n'est pas renvoyé à Claude : aucune
+    sortie n'est produite et les assets aval du run sont sautés.
+    
     Args:
         message_from_signal: Message Signal avec attachments (depuis l'asset message_from_signal)
     
     Returns:
         Dictionnaire avec l'extraction JSON de Claude
     """
-    context.log.info("🤖 Extraction des données avec Claude API...")
-    
-    claude_client = ClaudeClient(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    
-    prompt_client = PromptClient(
+    db_params = dict(
         host=os.getenv("DB_HOST", "localhost"),
         port=int(os.getenv("DB_PORT", "5434")),
         database=os.getenv("DB_NAME", "receipt_processing"),
@@ -223,42 +132,125 @@ def claude_extraction(context: AssetExecutionContext, message_from_signal: Messa
         password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
     )
     
-    # Générer le prompt dynamique
-    prompt = prompt_client.generate_prompt()
-    context.log.info("📝 Prompt généré avec les catégories de la base")
+    message_id = _get_message_id(context)
+    existing = DatabaseClient(**db_params).get_message_transaction(message_id)
+    if existing is not None:
+        context.log.info(
+            f"⏭️  Message {message_id} déjà traité (transaction {existing['transaction_id']}), "
+            f"extraction ignorée"
+        )
+        return
+    
+    context.log.info("🤖 Extraction des données avec Claude API...")
+    
+    claude_client = ClaudeClient(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    
+    prompt_client = PromptClient(**db_params)
+    
+    # Générer le prompt dynamique (en cache tant que les catégories n'ont pas changé)
+    prompt = prompt_client.get_prompt()
+    context.log.info(f"📝 Prompt {prompt.version} (catégories v{prompt.catalog_version})")
     
     # Ajouter le prompt
-    claude_client.add_prompt(prompt)
+    claude_client.add_prompt(prompt.text)
     
     # Ajouter les images
-    for attachment in message_from_signal.attachments:
-        if attachment.path and attachment.content_type and attachment.content_type.startswith("image/"):
-            claude_client.add_image(str(attachment.path))
+    image_paths = [
+        str(attachment.path)
+        for attachment in message_from_signal.attachments
+        if attachment.path and attachment.content_type and attachment.content_type.startswith("image/")
+    ]
+    for image_path in image_paths:
+        claude_client.add_image(image_path)
     
     # Appeler Claude
     json_response = claude_client.call_json()
     
     context.log.info("✅ Extraction Claude réussie")
     
+    # Seuls les chemins des images sont transmis, pas tout le Message
+    yield Output({
+        "image_paths": image_paths,
+        "extraction": json_response,
+        "prompt_version": prompt.version
+    })
+
+
+@asset(
+    deps=[claude_extraction],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
+)
+def verified_extraction(context: AssetExecutionContext, claude_extraction: Dict) -> Dict:
+    """
+    Asset pour contrôler la cohérence de l'extraction (somme des articles,
+    quantité × prix unitaire, date, devise)
+    
+    Seule une extraction incohérente est renvoyée à Claude, avec un prompt
+    ciblé sur les problèmes relevés ; la plus cohérente des deux est gardée.
+    
+    Args:
+        claude_extraction: Extraction JSON de Claude (depuis l'asset claude_extraction)
+    
+    Returns:
+        claude_extraction complété par le rapport de cohérence
+    """
+    context.log.info("🔍 Contrôle de cohérence de l'extraction...")
+    
+    extraction = claude_extraction["extraction"]
+    report = DataValidator.check_extraction(extraction)
+    
+    if report["passed"]:
+        context.log.info("✅ Extraction cohérente")
+        return {**claude_extraction, "consistency": report, "reextracted": False}
+    
+    for issue in report["issues"]:
+        context.log.warning(f"⚠️  {issue}")
+    context.log.info("🤖 Ré-extraction ciblée avec Claude API...")
+    
+    claude_client = ClaudeClient(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    claude_client.add_prompt(PromptClient.generate_verification_prompt(extraction, report["issues"]))
+    for image_path in claude_extraction["image_paths"]:
+        claude_client.add_image(image_path)
+    
+    try:
+        retry_extraction = claude_client.call_json()
+    except Exception as e:
+        context.log.warning(f"⚠️  Ré-extraction impossible, extraction initiale conservée: {e}")
+        return {**claude_extraction, "consistency": report, "reextracted": False}
+    
+    retry_report = DataValidator.check_extraction(retry_extraction)
+    if retry_report["score"] <= report["score"]:
+        context.log.warning(
+            f"⚠️  Ré-extraction pas meilleure (score {retry_report['score']:.2f} "
+            f"vs {report['score']:.2f}), extraction initiale conservée"
+        )
+        return {**claude_extraction, "consistency": report, "reextracted": False}
+    
+    context.log.info(f"✅ Ré-extraction retenue (score {report['score']:.2f} -> {retry_report['score']:.2f})")
     return {
-        "message": message_from_signal,
-        "extraction": json_response
+        **claude_extraction,
+        "extraction": retry_extraction,
+        "consistency": retry_report,
+        "reextracted": True
     }
 
 
 @asset(
-    deps=[claude_extraction, message_in_db]
+    deps=[verified_extraction, message_in_db],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
 )
 def transformed_receipt(
     context: AssetExecutionContext,
-    claude_extraction: Dict,
+    verified_extraction: Dict,
     message_in_db: Dict
 ) -> ReceiptData:
     """
     Asset pour transformer l'extraction Claude en ReceiptData
     
     Args:
-        claude_extraction: Extraction JSON de Claude (depuis l'asset claude_extraction)
+        verified_extraction: Extraction JSON contrôlée (depuis l'asset verified_extraction)
         message_in_db: Informations du message en base (depuis l'asset message_in_db)
     
     Returns:
@@ -266,13 +258,27 @@ def transformed_receipt(
     """
     context.log.info("🔄 Transformation de l'extraction Claude...")
     
-    claude_json = claude_extraction["extraction"]
+    claude_json = verified_extraction["extraction"]
     message_id = message_in_db.get("message_id")
     
+    prompt_client = PromptClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    product_dictionary = prompt_client.get_product_dictionary()
+    
     receipt_data = ReceiptTransformer.transform_claude_json(
         claude_json=claude_json,
-        message_id=message_id
+        message_id=message_id,
+        product_dictionary=product_dictionary
     )
+    receipt_data.transaction.prompt_version = verified_extraction.get("prompt_version")
+    
+    known = len(receipt_data.items) - len(product_dictionary.unknown_items(receipt_data.items, receipt_data.store.store_name))
+    context.log.info(f"📚 {known}/{len(receipt_data.items)} articles reconnus par le dictionnaire de produits")
     
     context.log.info(
         f"✅ Transformé: {receipt_data.store.store_name} - "
@@ -283,18 +289,72 @@ def transformed_receipt(
 
 
 @asset(
-    deps=[transformed_receipt, message_in_db]
+    deps=[transformed_receipt],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
+)
+def validated_receipt(
+    context: AssetExecutionContext,
+    transformed_receipt: ReceiptData
+) -> ReceiptData:
+    """
+    Asset pour rapprocher les catégories des articles du référentiel actif
+    
+    Les catégories inconnues ne sont pas créées : l'article passe dans la
+    catégorie de repli et garde la catégorie proposée pour revue (v_category_review)
+    
+    Args:
+        transformed_receipt: ReceiptData transformé (depuis l'asset transformed_receipt)
+    
+    Returns:
+        ReceiptData avec des catégories existantes uniquement
+    """
+    context.log.info("🏷️  Validation des catégories des articles...")
+    
+    prompt_client = PromptClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    
+    flagged = DataValidator.validate_categories(
+        transformed_receipt.items,
+        prompt_client.get_category_matcher()
+    )
+    
+    for item in flagged:
+        context.log.warning(
+            f"⚠️  Catégorie inconnue à revoir: {item.proposed_category_main} / "
+            f"{item.proposed_category_sub} ({item.product_name})"
+        )
+    context.log.info(
+        f"✅ {len(transformed_receipt.items) - len(flagged)}/{len(transformed_receipt.items)} "
+        f"articles rapprochés d'une catégorie existante"
+    )
+    
+    return transformed_receipt
+
+
+@asset(
+    deps=[validated_receipt, message_in_db],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
 )
 def receipt_in_db(
     context: AssetExecutionContext,
-    transformed_receipt: ReceiptData,
+    validated_receipt: ReceiptData,
     message_in_db: Dict
 ) -> Dict:
     """
     Asset pour insérer le ticket dans la base de données
     
+    Si le message a déjà sa transaction (run relancé, runs concurrents), elle
+    est renvoyée sans insérer de doublon.
+    
     Args:
-        transformed_receipt: ReceiptData transformé (depuis l'asset transformed_receipt)
+        validated_receipt: ReceiptData validé (depuis l'asset validated_receipt)
         message_in_db: Informations du message en base (depuis l'asset message_in_db)
     
     Returns:
@@ -313,28 +373,106 @@ def receipt_in_db(
     message_id = message_in_db.get("message_id")
     attachment_ids = message_in_db.get("attachment_ids")
     
+    existing = db_client.get_message_transaction(message_id)
+    if existing is not None:
+        context.log.info(
+            f"⏭️  Transaction {existing['transaction_id']} déjà insérée pour le message {message_id}"
+        )
+        return existing
+    
     transaction_id = db_client.insert_receipt(
-        receipt_data=transformed_receipt,
+        receipt_data=validated_receipt,
         message_id=message_id,
         attachment_ids=attachment_ids
     )
     
     context.log.info(
         f"✅ Transaction {transaction_id} insérée: "
-        f"{transformed_receipt.store.store_name} - {len(transformed_receipt.items)} articles"
+        f"{validated_receipt.store.store_name} - {len(validated_receipt.items)} articles"
     )
     
     return {
         "transaction_id": transaction_id,
-        "store_name": transformed_receipt.store.store_name,
-        "total": transformed_receipt.transaction.total
+        "store_name": validated_receipt.store.store_name,
+        "total": validated_receipt.transaction.total
     }
 
 
-@asset(deps=[receipt_in_db])
+@asset(
+    deps=[receipt_in_db],
+    partitions_def=signal_message_partitions
+)
+def receipt_snapshot(context: AssetExecutionContext, receipt_in_db: Dict) -> MaterializeResult:
+    """
+    Asset qui réécrit le mois du ticket dans les snapshots Parquet du
+    dashboard (transactions et articles, voir tickapp.snapshots)
+    """
+    transaction_id = receipt_in_db.get("transaction_id")
+    context.log.info(f"🗃️  Snapshot Parquet du mois de la transaction {transaction_id}...")
+    
+    db_client = DatabaseClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    
+    exporter = SnapshotExporter(db_client)
+    exported = exporter.export_transactions([transaction_id])
+    
+    for month, rows in exported.items():
+        context.log.info(f"✅ {month} : {rows['transactions']} transaction(s), {rows['items']} article(s)")
+    
+    return MaterializeResult(metadata={
+        "transaction_id": transaction_id,
+        "months": ", ".join(exported) or "-",
+        "snapshot_dir": str(exporter.root)
+    })
+
+
+@asset(
+    deps=[receipt_in_db],
+    partitions_def=signal_message_partitions
+)
+def price_observations(context: AssetExecutionContext, receipt_in_db: Dict) -> MaterializeResult:
+    """
+    Asset qui enregistre les prix des articles du ticket
+    (product_price_observation) pour le suivi des prix par produit et magasin
+    """
+    transaction_id = receipt_in_db.get("transaction_id")
+    context.log.info(f"🏷️  Observations de prix de la transaction {transaction_id}...")
+    
+    db_params = dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    
+    recorded = DatabaseClient(**db_params).record_price_observations(
+        [transaction_id],
+        product_dictionary=PromptClient(**db_params).get_product_dictionary()
+    )
+    
+    context.log.info(f"✅ {recorded} observation(s) de prix enregistrée(s)")
+    
+    return MaterializeResult(metadata={
+        "transaction_id": transaction_id,
+        "observations": recorded
+    })
+
+
+@asset(
+    deps=[receipt_in_db, message_from_signal],
+    partitions_def=signal_message_partitions,
+    io_manager_key="message_io_manager"
+)
 def notify_signal_success(
     context: AssetExecutionContext,
-    receipt_in_db: Dict
+    receipt_in_db: Dict,
+    message_from_signal: Message
 ) -> None:
     """
     Asset final qui envoie une notification Signal de succès à l'utilisateur.
@@ -347,16 +485,14 @@ def notify_signal_success(
 
     client = SignalClient(phone_number=phone_number)
 
-    # Récupérer les tags du run pour trouver le groupe et le sender
-    tags = {}
-    if hasattr(context, "run") and context.run:
-        tags = context.run.tags or {}
-
-    sender_name = tags.get("sender_name", "").strip()
-    sender_number = tags.get("sender_number", "").strip()
-    sender_uuid = tags.get("sender_uuid", "").strip()
-    group_id = tags.get("group_id", "") or os.getenv("SIGNAL_GROUP_ID", "")
-    group_name = tags.get("group_name", "")
+    # Le groupe et le sender viennent du message en base
+    sender = message_from_signal.sender
+    group = message_from_signal.group
+    sender_name = (sender.name or "").strip()
+    sender_number = (sender.number or "").strip()
+    sender_uuid = (sender.uuid or "").strip()
+    group_id = (group.id if group else "") or os.getenv("SIGNAL_GROUP_ID", "")
+    group_name = group.name if group else ""
 
     # Construire la mention
     mention = None
@@ -383,7 +519,7 @@ def notify_signal_success(
 
     if not group_id:
         context.log.warning(
-            "⚠️  Aucun group_id trouvé dans les tags ni dans SIGNAL_GROUP_ID, "
+            "⚠️  Aucun group_id trouvé dans le message ni dans SIGNAL_GROUP_ID, "
             "notification Signal non envoyée."
         )
         return
@@ -398,12 +534,19 @@ def notify_signal_success(
 # Job pour orchestrer tous les assets
 process_signal_message = define_asset_job(
     name="process_signal_message",
+    partitions_def=signal_message_partitions,
+    # Limite de runs simultanés (run_queue.tag_concurrency_limits de dagster.yaml)
+    tags={"tickapp/pipeline": "signal_message"},
     selection=[
         message_from_signal,
         message_in_db,
         claude_extraction,
+        verified_extraction,
         transformed_receipt,
+        validated_receipt,
         receipt_in_db,
+        receipt_snapshot,
+        price_observations,
         notify_signal_success,
     ],
 )
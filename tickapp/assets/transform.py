@@ -28,40 +28,31 @@ def transformed_receipts(
     """
     context.log.info("🔄 Transformation des extractions Claude en objets Python...")
     
+    # Transformer tout le lot en une fois (erreurs capturées par ticket)
+    batch = ReceiptTransformer.transform_many(
+        [extraction_data["extraction"] for extraction_data in claude_extractions_from_messages],
+        message_ids=[extraction_data.get("message_id") for extraction_data in claude_extractions_from_messages]
+    )
+    
     transformed = []
     
-    for extraction_data in claude_extractions_from_messages:
-        try:
-            claude_json = extraction_data["extraction"]
-            message = extraction_data.get("message")
-            
-            # Récupérer le message_id si disponible (depuis la base)
-            message_id = extraction_data.get("message_id")
-            if message_id is None and message:
-                # On pourrait récupérer le message_id depuis la base si nécessaire
-                message_id = None
-            
-            # Transformer le JSON Claude en ReceiptData
-            receipt_data = ReceiptTransformer.transform_claude_json(
-                claude_json=claude_json,
-                message_id=message_id
-            )
-            
-            transformed.append({
-                "receipt_data": receipt_data,
-                "message": message,
-                "message_id": message_id,
-                "claude_json": claude_json
-            })
-            
-            context.log.info(
-                f"   ✅ Transformé: {receipt_data.store.store_name} - "
-                f"{len(receipt_data.items)} articles"
-            )
-            
-        except Exception as e:
-            context.log.error(f"   ❌ Erreur lors de la transformation: {e}")
+    for index, receipt_data in enumerate(batch.to_receipt_data()):
+        extraction_data = claude_extractions_from_messages[index]
+        if receipt_data is None:
+            context.log.error(f"   ❌ Erreur lors de la transformation: {batch.errors[index]}")
             continue
+        
+        transformed.append({
+            "receipt_data": receipt_data,
+            "message": extraction_data.get("message"),
+            "message_id": extraction_data.get("message_id"),
+            "claude_json": extraction_data["extraction"]
+        })
+        
+        context.log.info(
+            f"   ✅ Transformé: {receipt_data.store.store_name} - "
+            f"{len(receipt_data.items)} articles"
+        )
     
     context.log.info(f"✅ {len(transformed)}/{len(claude_extractions_from_messages)} transformations réussies")
     
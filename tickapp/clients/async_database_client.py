@@ -0,0 +1,329 @@
+# tickapp/clients/async_database_client.py
+"""
+Client PostgreSQL asynchrone (psycopg3) pour le chemin d'ingestion
+
+Mêmes sémantiques que DatabaseClient.insert_signal_message / insert_receipt,
+mais chaque écriture est une seule requête préparée côté serveur (CTE + unnest
+des listes d'attachments/items), envoyée en pipeline avec BEGIN/COMMIT :
+un ticket complet part en un seul flush réseau, et la boucle asyncio reste
+libre pour les appels Claude pendant ce temps.
+"""
+import asyncio
+from typing import List, Optional
+
+import psycopg
+
+from ..models import ReceiptData
+from ..clients.signal_client import Message
+
+
+INSERT_SIGNAL_MESSAGE_SQL = """
+    WITH sender AS (
+        INSERT INTO signal_sender (signal_uuid, phone_number, contact_name, last_seen)
+        SELECT %(sender_uuid)s::uuid, %(sender_number)s::varchar, %(sender_name)s::varchar, CURRENT_TIMESTAMP
+        WHERE %(sender_uuid)s::uuid IS NOT NULL
+        ON CONFLICT (signal_uuid)
+        DO UPDATE SET
+            phone_number = COALESCE(EXCLUDED.phone_number, signal_sender.phone_number),
+            contact_name = COALESCE(EXCLUDED.contact_name, signal_sender.contact_name),
+            last_seen = CURRENT_TIMESTAMP
+        RETURNING sender_id
+    ),
+    grp AS (
+        INSERT INTO signal_group (signal_group_id, group_name)
+        SELECT %(group_id)s::varchar, %(group_name)s::varchar
+        WHERE %(group_id)s::varchar IS NOT NULL
+        ON CONFLICT (signal_group_id)
+        DO UPDATE SET group_name = EXCLUDED.group_name
+        RETURNING group_id
+    ),
+    msg AS (
+        INSERT INTO signal_message (
+            sender_id, group_id, timestamp, text_content,
+            is_group_message, signal_account
+        )
+        VALUES (
+            (SELECT sender_id FROM sender), (SELECT group_id FROM grp),
+            %(timestamp)s::timestamp, %(text)s::text, %(is_group_message)s::boolean, %(account)s::varchar
+        )
+        RETURNING message_id
+    ),
+    att AS (
+        INSERT INTO attachment (
+            message_id, signal_attachment_id, content_type,
+            filename, file_size, upload_timestamp_ms, file_path
+        )
+        SELECT (SELECT message_id FROM msg), a.signal_attachment_id, a.content_type, a.filename, a.file_size, a.upload_timestamp_ms, a.file_path
+        FROM unnest(
+            %(att_ids)s::varchar[], %(att_content_types)s::varchar[], %(att_filenames)s::varchar[],
+            %(att_sizes)s::integer[], %(att_upload_ts)s::bigint[], %(att_paths)s::text[]
+        ) WITH ORDINALITY AS a(signal_attachment_id, content_type, filename, file_size, upload_timestamp_ms, file_path, ord)
+        ORDER BY a.ord
+        RETURNING attachment_id
+    )
+    SELECT (SELECT message_id FROM msg),
+           COALESCE((SELECT array_agg(attachment_id ORDER BY attachment_id) FROM att), '{}')
+"""
+
+INSERT_RECEIPT_SQL = """
+    WITH st AS (
+        INSERT INTO store (store_name, address, postal_code, city, country_code, phone)
+        VALUES (%(store_name)s::varchar, %(address)s::varchar, %(postal_code)s::varchar,
+                %(city)s::varchar, %(country_code)s::char(2), %(phone)s::varchar)
+        ON CONFLICT (store_name, city, postal_code)
+        DO UPDATE SET
+            address = COALESCE(EXCLUDED.address, store.address),
+            phone = COALESCE(EXCLUDED.phone, store.phone),
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING store_id
+    ),
+    new_tc AS (
+        INSERT INTO transaction_category (name)
+        SELECT %(tc_name)s::varchar
+        WHERE %(tc_name)s::varchar IS NOT NULL
+        ON CONFLICT (name) DO NOTHING
+        RETURNING category_id
+    ),
+    tc AS (
+        SELECT category_id FROM new_tc
+        UNION ALL
+        SELECT category_id FROM transaction_category WHERE name = %(tc_name)s::varchar
+        LIMIT 1
+    ),
+    tr AS (
+        INSERT INTO transaction (
+            message_id, store_id, transaction_category_id, receipt_number,
+            transaction_date, transaction_time, currency, total,
+            payment_method, source, prompt_version, processed_at
+        )
+        SELECT %(message_id)s::integer, st.store_id,
+               CASE WHEN %(tc_name)s::varchar IS NOT NULL THEN (SELECT category_id FROM tc)
+                    ELSE %(tc_id)s::integer END,
+               %(receipt_number)s::varchar, %(transaction_date)s::date, %(transaction_time)s::time,
+               %(currency)s::char(3), %(total)s::numeric, %(payment_method)s::varchar, %(source)s::varchar,
+               %(prompt_version)s::varchar, CURRENT_TIMESTAMP
+        FROM st
+        RETURNING transaction_id
+    ),
+    lines AS (
+        SELECT *
+        FROM unnest(
+            %(product_names)s::varchar[], %(product_references)s::varchar[], %(brands)s::varchar[],
+            %(quantities)s::numeric[], %(unit_prices)s::numeric[], %(total_prices)s::numeric[],
+            %(vat_rates)s::varchar[], %(category_mains)s::varchar[], %(category_subs)s::varchar[],
+            %(line_numbers)s::integer[], %(proposed_category_mains)s::varchar[],
+            %(proposed_category_subs)s::varchar[]
+        ) WITH ORDINALITY AS l(product_name, product_reference, brand, quantity, unit_price,
+                               total_price, vat_rate, category_main, category_sub, line_number,
+                               proposed_category_main, proposed_category_sub, ord)
+    ),
+    new_cat AS (
+        INSERT INTO item_category (category_main, category_sub)
+        SELECT DISTINCT category_main, category_sub FROM lines
+        ON CONFLICT (category_main, category_sub) DO NOTHING
+        RETURNING category_id, category_main, category_sub
+    ),
+    cat AS (
+        SELECT category_id, category_main, category_sub FROM new_cat
+        UNION
+        SELECT c.category_id, c.category_main, c.category_sub
+        FROM item_category c
+        JOIN (SELECT DISTINCT category_main, category_sub FROM lines) l
+          ON c.category_main = l.category_main AND c.category_sub = l.category_sub
+    ),
+    it AS (
+        INSERT INTO item (
+            transaction_id, product_name, product_reference, brand,
+            quantity, unit_price, total_price, vat_rate,
+            category_id, line_number, proposed_category_main, proposed_category_sub
+        )
+        SELECT (SELECT transaction_id FROM tr), l.product_name, l.product_reference, l.brand,
+               l.quantity, l.unit_price, l.total_price, l.vat_rate,
+               cat.category_id, l.line_number, l.proposed_category_main, l.proposed_category_sub
+        FROM lines l
+        -- LEFT JOIN : une catégorie introuvable viole NOT NULL et annule tout le ticket
+        LEFT JOIN cat ON cat.category_main = l.category_main AND cat.category_sub = l.category_sub
+        ORDER BY l.ord
+    ),
+    attachment_mapping AS (
+        INSERT INTO transaction_attachment_mapping (transaction_id, attachment_id)
+        SELECT tr.transaction_id, a.attachment_id
+        FROM tr, unnest(
+            CASE WHEN cardinality(%(attachment_ids)s::integer[]) > 0 THEN %(attachment_ids)s::integer[]
+                 ELSE ARRAY(SELECT attachment_id FROM attachment
+                            WHERE message_id = %(message_id)s::integer)
+            END
+        ) AS a(attachment_id)
+        ON CONFLICT DO NOTHING
+        RETURNING attachment_id
+    )
+    SELECT (SELECT transaction_id FROM tr), (SELECT count(*) FROM attachment_mapping)
+"""
+
+
+class AsyncDatabaseClient:
+    """Client asynchrone pour interagir avec PostgreSQL (psycopg3)"""
+
+    def __init__(self, host: str = "localhost", port: int = 5433,
+                 database: str = "receipt_processing",
+                 user: str = "receipt_user",
+                 password: str = "SuperSecretPassword123!"):
+        self.conn_params = {
+            "host": host,
+            "port": port,
+            "dbname": database,
+            "user": user,
+            "password": password,
+            "connect_timeout": 10,  # Timeout de connexion de 10 secondes
+            "prepare_threshold": 0  # Préparer chaque requête côté serveur dès la première exécution
+        }
+        self._conn: Optional[psycopg.AsyncConnection] = None
+
+    async def _get_connection(self, max_retries: int = 3, retry_delay: float = 1.0) -> psycopg.AsyncConnection:
+        """
+        Obtient la connexion (réutilisée entre les appels pour garder les requêtes préparées) avec retry
+
+        Args:
+            max_retries: Nombre maximum de tentatives
+            retry_delay: Délai entre les tentatives (secondes)
+
+        Returns:
+            AsyncConnection
+        """
+        if self._conn is not None and not self._conn.closed:
+            return self._conn
+
+        last_error = None
+        for attempt in range(max_retries):
+            try:
+                self._conn = await psycopg.AsyncConnection.connect(**self.conn_params)
+                return self._conn
+            except (psycopg.OperationalError, psycopg.InterfaceError) as e:
+                last_error = e
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay * (attempt + 1))  # Backoff exponentiel
+                    continue
+                else:
+                    raise
+        raise last_error
+
+    async def close(self):
+        """Ferme la connexion"""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def __aenter__(self) -> "AsyncDatabaseClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _execute_one(self, query: str, params: dict) -> tuple:
+        """
+        Exécute une requête dans sa propre transaction, en mode pipeline
+
+        BEGIN, la requête préparée et COMMIT sont envoyés en un seul flush.
+        """
+        conn = await self._get_connection()
+        try:
+            async with conn.pipeline():
+                async with conn.transaction():
+                    cursor = await conn.execute(query, params, prepare=True)
+            return await cursor.fetchone()
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            # Connexion perdue : la prochaine requête en ouvrira une nouvelle
+            await self.close()
+            raise
+
+    async def insert_signal_message(self, message: Message) -> tuple[int, List[int]]:
+        """
+        Insère un message Signal complet dans la base de données
+
+        Args:
+            message: Object Message de SignalClient (Message class)
+
+        Returns:
+            (message_id, [attachment_ids])
+        """
+        group = message.group if message.is_group_message else None
+        params = {
+            "sender_uuid": str(message.sender.uuid) if message.sender.uuid else None,
+            "sender_number": message.sender.number if message.sender.number else None,  # NULL si pas de numéro
+            "sender_name": message.sender.name,
+            "group_id": group.id if group else None,
+            "group_name": group.name if group else None,
+            "timestamp": message.timestamp,
+            "text": message.text,
+            "is_group_message": message.is_group_message,
+            "account": message.account or "",
+            "att_ids": [att.id for att in message.attachments],
+            "att_content_types": [att.content_type for att in message.attachments],
+            "att_filenames": [att.filename for att in message.attachments],
+            "att_sizes": [att.size for att in message.attachments],
+            "att_upload_ts": [att.upload_timestamp_ms for att in message.attachments],
+            "att_paths": [str(att.path) if att.path else None for att in message.attachments],
+        }
+
+        try:
+            message_id, attachment_ids = await self._execute_one(INSERT_SIGNAL_MESSAGE_SQL, params)
+            print(f"✅ Message Signal inséré : message_id={message_id}, {len(attachment_ids)} attachments")
+            return message_id, list(attachment_ids)
+        except Exception as e:
+            print(f"❌ Erreur : {e}")
+            raise
+
+    async def insert_receipt(self, receipt_data: ReceiptData, message_id: int = None,
+                             attachment_ids: List[int] = None) -> int:
+        """
+        Insère un ticket complet dans la base de données
+
+        Returns:
+            transaction_id
+        """
+        store = receipt_data.store
+        transaction = receipt_data.transaction
+        items = receipt_data.items
+        tc_name = transaction.transaction_category_name
+        params = {
+            "store_name": store.store_name,
+            "address": store.address,
+            "postal_code": store.postal_code,
+            "city": store.city,
+            "country_code": store.country_code,
+            "phone": store.phone,
+            "tc_name": tc_name.lower().strip() if tc_name else None,
+            "tc_id": transaction.transaction_category_id,
+            "message_id": message_id,
+            "receipt_number": transaction.receipt_number,
+            "transaction_date": transaction.transaction_date,
+            "transaction_time": transaction.transaction_time,
+            "currency": transaction.currency,
+            "total": transaction.total,
+            "payment_method": transaction.payment_method,
+            "source": transaction.source,
+            "prompt_version": transaction.prompt_version,
+            "product_names": [item.product_name for item in items],
+            "product_references": [item.product_reference for item in items],
+            "brands": [item.brand for item in items],
+            "quantities": [item.quantity for item in items],
+            "unit_prices": [item.unit_price for item in items],
+            "total_prices": [item.total_price for item in items],
+            "vat_rates": [item.vat_rate for item in items],
+            "category_mains": [item.category_main for item in items],
+            "category_subs": [item.category_sub for item in items],
+            "line_numbers": [item.line_number for item in items],
+            "proposed_category_mains": [item.proposed_category_main for item in items],
+            "proposed_category_subs": [item.proposed_category_sub for item in items],
+            "attachment_ids": list(attachment_ids or []),
+        }
+
+        try:
+            transaction_id, linked_attachments = await self._execute_one(INSERT_RECEIPT_SQL, params)
+            if linked_attachments:
+                print(f"   📎 {linked_attachments} attachment(s) lié(s) à la transaction")
+            print(f"✅ Ticket inséré : transaction_id={transaction_id}, {len(items)} articles")
+            return transaction_id
+        except Exception as e:
+            print(f"❌ Erreur lors de l'insertion du ticket : {e}")
+            raise
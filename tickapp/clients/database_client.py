@@ -1,9 +1,20 @@
 # tickapp/clients/database_client.py
 import psycopg2
+import psycopg2.extras
 import time
-from typing import List, Optional
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional
 from ..models import ReceiptData
-from ..clients.signal_client import Message
+from ..transformers.product_dictionary import ProductDictionary
+from ..transformers.price_observation import observe
+from ..clients.signal_client import Message, Attachment, Contact, Group
+
+
+class LeaseLostError(Exception):
+    """Le worker ne détient plus le bail du receipt_job (repris par un autre worker)"""
+    pass
+
 
 class DatabaseClient:
     """Client pour interagir avec PostgreSQL"""
@@ -112,17 +123,18 @@ class DatabaseClient:
             ))
             message_id = cursor.fetchone()[0]
             
-            # 4. Insérer les attachments (sans message_id)
+            # 4. Insérer les attachments (rattachés directement au message)
             attachment_ids = []
             for att in message.attachments:
                 cursor.execute("""
                     INSERT INTO attachment (
-                        signal_attachment_id, content_type, 
+                        message_id, signal_attachment_id, content_type, 
                         filename, file_size, upload_timestamp_ms, file_path
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
                     RETURNING attachment_id
                 """, (
+                    message_id,
                     att.id,
                     att.content_type,
                     att.filename,
@@ -132,12 +144,6 @@ class DatabaseClient:
                 ))
                 attachment_id = cursor.fetchone()[0]
                 attachment_ids.append(attachment_id)
-                
-                # 4b. Créer le mapping message -> attachment
-                cursor.execute("""
-                    INSERT INTO message_attachment_mapping (message_id, attachment_id)
-                    VALUES (%s, %s)
-                """, (message_id, attachment_id))
             
             conn.commit()
             print(f"✅ Message Signal inséré : message_id={message_id}, {len(attachment_ids)} attachments")
@@ -163,143 +169,1203 @@ class DatabaseClient:
         cursor = conn.cursor()
         
         try:
-            # 1. Insérer le magasin (ou récupérer s'il existe déjà)
-            cursor.execute("""
-                INSERT INTO store (store_name, address, postal_code, city, country_code, phone)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (store_name, city, postal_code)
-                DO UPDATE SET 
-                    address = COALESCE(EXCLUDED.address, store.address),
-                    phone = COALESCE(EXCLUDED.phone, store.phone),
-                    updated_at = CURRENT_TIMESTAMP
-                RETURNING store_id
-            """, (
-                receipt_data.store.store_name,
-                receipt_data.store.address,
-                receipt_data.store.postal_code,
-                receipt_data.store.city,
-                receipt_data.store.country_code,
-                receipt_data.store.phone
-            ))
-            store_id = cursor.fetchone()[0]
+            transaction_id = self._insert_receipt_rows(cursor, receipt_data, message_id, attachment_ids)
             
-            # 1b. Récupérer ou créer la catégorie de transaction (si nom fourni)
-            transaction_category_id = receipt_data.transaction.transaction_category_id
-            if receipt_data.transaction.transaction_category_name:
-                category_name_lower = receipt_data.transaction.transaction_category_name.lower().strip()
+            conn.commit()
+            print(f"✅ Ticket inséré : transaction_id={transaction_id}, {len(receipt_data.items)} articles")
+            return transaction_id
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Erreur lors de l'insertion du ticket : {e}")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def _insert_receipt_rows(self, cursor, receipt_data: ReceiptData, message_id: int = None,
+                             attachment_ids: List[int] = None) -> int:
+        """
+        Écrit les lignes d'un ticket avec le curseur fourni, sans commit
+        
+        Permet d'inclure l'insertion dans une transaction plus large
+        (ex: complétion d'un receipt_job).
+        
+        Returns:
+            transaction_id
+        """
+        # 1. Insérer le magasin (ou récupérer s'il existe déjà)
+        cursor.execute("""
+            INSERT INTO store (store_name, address, postal_code, city, country_code, phone)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (store_name, city, postal_code)
+            DO UPDATE SET 
+                address = COALESCE(EXCLUDED.address, store.address),
+                phone = COALESCE(EXCLUDED.phone, store.phone),
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING store_id
+        """, (
+            receipt_data.store.store_name,
+            receipt_data.store.address,
+            receipt_data.store.postal_code,
+            receipt_data.store.city,
+            receipt_data.store.country_code,
+            receipt_data.store.phone
+        ))
+        store_id = cursor.fetchone()[0]
+        
+        # 1b. Récupérer ou créer la catégorie de transaction (si nom fourni)
+        transaction_category_id = receipt_data.transaction.transaction_category_id
+        if receipt_data.transaction.transaction_category_name:
+            category_name_lower = receipt_data.transaction.transaction_category_name.lower().strip()
+            cursor.execute("""
+                INSERT INTO transaction_category (name)
+                VALUES (%s)
+                ON CONFLICT (name) DO NOTHING
+                RETURNING category_id
+            """, (category_name_lower,))
+            result = cursor.fetchone()
+            if result:
+                transaction_category_id = result[0]
+            else:
+                # Récupérer l'ID si la catégorie existait déjà
                 cursor.execute("""
-                    INSERT INTO transaction_category (name)
-                    VALUES (%s)
-                    ON CONFLICT (name) DO NOTHING
-                    RETURNING category_id
+                    SELECT category_id FROM transaction_category WHERE name = %s
                 """, (category_name_lower,))
-                result = cursor.fetchone()
-                if result:
-                    transaction_category_id = result[0]
-                else:
-                    # Récupérer l'ID si la catégorie existait déjà
-                    cursor.execute("""
-                        SELECT category_id FROM transaction_category WHERE name = %s
-                    """, (category_name_lower,))
-                    transaction_category_id = cursor.fetchone()[0]
+                transaction_category_id = cursor.fetchone()[0]
+        
+        # 2. Insérer la transaction (avec message_id et transaction_category_id)
+        cursor.execute("""
+            INSERT INTO transaction (
+                message_id, store_id, transaction_category_id, receipt_number, 
+                transaction_date, transaction_time, currency, total, 
+                payment_method, source, prompt_version, processed_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            RETURNING transaction_id
+        """, (
+            message_id,
+            store_id,
+            transaction_category_id,
+            receipt_data.transaction.receipt_number,
+            receipt_data.transaction.transaction_date,
+            receipt_data.transaction.transaction_time,
+            receipt_data.transaction.currency,
+            receipt_data.transaction.total,
+            receipt_data.transaction.payment_method,
+            receipt_data.transaction.source,
+            receipt_data.transaction.prompt_version
+        ))
+        transaction_id = cursor.fetchone()[0]
+        
+        # 3. Insérer les items
+        for item in receipt_data.items:
+            # 3a. Récupérer ou créer la catégorie (retourne toujours l'ID)
+            cursor.execute("""
+                WITH new_category AS (
+                    INSERT INTO item_category (category_main, category_sub)
+                    VALUES (%s, %s)
+                    ON CONFLICT (category_main, category_sub) DO NOTHING
+                    RETURNING category_id
+                )
+                SELECT category_id FROM new_category
+                UNION ALL
+                SELECT category_id FROM item_category 
+                WHERE category_main = %s AND category_sub = %s
+                LIMIT 1
+            """, (item.category_main, item.category_sub, item.category_main, item.category_sub))
+            category_id = cursor.fetchone()[0]
             
-            # 2. Insérer la transaction (avec message_id et transaction_category_id)
+            # 3b. Insérer l'item (rattaché directement à la transaction)
             cursor.execute("""
-                INSERT INTO transaction (
-                    message_id, store_id, transaction_category_id, receipt_number, 
-                    transaction_date, transaction_time, currency, total, 
-                    payment_method, source, processed_at
+                INSERT INTO item (
+                    transaction_id, product_name, product_reference, brand,
+                    quantity, unit_price, total_price, vat_rate,
+                    category_id, line_number, proposed_category_main, proposed_category_sub
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                RETURNING transaction_id
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
-                message_id,
-                store_id,
-                transaction_category_id,
-                receipt_data.transaction.receipt_number,
-                receipt_data.transaction.transaction_date,
-                receipt_data.transaction.transaction_time,
-                receipt_data.transaction.currency,
-                receipt_data.transaction.total,
-                receipt_data.transaction.payment_method,
-                receipt_data.transaction.source
+                transaction_id,
+                item.product_name,
+                item.product_reference,
+                item.brand,
+                item.quantity,
+                item.unit_price,
+                item.total_price,
+                item.vat_rate,
+                category_id,
+                item.line_number,
+                item.proposed_category_main,
+                item.proposed_category_sub
             ))
-            transaction_id = cursor.fetchone()[0]
+        
+        # 4. Lier les attachments
+        # Si attachment_ids n'est pas fourni mais message_id l'est, récupérer les attachments du message
+        if not attachment_ids and message_id:
+            cursor.execute("""
+                SELECT attachment_id 
+                FROM attachment 
+                WHERE message_id = %s
+            """, (message_id,))
+            attachment_ids = [row[0] for row in cursor.fetchall()]
+        
+        # Insérer les liens transaction_attachment_mapping
+        if attachment_ids:
+            for attachment_id in attachment_ids:
+                cursor.execute("""
+                    INSERT INTO transaction_attachment_mapping (transaction_id, attachment_id)
+                    VALUES (%s, %s)
+                    ON CONFLICT DO NOTHING
+                """, (transaction_id, attachment_id))
+            print(f"   📎 {len(attachment_ids)} attachment(s) lié(s) à la transaction")
+        
+        return transaction_id
+
+    # ========================================================================
+    # FILE DE TRAITEMENT (receipt_job)
+    # ========================================================================
+    
+    def enqueue_receipt_job(self, message_id: int, max_attempts: int = 5) -> Optional[int]:
+        """
+        Ajoute un message à la file receipt_job (idempotent)
+        
+        Args:
+            message_id: ID du message Signal en base
+            max_attempts: Nombre de tentatives avant dead-letter
+        
+        Returns:
+            job_id, ou None si un job existait déjà pour ce message
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO receipt_job (message_id, max_attempts)
+                VALUES (%s, %s)
+                ON CONFLICT (message_id) DO NOTHING
+                RETURNING job_id
+            """, (message_id, max_attempts))
+            result = cursor.fetchone()
+            conn.commit()
+            return result[0] if result else None
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def enqueue_pending_messages(self, max_attempts: int = 5) -> int:
+        """
+        Crée un job pour chaque message non traité qui n'en a pas encore
+        
+        Les messages confiés au pipeline Dagster par message (message_partition)
+        sont laissés à ce pipeline : un message n'a qu'un chemin de traitement.
+        
+        Returns:
+            Nombre de jobs créés
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Sérialisé avec l'affectation des messages aux partitions
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('message_routing'))")
+            cursor.execute("""
+                INSERT INTO receipt_job (message_id, max_attempts)
+                SELECT m.message_id, %s
+                FROM signal_message m
+                WHERE m.processed = FALSE
+                  AND NOT EXISTS (SELECT 1 FROM transaction t WHERE t.message_id = m.message_id)
+                  AND NOT EXISTS (SELECT 1 FROM message_partition p WHERE p.message_id = m.message_id)
+                ON CONFLICT (message_id) DO NOTHING
+            """, (max_attempts,))
+            count = cursor.rowcount
+            conn.commit()
+            return count
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def claim_receipt_job(self, worker_id: str, lease_seconds: int = 300) -> Optional[tuple[int, int, int]]:
+        """
+        Réclame le prochain job disponible (voir claim_receipt_jobs)
+        
+        Returns:
+            (job_id, message_id, attempts) ou None si la file est vide
+        """
+        jobs = self.claim_receipt_jobs(worker_id, limit=1, lease_seconds=lease_seconds)
+        return jobs[0] if jobs else None
+    
+    def claim_receipt_jobs(self, worker_id: str, limit: int,
+                           lease_seconds: int = 300) -> List[tuple[int, int, int]]:
+        """
+        Réclame jusqu'à limit jobs disponibles avec FOR UPDATE SKIP LOCKED
+        
+        Un job est disponible s'il est 'pending' et que son available_at est passé,
+        ou s'il est 'running' avec un bail expiré (worker mort) et qu'il lui reste
+        des tentatives. Les jobs expirés sans tentative restante passent en 'dead'.
+        
+        Args:
+            worker_id: Identifiant unique du worker
+            limit: Nombre maximal de jobs réclamés
+            lease_seconds: Durée du bail (visibility timeout)
+        
+        Returns:
+            [(job_id, message_id, attempts)], vide si la file est vide
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Dead-letter des jobs abandonnés qui ont épuisé leurs tentatives
+            cursor.execute("""
+                UPDATE receipt_job
+                SET status = 'dead',
+                    locked_by = NULL,
+                    lease_expires_at = NULL,
+                    finished_at = CURRENT_TIMESTAMP,
+                    last_error = COALESCE(last_error, 'Bail expiré')
+                WHERE status = 'running'
+                  AND lease_expires_at < CURRENT_TIMESTAMP
+                  AND attempts >= max_attempts
+            """)
             
-            # 3. Insérer les items
-            for item in receipt_data.items:
-                # 3a. Récupérer ou créer la catégorie (retourne toujours l'ID)
+            cursor.execute("""
+                WITH next_job AS (
+                    SELECT job_id
+                    FROM receipt_job
+                    WHERE (status = 'pending' AND available_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP)
+                    ORDER BY available_at, job_id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE receipt_job j
+                SET status = 'running',
+                    attempts = j.attempts + 1,
+                    locked_by = %s,
+                    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    heartbeat_at = CURRENT_TIMESTAMP
+                FROM next_job
+                WHERE j.job_id = next_job.job_id
+                RETURNING j.job_id, j.message_id, j.attempts
+            """, (limit, worker_id, lease_seconds))
+            jobs = sorted(tuple(row) for row in cursor.fetchall())
+            conn.commit()
+            return jobs
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def heartbeat_receipt_job(self, job_id: int, worker_id: str, lease_seconds: int = 300) -> bool:
+        """
+        Prolonge le bail d'un job tant que le worker le détient encore
+        
+        Returns:
+            False si le bail a été perdu (job repris par un autre worker)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE receipt_job
+                SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    heartbeat_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND locked_by = %s AND status = 'running'
+            """, (lease_seconds, job_id, worker_id))
+            still_owner = cursor.rowcount == 1
+            conn.commit()
+            return still_owner
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    @staticmethod
+    def _lock_message_transaction(cursor, message_id: int) -> Optional[int]:
+        """
+        Verrouille le message jusqu'à la fin de la transaction et renvoie la
+        transaction déjà insérée pour lui (ou None)
+        
+        Sans contrainte unique sur transaction.message_id (table partitionnée),
+        c'est ce verrou qui empêche deux complétions concurrentes d'insérer
+        chacune un ticket pour le même message.
+        """
+        cursor.execute("SELECT message_id FROM signal_message WHERE message_id = %s FOR UPDATE", (message_id,))
+        cursor.execute("""
+            SELECT transaction_id FROM transaction
+            WHERE message_id = %s
+            ORDER BY transaction_id
+            LIMIT 1
+        """, (message_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def complete_receipt_job(self, job_id: int, worker_id: str, receipt_data: ReceiptData,
+                             message_id: int, attachment_ids: List[int] = None) -> int:
+        """
+        Insère le ticket et marque le job 'done' dans la même transaction
+        
+        La ligne du job est verrouillée et son bail vérifié avant l'insertion :
+        si un autre worker a repris le job, rien n'est écrit (effet exactly-once).
+        Si le message a déjà sa transaction (pipeline Dagster, job remis en
+        file), le job est terminé avec elle sans insérer de doublon.
+        
+        Returns:
+            transaction_id
+        
+        Raises:
+            LeaseLostError: si le worker ne détient plus le job
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT job_id
+                FROM receipt_job
+                WHERE job_id = %s AND locked_by = %s AND status = 'running'
+                FOR UPDATE
+            """, (job_id, worker_id))
+            if cursor.fetchone() is None:
+                raise LeaseLostError(f"Job {job_id} n'est plus détenu par {worker_id}")
+            
+            transaction_id = self._lock_message_transaction(cursor, message_id)
+            if transaction_id is not None:
+                print(f"⏭️  Message {message_id} déjà traité : transaction_id={transaction_id}")
+            else:
+                transaction_id = self._insert_receipt_rows(cursor, receipt_data, message_id, attachment_ids)
+            
+            cursor.execute("""
+                UPDATE receipt_job
+                SET status = 'done',
+                    transaction_id = %s,
+                    locked_by = NULL,
+                    lease_expires_at = NULL,
+                    last_error = NULL,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s
+            """, (transaction_id, job_id))
+            cursor.execute("""
+                UPDATE signal_message SET processed = TRUE WHERE message_id = %s
+            """, (message_id,))
+            
+            conn.commit()
+            print(f"✅ Job {job_id} terminé : transaction_id={transaction_id}")
+            return transaction_id
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Erreur lors de la complétion du job {job_id} : {e}")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def fail_receipt_job(self, job_id: int, worker_id: str, error: str,
+                         retry_delay: float = 30.0) -> Optional[str]:
+        """
+        Enregistre l'échec d'un job : retry avec backoff ou dead-letter
+        
+        Args:
+            job_id: ID du job
+            worker_id: Worker qui détenait le job
+            error: Message d'erreur à conserver
+            retry_delay: Délai de base (secondes), multiplié par le nombre de tentatives
+        
+        Returns:
+            Nouveau statut ('pending' ou 'dead'), ou None si le bail était perdu
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE receipt_job
+                SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                    available_at = CURRENT_TIMESTAMP + make_interval(secs => %s * attempts),
+                    locked_by = NULL,
+                    lease_expires_at = NULL,
+                    last_error = %s,
+                    finished_at = CASE WHEN attempts >= max_attempts THEN CURRENT_TIMESTAMP END
+                WHERE job_id = %s AND locked_by = %s AND status = 'running'
+                RETURNING status
+            """, (retry_delay, error, job_id, worker_id))
+            result = cursor.fetchone()
+            conn.commit()
+            return result[0] if result else None
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def complete_receipt_jobs(self, worker_id: str,
+                              completions: List[tuple[int, int, ReceiptData]]) -> dict:
+        """
+        Version par lot de complete_receipt_job : une seule connexion et un
+        seul commit pour tout le lot
+        
+        Chaque ticket est inséré sous un savepoint : l'échec d'un ticket (ou
+        la perte de son bail) n'annule pas les autres. Un message qui a déjà
+        sa transaction termine son job avec elle, sans second ticket.
+        
+        Args:
+            completions: [(job_id, message_id, receipt_data)]
+        
+        Returns:
+            {job_id: transaction_id ou exception}
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        results = {}
+        
+        try:
+            for job_id, message_id, receipt_data in completions:
+                cursor.execute("SAVEPOINT receipt_job")
+                try:
+                    cursor.execute("""
+                        SELECT job_id
+                        FROM receipt_job
+                        WHERE job_id = %s AND locked_by = %s AND status = 'running'
+                        FOR UPDATE
+                    """, (job_id, worker_id))
+                    if cursor.fetchone() is None:
+                        raise LeaseLostError(f"Job {job_id} n'est plus détenu par {worker_id}")
+                    transaction_id = self._lock_message_transaction(cursor, message_id)
+                    if transaction_id is None:
+                        transaction_id = self._insert_receipt_rows(cursor, receipt_data, message_id)
+                    results[job_id] = transaction_id
+                    cursor.execute("RELEASE SAVEPOINT receipt_job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT receipt_job")
+                    results[job_id] = e
+            
+            done = [
+                (job_id, results[job_id], message_id)
+                for job_id, message_id, _ in completions
+                if not isinstance(results[job_id], Exception)
+            ]
+            if done:
                 cursor.execute("""
-                    WITH new_category AS (
-                        INSERT INTO item_category (category_main, category_sub)
-                        VALUES (%s, %s)
-                        ON CONFLICT (category_main, category_sub) DO NOTHING
-                        RETURNING category_id
-                    )
-                    SELECT category_id FROM new_category
-                    UNION ALL
-                    SELECT category_id FROM item_category 
-                    WHERE category_main = %s AND category_sub = %s
-                    LIMIT 1
-                """, (item.category_main, item.category_sub, item.category_main, item.category_sub))
-                category_id = cursor.fetchone()[0]
-                
-                # 3b. Insérer l'item (sans transaction_id)
+                    UPDATE receipt_job j
+                    SET status = 'done',
+                        transaction_id = d.transaction_id,
+                        locked_by = NULL,
+                        lease_expires_at = NULL,
+                        last_error = NULL,
+                        finished_at = CURRENT_TIMESTAMP
+                    FROM unnest(%s::bigint[], %s::integer[]) AS d(job_id, transaction_id)
+                    WHERE j.job_id = d.job_id
+                """, ([job_id for job_id, _, _ in done], [tx for _, tx, _ in done]))
                 cursor.execute("""
-                    INSERT INTO item (
-                        product_name, product_reference, brand,
-                        quantity, unit_price, total_price, vat_rate,
-                        category_id, line_number
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING item_id
-                """, (
-                    item.product_name,
-                    item.product_reference,
-                    item.brand,
-                    item.quantity,
-                    item.unit_price,
-                    item.total_price,
-                    item.vat_rate,
-                    category_id,
-                    item.line_number
+                    UPDATE signal_message SET processed = TRUE WHERE message_id = ANY(%s)
+                """, ([message_id for _, _, message_id in done],))
+            
+            conn.commit()
+            print(f"✅ {len(done)}/{len(completions)} job(s) terminé(s)")
+            return results
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Erreur lors de la complétion du lot : {e}")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def fail_receipt_jobs(self, worker_id: str, errors: dict,
+                          retry_delay: float = 30.0) -> dict:
+        """
+        Version par lot de fail_receipt_job
+        
+        Args:
+            errors: {job_id: message d'erreur}
+        
+        Returns:
+            {job_id: nouveau statut}, sans les jobs dont le bail était perdu
+        """
+        if not errors:
+            return {}
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE receipt_job j
+                SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                    available_at = CURRENT_TIMESTAMP + make_interval(secs => %s * attempts),
+                    locked_by = NULL,
+                    lease_expires_at = NULL,
+                    last_error = e.error,
+                    finished_at = CASE WHEN attempts >= max_attempts THEN CURRENT_TIMESTAMP END
+                FROM unnest(%s::bigint[], %s::text[]) AS e(job_id, error)
+                WHERE j.job_id = e.job_id AND j.locked_by = %s AND j.status = 'running'
+                RETURNING j.job_id, j.status
+            """, (retry_delay, list(errors), [str(error) for error in errors.values()], worker_id))
+            statuses = dict(cursor.fetchall())
+            conn.commit()
+            return statuses
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def get_signal_message(self, message_id: int) -> Optional[Message]:
+        """
+        Reconstruit un Message Signal depuis la base (avec ses attachments)
+        
+        Returns:
+            Message ou None si le message n'existe pas
+        """
+        return self.get_signal_messages([message_id]).get(message_id)
+    
+    def get_signal_messages(self, message_ids: List[int]) -> dict:
+        """
+        Reconstruit des Messages Signal depuis la base en deux requêtes
+        
+        Returns:
+            {message_id: Message}, sans les messages inexistants
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT a.message_id, a.signal_attachment_id, a.content_type, a.filename,
+                       a.file_size, a.upload_timestamp_ms, a.file_path
+                FROM attachment a
+                WHERE a.message_id = ANY(%s)
+                ORDER BY a.attachment_id
+            """, (list(message_ids),))
+            attachments = {}
+            for message_id, att_id, content_type, filename, file_size, upload_ts, file_path in cursor.fetchall():
+                attachments.setdefault(message_id, []).append(Attachment(
+                    id=att_id or "",
+                    content_type=content_type or "",
+                    filename=filename or "",
+                    size=file_size or 0,
+                    upload_timestamp_ms=upload_ts or 0,
+                    path=Path(file_path) if file_path else None
                 ))
-                item_id = cursor.fetchone()[0]
-                
-                # 3c. Créer le mapping transaction -> item
-                cursor.execute("""
-                    INSERT INTO transaction_item_mapping (transaction_id, item_id)
-                    VALUES (%s, %s)
-                """, (transaction_id, item_id))
             
-            # 4. Lier les attachments
-            # Si attachment_ids n'est pas fourni mais message_id l'est, récupérer les attachments du message
-            if not attachment_ids and message_id:
+            cursor.execute("""
+                SELECT m.message_id, m.timestamp, m.text_content, m.is_group_message, m.signal_account,
+                       s.signal_uuid, s.phone_number, s.contact_name,
+                       g.signal_group_id, g.group_name
+                FROM signal_message m
+                LEFT JOIN signal_sender s ON m.sender_id = s.sender_id
+                LEFT JOIN signal_group g ON m.group_id = g.group_id
+                WHERE m.message_id = ANY(%s)
+            """, (list(message_ids),))
+            messages = {}
+            for (message_id, timestamp, text, is_group_message, account,
+                 sender_uuid, phone_number, contact_name, group_id, group_name) in cursor.fetchall():
+                messages[message_id] = Message(
+                    sender=Contact(
+                        number=phone_number or "",
+                        name=contact_name,
+                        uuid=str(sender_uuid) if sender_uuid else None
+                    ),
+                    timestamp=timestamp,
+                    text=text,
+                    attachments=attachments.get(message_id, []),
+                    group=Group(id=group_id, name=group_name) if group_id else None,
+                    is_group_message=bool(is_group_message),
+                    account=account or None
+                )
+            return messages
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def find_signal_message_id(self, message: Message) -> Optional[int]:
+        """
+        ID d'un message Signal déjà en base (même timestamp et même sender)
+        
+        Returns:
+            message_id ou None si le message n'a pas encore été inséré
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT m.message_id
+                FROM signal_message m
+                LEFT JOIN signal_sender s ON m.sender_id = s.sender_id
+                WHERE m.timestamp = %s
+                  AND s.signal_uuid IS NOT DISTINCT FROM %s::uuid
+                ORDER BY m.message_id
+                LIMIT 1
+            """, (message.timestamp, str(message.sender.uuid) if message.sender.uuid else None))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def assign_partition_messages(self) -> List[int]:
+        """
+        Confie au pipeline Dagster par message (message_partition) les messages
+        non traités qui n'ont pas de job receipt_job, et renvoie tous les
+        messages confiés à ce pipeline encore sans transaction
+        
+        Un message confié au pipeline n'est plus mis en file
+        (enqueue_pending_messages) : un message n'a qu'un chemin de traitement.
+        
+        Returns:
+            IDs des messages, du plus ancien au plus récent
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Sérialisé avec enqueue_pending_messages
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('message_routing'))")
+            cursor.execute("""
+                INSERT INTO message_partition (message_id)
+                SELECT m.message_id
+                FROM signal_message m
+                WHERE m.processed = FALSE
+                  AND NOT EXISTS (SELECT 1 FROM transaction t WHERE t.message_id = m.message_id)
+                  AND NOT EXISTS (SELECT 1 FROM receipt_job j WHERE j.message_id = m.message_id)
+                ON CONFLICT (message_id) DO NOTHING
+            """)
+            cursor.execute("""
+                SELECT p.message_id
+                FROM message_partition p
+                JOIN signal_message m ON m.message_id = p.message_id
+                WHERE m.processed = FALSE
+                  AND NOT EXISTS (SELECT 1 FROM transaction t WHERE t.message_id = p.message_id)
+                ORDER BY p.message_id
+            """)
+            message_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return message_ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def get_message_transaction(self, message_id: int) -> Optional[dict]:
+        """
+        Transaction déjà insérée pour un message Signal
+        
+        Returns:
+            Dictionnaire avec transaction_id, store_name et total, ou None
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT t.transaction_id, s.store_name, t.total
+                FROM transaction t
+                JOIN store s ON t.store_id = s.store_id
+                WHERE t.message_id = %s
+                ORDER BY t.transaction_id
+                LIMIT 1
+            """, (message_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return {"transaction_id": row[0], "store_name": row[1], "total": row[2]}
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def get_attachment_ids(self, message_id: int) -> List[int]:
+        """IDs des attachments d'un message, dans l'ordre d'insertion"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT attachment_id FROM attachment
+                WHERE message_id = %s
+                ORDER BY attachment_id
+            """, (message_id,))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+    
+    # ========================================================================
+    # SORTIES DES ASSETS DAGSTER
+    # ========================================================================
+    
+    def save_asset_output(self, message_id: int, asset_key: str, schema_version: int,
+                          content_hash: str, payload: Optional[bytes] = None,
+                          run_id: Optional[str] = None):
+        """
+        Enregistre (ou remplace) la sortie d'un asset pour un message
+        
+        Args:
+            payload: Sortie sérialisée, None si la sortie est déjà en base
+                (seule la référence est gardée)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO asset_output
+                    (message_id, asset_key, schema_version, content_hash, payload, size_bytes, run_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (message_id, asset_key) DO UPDATE SET
+                    schema_version = EXCLUDED.schema_version,
+                    content_hash = EXCLUDED.content_hash,
+                    payload = EXCLUDED.payload,
+                    size_bytes = EXCLUDED.size_bytes,
+                    run_id = EXCLUDED.run_id
+            """, (
+                message_id, asset_key, schema_version, content_hash,
+                psycopg2.Binary(payload) if payload is not None else None,
+                len(payload) if payload is not None else 0,
+                run_id
+            ))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def get_asset_output(self, message_id: int, asset_key: str) -> Optional[tuple[int, Optional[bytes]]]:
+        """
+        Sortie d'un asset pour un message
+        
+        Returns:
+            (schema_version, payload) ou None si l'asset n'a pas de sortie
+            pour ce message ; payload None pour une référence
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT schema_version, payload FROM asset_output
+                WHERE message_id = %s AND asset_key = %s
+            """, (message_id, asset_key))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            schema_version, payload = row
+            return schema_version, bytes(payload) if payload is not None else None
+        finally:
+            cursor.close()
+            conn.close()
+    
+    # ========================================================================
+    # SNAPSHOTS PARQUET
+    # ========================================================================
+
+    def get_transaction_months(self, transaction_ids: Optional[List[int]] = None) -> List[date]:
+        """
+        Mois (premier jour) des transactions données, de toutes si None
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            if transaction_ids is None:
+                cursor.execute("""
+                    SELECT DISTINCT date_trunc('month', transaction_date)::date FROM transaction
+                    ORDER BY 1
+                """)
+            else:
                 cursor.execute("""
-                    SELECT attachment_id 
-                    FROM message_attachment_mapping 
-                    WHERE message_id = %s
-                """, (message_id,))
-                attachment_ids = [row[0] for row in cursor.fetchall()]
+                    SELECT DISTINCT date_trunc('month', transaction_date)::date FROM transaction
+                    WHERE transaction_id = ANY(%s)
+                    ORDER BY 1
+                """, (list(transaction_ids),))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    # Colonnes dans l'ordre des datasets de tickapp.snapshots ; {conditions} : filtres
+    DATASET_QUERIES = {
+        "transactions": """
+            SELECT t.transaction_id, t.message_id, t.transaction_date, t.transaction_time,
+                   t.store_id, s.store_name, s.city, tc.name, t.currency, t.total,
+                   t.payment_method,
+                   (SELECT COUNT(*) FROM item i WHERE i.transaction_id = t.transaction_id)
+            FROM transaction t
+            JOIN store s ON t.store_id = s.store_id
+            LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+            WHERE {conditions}
+            ORDER BY t.transaction_date, t.transaction_id
+        """,
+        "items": """
+            SELECT i.item_id, i.transaction_id, t.transaction_date, s.store_name,
+                   i.product_name, i.brand, i.quantity, i.unit_price, i.total_price,
+                   t.currency, c.category_main, c.category_sub
+            FROM transaction t
+            JOIN item i ON i.transaction_id = t.transaction_id
+            JOIN store s ON t.store_id = s.store_id
+            JOIN item_category c ON i.category_id = c.category_id
+            LEFT JOIN transaction_category tc ON t.transaction_category_id = tc.category_id
+            WHERE {conditions}
+            ORDER BY t.transaction_date, i.transaction_id, i.line_number, i.item_id
+        """,
+    }
+
+    @staticmethod
+    def _dataset_conditions(dataset: str, from_date: Optional[date] = None, to_date: Optional[date] = None,
+                            stores: Optional[List[str]] = None, groups: Optional[List[str]] = None,
+                            categories: Optional[List[str]] = None,
+                            since_transaction_id: Optional[int] = None,
+                            until_transaction_id: Optional[int] = None) -> tuple[str, dict]:
+        """Clause WHERE et paramètres des filtres d'un dataset"""
+        conditions, params = ["TRUE"], {}
+        if from_date is not None:
+            conditions.append("t.transaction_date >= %(from_date)s")
+            params["from_date"] = from_date
+        if to_date is not None:
+            conditions.append("t.transaction_date <= %(to_date)s")
+            params["to_date"] = to_date
+        if stores:
+            conditions.append("s.store_name = ANY(%(stores)s)")
+            params["stores"] = list(stores)
+        if groups:
+            conditions.append("tc.name = ANY(%(groups)s)")
+            params["groups"] = list(groups)
+        if categories:
+            if dataset == "items":
+                conditions.append("c.category_main = ANY(%(categories)s)")
+            else:
+                conditions.append("""EXISTS (
+                    SELECT 1 FROM item i JOIN item_category c ON i.category_id = c.category_id
+                    WHERE i.transaction_id = t.transaction_id AND c.category_main = ANY(%(categories)s)
+                )""")
+            params["categories"] = list(categories)
+        if since_transaction_id is not None:
+            conditions.append("t.transaction_id > %(since_transaction_id)s")
+            params["since_transaction_id"] = since_transaction_id
+        if until_transaction_id is not None:
+            conditions.append("t.transaction_id <= %(until_transaction_id)s")
+            params["until_transaction_id"] = until_transaction_id
+        return " AND ".join(conditions), params
+
+    def get_committed_transaction_horizon(self, lock_timeout_seconds: int = 30) -> Optional[int]:
+        """
+        Plus grand transaction_id en deçà duquel aucune insertion n'est en cours
+        
+        Les ID sont attribués à l'insertion et non au COMMIT : un ticket d'ID
+        plus petit peut être validé après un ID plus grand. Le verrou SHARE
+        attend la fin des transactions qui écrivent dans transaction (et bloque
+        les nouvelles le temps de lire le maximum) : tous les ID jusqu'au
+        résultat sont validés ou annulés.
+        
+        Returns:
+            transaction_id maximal, None si la table est vide
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", (f"{lock_timeout_seconds}s",))
+            cursor.execute("LOCK TABLE transaction IN SHARE MODE")
+            cursor.execute("SELECT MAX(transaction_id) FROM transaction")
+            horizon = cursor.fetchone()[0]
+            conn.commit()
+            return horizon
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def iter_dataset_rows(self, dataset: str, batch_size: int = 10000, **filters) -> Iterator[List[tuple]]:
+        """
+        Lignes d'un dataset ('transactions' ou 'items') par lots, lues avec
+        un curseur côté serveur : la mémoire ne dépend que de batch_size
+        
+        Args:
+            filters: from_date, to_date, stores, groups, categories,
+                since_transaction_id, until_transaction_id (voir _dataset_conditions)
+        
+        Yields:
+            Lots d'au plus batch_size lignes, dans l'ordre des colonnes du
+            dataset de tickapp.snapshots
+        """
+        conditions, params = self._dataset_conditions(dataset, **filters)
+        conn = self._get_connection()
+        cursor = conn.cursor(name=f"dataset_{dataset}")
+        cursor.itersize = batch_size
+        
+        try:
+            cursor.execute(self.DATASET_QUERIES[dataset].format(conditions=conditions), params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _get_month_rows(self, dataset: str, month: date) -> List[tuple]:
+        month_end = (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        return [
+            row
+            for rows in self.iter_dataset_rows(dataset, from_date=month, to_date=month_end)
+            for row in rows
+        ]
+
+    def get_snapshot_transactions(self, month: date) -> List[tuple]:
+        """
+        Transactions d'un mois, dans l'ordre des colonnes du dataset
+        'transactions' de tickapp.snapshots
+        """
+        return self._get_month_rows("transactions", month)
+
+    def get_snapshot_items(self, month: date) -> List[tuple]:
+        """
+        Articles des transactions d'un mois, dans l'ordre des colonnes du
+        dataset 'items' de tickapp.snapshots
+        """
+        return self._get_month_rows("items", month)
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    def maintain_partitions(self, months_ahead: int = 3) -> List[str]:
+        """
+        Crée les partitions mensuelles manquantes de transaction et signal_message
+        (mois précédent, mois courant et months_ahead mois à venir) et vide la
+        partition DEFAULT dans les partitions mensuelles
+        
+        Returns:
+            Noms des partitions créées
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT maintain_monthly_partitions(%s)", (months_ahead,))
+            created = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return created
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def rebuild_daily_spending(self, from_date: Optional[str] = None,
+                               to_date: Optional[str] = None) -> int:
+        """
+        Recalcule daily_spending depuis transaction sur une plage de dates
+        (tout l'historique par défaut), par exemple après une reprise de données
+        
+        Args:
+            from_date: Première date incluse (YYYY-MM-DD), None = sans borne
+            to_date: Dernière date incluse (YYYY-MM-DD), None = sans borne
+        
+        Returns:
+            Nombre de lignes d'agrégats écrites
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT rebuild_daily_spending(%s, %s)", (from_date, to_date))
+            rows = cursor.fetchone()[0]
+            conn.commit()
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def rebuild_category_spending(self, from_date: Optional[str] = None,
+                                  to_date: Optional[str] = None) -> int:
+        """
+        Recalcule le cube category_spending (jour, mois, année) depuis les
+        articles ; les mois et années qui touchent la plage sont recalculés
+        en entier
+        
+        Args:
+            from_date: Première date incluse (YYYY-MM-DD), None = sans borne
+            to_date: Dernière date incluse (YYYY-MM-DD), None = sans borne
+        
+        Returns:
+            Nombre de lignes du cube écrites
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT rebuild_category_spending(%s, %s)", (from_date, to_date))
+            rows = cursor.fetchone()[0]
+            conn.commit()
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def record_price_observations(self, transaction_ids: Optional[List[int]] = None,
+                                  product_dictionary: Optional[ProductDictionary] = None,
+                                  batch_size: int = 10000) -> int:
+        """
+        Réécrit les observations de prix (product_price_observation) des
+        articles des transactions données
+        
+        Args:
+            transaction_ids: Transactions à traiter, None = tout l'historique
+            product_dictionary: Dictionnaire de produits (produit canonique),
+                None = libellé du ticket
+            batch_size: Articles lus et écrits par lot (curseur côté serveur)
+        
+        Returns:
+            Nombre d'observations écrites
+        """
+        if transaction_ids is not None and not transaction_ids:
+            return 0
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        items_cursor = conn.cursor(name="price_observation_items")
+        
+        try:
+            if transaction_ids is None:
+                cursor.execute("DELETE FROM product_price_observation")
+                condition, params = "TRUE", ()
+            else:
+                cursor.execute("DELETE FROM product_price_observation WHERE transaction_id = ANY(%s)",
+                               (list(transaction_ids),))
+                condition, params = "t.transaction_id = ANY(%s)", (list(transaction_ids),)
             
-            # Insérer les liens transaction_attachment_mapping
-            if attachment_ids:
-                for attachment_id in attachment_ids:
-                    cursor.execute("""
-                        INSERT INTO transaction_attachment_mapping (transaction_id, attachment_id)
-                        VALUES (%s, %s)
-                        ON CONFLICT DO NOTHING
-                    """, (transaction_id, attachment_id))
-                print(f"   📎 {len(attachment_ids)} attachment(s) lié(s) à la transaction")
+            items_cursor.execute(f"""
+                SELECT i.item_id, t.transaction_id, t.store_id, s.store_name, t.transaction_date, t.currency,
+                       i.product_name, i.brand, i.quantity, i.unit_price
+                FROM transaction t
+                JOIN item i ON i.transaction_id = t.transaction_id
+                JOIN store s ON s.store_id = t.store_id
+                WHERE {condition}
+            """, params)
+            
+            recorded = 0
+            while True:
+                rows = items_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                observations = []
+                for (item_id, transaction_id, store_id, store_name, transaction_date, currency,
+                     product_name, brand, quantity, unit_price) in rows:
+                    observation = observe(product_name, brand, quantity, unit_price, store_name, product_dictionary)
+                    if observation is None:
+                        continue
+                    observations.append((
+                        item_id, transaction_id, observation.product_key[:500], observation.product_name[:500],
+                        observation.brand, store_id, transaction_date, currency, observation.unit_price,
+                        quantity, observation.package_size, observation.quantity_unit, observation.price_per_unit
+                    ))
+                if observations:
+                    # Lignes écartées par ON CONFLICT non comptées (rowcount ne couvre que la dernière page)
+                    inserted = psycopg2.extras.execute_values(cursor, """
+                        INSERT INTO product_price_observation
+                            (item_id, transaction_id, product_key, product_name, brand, store_id, observed_on,
+                             currency, unit_price, quantity, package_size, quantity_unit, price_per_unit)
+                        VALUES %s
+                        ON CONFLICT (item_id) DO NOTHING
+                        RETURNING item_id
+                    """, observations, page_size=1000, fetch=True)
+                    recorded += len(inserted)
             
+            # Curseur nommé : à fermer avant la fin de la transaction
+            items_cursor.close()
             conn.commit()
-            print(f"✅ Ticket inséré : transaction_id={transaction_id}, {len(receipt_data.items)} articles")
-            return transaction_id
+            return recorded
+        except Exception:
+            try:
+                items_cursor.close()
+            except psycopg2.Error:
+                # Transaction en échec : le curseur disparaît avec le ROLLBACK,
+                # l'erreur d'origine ne doit pas être masquée
+                pass
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def learn_product_dictionary(self, min_occurrences: int = 2) -> int:
+        """
+        Recalcule les entrées apprises de product_dictionary à partir des
+        articles déjà extraits (les entrées 'manual' ne sont jamais écrasées)
+        
+        Les articles en attente de revue de catégorie sont ignorés.
+        
+        Args:
+            min_occurrences: Nombre minimal d'articles pour apprendre un produit
+        
+        Returns:
+            Nombre d'entrées apprises
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT i.product_name, i.brand, s.store_name, c.category_main, c.category_sub, COUNT(*)
+                FROM item i
+                JOIN item_category c ON i.category_id = c.category_id
+                JOIN transaction t ON i.transaction_id = t.transaction_id
+                JOIN store s ON t.store_id = s.store_id
+                WHERE i.proposed_category_main IS NULL
+                GROUP BY i.product_name, i.brand, s.store_name, c.category_main, c.category_sub
+            """)
+            entries = ProductDictionary.learn(cursor.fetchall(), min_occurrences=min_occurrences)
             
-        except Exception as e:
+            cursor.execute("DELETE FROM product_dictionary WHERE source = 'learned'")
+            psycopg2.extras.execute_values(cursor, """
+                INSERT INTO product_dictionary
+                    (normalized_name, store_key, canonical_name, brand, category_id, occurrences)
+                SELECT e.normalized_name, e.store_key, e.canonical_name, e.brand, c.category_id, e.occurrences
+                FROM (VALUES %s) AS e(normalized_name, store_key, canonical_name, brand,
+                                      category_main, category_sub, occurrences)
+                JOIN item_category c ON c.category_main = e.category_main AND c.category_sub = e.category_sub
+                ON CONFLICT (normalized_name, store_key) DO NOTHING
+            """, [
+                (name_key, store_key, entry.canonical_name[:500], entry.brand,
+                 entry.category_main, entry.category_sub, entry.occurrences)
+                for name_key, store_key, entry in entries
+            ], page_size=1000)
+            
+            conn.commit()
+            return len(entries)
+        except Exception:
             conn.rollback()
-            print(f"❌ Erreur lors de l'insertion du ticket : {e}")
             raise
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
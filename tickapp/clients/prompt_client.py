@@ -2,18 +2,48 @@
 """
 Client pour générer des prompts dynamiques à partir de la base de données
 """
+import hashlib
+import json
 import psycopg2
+import threading
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from ..transformers.category_matcher import CategoryMatcher
+from ..transformers.product_dictionary import ProductDictionary, ProductEntry
+
+
+DEFAULT_TEMPLATE_PATH = Path(__file__).parent.parent / "prompts" / "tickets.txt"
+VERIFICATION_TEMPLATE_PATH = Path(__file__).parent.parent / "prompts" / "verification.txt"
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """Prompt rendu et ce qui l'a produit"""
+    text: str
+    version: str  # Hash court du texte, enregistré dans transaction.prompt_version
+    catalog_version: int  # Compteur catalog_version('categories') au rendu
+    template_mtime_ns: int
 
 
 class PromptClient:
     """
     Client pour générer des prompts dynamiques en remplaçant des placeholders
     par des données de la base de données
+    
+    Le prompt rendu est gardé en cache (partagé entre instances du processus)
+    tant que les catégories en base et le template n'ont pas changé.
     """
     
+    PROMPT_VERSION_LENGTH = 16
+    
+    _cache: Dict[Tuple, RenderedPrompt] = {}
+    _matcher_cache: Dict[Tuple, Tuple[int, CategoryMatcher]] = {}
+    _dictionary_cache: Dict[Tuple, Tuple[int, ProductDictionary]] = {}
+    _cache_lock = threading.Lock()
+    
     def __init__(self, host: str = "localhost", port: int = 5433, 
                  database: str = "receipt_processing", 
                  user: str = "receipt_user", 
@@ -62,83 +92,120 @@ class PromptClient:
                     raise
         raise last_error
     
-    def _get_item_categories(self) -> str:
+    def _get_item_categories(self, cursor) -> str:
         """
         Récupère toutes les catégories d'items formatées pour le prompt
         
         Returns:
             String formatée avec toutes les catégories d'items
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        # Récupérer toutes les catégories actives, groupées par category_main
+        cursor.execute("""
+            SELECT category_main, category_sub, description
+            FROM item_category
+            WHERE active = TRUE
+            ORDER BY category_main, category_sub
+        """)
         
-        try:
-            # Récupérer toutes les catégories actives, groupées par category_main
-            cursor.execute("""
-                SELECT category_main, category_sub, description
-                FROM item_category
-                WHERE active = TRUE
-                ORDER BY category_main, category_sub
-            """)
-            
-            categories = cursor.fetchall()
-            
-            if not categories:
-                return "Aucune catégorie disponible."
-            
-            # Grouper par category_main
-            grouped = {}
-            for main, sub, desc in categories:
-                if main not in grouped:
-                    grouped[main] = []
-                grouped[main].append((sub, desc))
-            
-            # Formater pour le prompt
-            lines = []
-            current_group = None
-            for main in sorted(grouped.keys()):
-                # Ajouter un saut de ligne entre les groupes principaux
-                if current_group is not None:
-                    lines.append("")
-                lines.append(f"   {main}:")
-                for sub, desc in grouped[main]:
-                    lines.append(f"      - {sub}")
-                current_group = main
-            
-            return "\n".join(lines)
-            
-        finally:
-            cursor.close()
-            conn.close()
+        categories = cursor.fetchall()
+        
+        if not categories:
+            return "Aucune catégorie disponible."
+        
+        # Grouper par category_main
+        grouped = {}
+        for main, sub, desc in categories:
+            if main not in grouped:
+                grouped[main] = []
+            grouped[main].append((sub, desc))
+        
+        # Formater pour le prompt
+        lines = []
+        current_group = None
+        for main in sorted(grouped.keys()):
+            # Ajouter un saut de ligne entre les groupes principaux
+            if current_group is not None:
+                lines.append("")
+            lines.append(f"   {main}:")
+            for sub, desc in grouped[main]:
+                lines.append(f"      - {sub}")
+            current_group = main
+        
+        return "\n".join(lines)
     
-    def _get_transaction_categories(self) -> str:
+    def _get_transaction_categories(self, cursor) -> str:
         """
         Récupère toutes les catégories de transaction formatées pour le prompt
         
         Returns:
             String formatée avec toutes les catégories de transaction (ID et nom)
         """
+        cursor.execute("""
+            SELECT category_id, name
+            FROM transaction_category
+            ORDER BY category_id
+        """)
+        
+        categories = cursor.fetchall()
+        
+        if not categories:
+            return "Aucune catégorie de transaction disponible."
+        
+        # Formater pour le prompt
+        lines = []
+        for cat_id, name in categories:
+            lines.append(f"   - ID {cat_id}: {name}")
+        
+        return "\n".join(lines)
+    
+    def get_prompt(self, prompt_template_path: Optional[Path] = None) -> RenderedPrompt:
+        """
+        Retourne le prompt rendu et sa version, depuis le cache si les
+        catégories (compteur catalog_version) et le template (mtime) n'ont pas changé
+        
+        Args:
+            prompt_template_path: Chemin vers le fichier template (défaut: tickets.txt)
+        
+        Returns:
+            RenderedPrompt (texte et version)
+        """
+        template_path = Path(prompt_template_path or DEFAULT_TEMPLATE_PATH)
+        template_mtime_ns = template_path.stat().st_mtime_ns
+        cache_key = (self.conn_params["host"], self.conn_params["port"],
+                     self.conn_params["database"], str(template_path.resolve()))
+        
         conn = self._get_connection()
+        # Compteur et catégories lus dans le même snapshot
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                SELECT category_id, name
-                FROM transaction_category
-                ORDER BY category_id
-            """)
+            cursor.execute("SELECT version FROM catalog_version WHERE catalog = 'categories'")
+            catalog_version = cursor.fetchone()[0]
             
-            categories = cursor.fetchall()
+            cached = self._cache.get(cache_key)
+            if (cached is not None
+                    and cached.catalog_version == catalog_version
+                    and cached.template_mtime_ns == template_mtime_ns):
+                return cached
             
-            if not categories:
-                return "Aucune catégorie de transaction disponible."
+            # Lire le template
+            with open(template_path, "r", encoding="utf-8") as f:
+                template = f.read()
             
-            # Formater pour le prompt
-            lines = []
-            for cat_id, name in categories:
-                lines.append(f"   - ID {cat_id}: {name}")
+            # Remplacer les placeholders
+            prompt = template.replace("[item_categories]", self._get_item_categories(cursor))
+            prompt = prompt.replace("[transaction_categories]", self._get_transaction_categories(cursor))
             
-            return "\n".join(lines)
+            rendered = RenderedPrompt(
+                text=prompt,
+                version=hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:self.PROMPT_VERSION_LENGTH],
+                catalog_version=catalog_version,
+                template_mtime_ns=template_mtime_ns
+            )
+            with self._cache_lock:
+                self._cache[cache_key] = rendered
+            return rendered
             
         finally:
             cursor.close()
@@ -154,22 +221,32 @@ class PromptClient:
         Returns:
             Le prompt avec les placeholders remplacés
         """
-        if prompt_template_path is None:
-            # Chemin par défaut
-            prompt_template_path = Path(__file__).parent.parent / "prompts" / "tickets.txt"
+        return self.get_prompt(prompt_template_path).text
+    
+    @staticmethod
+    def generate_verification_prompt(claude_json: Dict, issues: List[str],
+                                     prompt_template_path: Optional[Path] = None) -> str:
+        """
+        Prompt de ré-extraction ciblée : l'extraction précédente et les
+        problèmes relevés par DataValidator.check_extraction
         
-        # Lire le template
-        with open(prompt_template_path, "r", encoding="utf-8") as f:
+        Args:
+            claude_json: Extraction à corriger
+            issues: Problèmes de cohérence à corriger
+            prompt_template_path: Chemin vers le fichier template (défaut: verification.txt)
+        """
+        with open(prompt_template_path or VERIFICATION_TEMPLATE_PATH, "r", encoding="utf-8") as f:
             template = f.read()
-        
-        # Remplacer les placeholders
-        item_categories = self._get_item_categories()
-        transaction_categories = self._get_transaction_categories()
-        
-        prompt = template.replace("[item_categories]", item_categories)
-        prompt = prompt.replace("[transaction_categories]", transaction_categories)
-        
-        return prompt
+        prompt = template.replace("[extraction]", json.dumps(claude_json, ensure_ascii=False, indent=2))
+        return prompt.replace("[issues]", "\n".join(f"- {issue}" for issue in issues))
+    
+    @classmethod
+    def clear_cache(cls):
+        """Vide le cache des prompts, matchers et dictionnaires (tous les clients du processus)"""
+        with cls._cache_lock:
+            cls._cache.clear()
+            cls._matcher_cache.clear()
+            cls._dictionary_cache.clear()
     
     def get_item_categories_list(self) -> list:
         """
@@ -193,59 +270,92 @@ class PromptClient:
             cursor.close()
             conn.close()
     
-    def find_closest_category(self, category_name: str, subcategory_name: Optional[str] = None) -> Optional[tuple]:
+    def get_category_matcher(self) -> CategoryMatcher:
         """
-        Trouve la catégorie la plus proche/similaire
+        Retourne un CategoryMatcher sur les catégories actives, reconstruit
+        seulement quand le compteur catalog_version('categories') change
         
-        Args:
-            category_name: Nom de la catégorie recherchée
-            subcategory_name: Nom de la sous-catégorie recherchée (optionnel)
+        Returns:
+            CategoryMatcher partagé entre instances du processus
+        """
+        cache_key = (self.conn_params["host"], self.conn_params["port"], self.conn_params["database"])
+        
+        conn = self._get_connection()
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT version FROM catalog_version WHERE catalog = 'categories'")
+            catalog_version = cursor.fetchone()[0]
+            
+            cached = self._matcher_cache.get(cache_key)
+            if cached is not None and cached[0] == catalog_version:
+                return cached[1]
+            
+            cursor.execute("""
+                SELECT category_main, category_sub
+                FROM item_category
+                WHERE active = TRUE
+            """)
+            matcher = CategoryMatcher(cursor.fetchall())
+            with self._cache_lock:
+                self._matcher_cache[cache_key] = (catalog_version, matcher)
+            return matcher
+            
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def get_product_dictionary(self) -> ProductDictionary:
+        """
+        Retourne le dictionnaire de produits (product_dictionary) en mémoire,
+        rechargé seulement quand le compteur catalog_version('products') change
         
         Returns:
-            Tuple (category_main, category_sub) ou None si aucune correspondance
+            ProductDictionary partagé entre instances du processus
         """
-        import difflib
+        cache_key = (self.conn_params["host"], self.conn_params["port"], self.conn_params["database"])
         
-        categories = self.get_item_categories_list()
+        conn = self._get_connection()
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        cursor = conn.cursor()
         
-        if not categories:
-            return None
-        
-        # Normaliser les noms
-        category_name_lower = category_name.lower().strip()
-        subcategory_name_lower = subcategory_name.lower().strip() if subcategory_name else None
-        
-        # Chercher une correspondance exacte d'abord
-        for main, sub in categories:
-            if main.lower() == category_name_lower:
-                if subcategory_name_lower and sub.lower() == subcategory_name_lower:
-                    return (main, sub)
-                elif not subcategory_name_lower:
-                    # Si pas de sous-catégorie spécifiée, retourner la première correspondance
-                    return (main, sub)
-        
-        # Si pas de correspondance exacte, chercher la plus similaire
-        best_match = None
-        best_score = 0.0
-        
-        for main, sub in categories:
-            # Score pour category_main
-            main_score = difflib.SequenceMatcher(None, category_name_lower, main.lower()).ratio()
+        try:
+            cursor.execute("SELECT version FROM catalog_version WHERE catalog = 'products'")
+            products_version = cursor.fetchone()[0]
+            
+            cached = self._dictionary_cache.get(cache_key)
+            if cached is not None and cached[0] == products_version:
+                return cached[1]
             
-            # Score pour category_sub si fourni
-            if subcategory_name_lower:
-                sub_score = difflib.SequenceMatcher(None, subcategory_name_lower, sub.lower()).ratio()
-                total_score = (main_score * 0.6) + (sub_score * 0.4)  # Poids pour main et sub
-            else:
-                total_score = main_score
+            cursor.execute("""
+                SELECT p.normalized_name, p.store_key, p.canonical_name, p.brand,
+                       c.category_main, c.category_sub, p.occurrences
+                FROM product_dictionary p
+                JOIN item_category c ON p.category_id = c.category_id
+                WHERE c.active = TRUE
+            """)
+            dictionary = ProductDictionary(
+                (normalized_name, store_key, ProductEntry(canonical_name, brand, main, sub, occurrences))
+                for normalized_name, store_key, canonical_name, brand, main, sub, occurrences in cursor
+            )
+            with self._cache_lock:
+                self._dictionary_cache[cache_key] = (products_version, dictionary)
+            return dictionary
             
-            if total_score > best_score:
-                best_score = total_score
-                best_match = (main, sub)
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def find_closest_category(self, category_name: str, subcategory_name: Optional[str] = None) -> Optional[tuple]:
+        """
+        Trouve la catégorie la plus proche/similaire
         
-        # Retourner seulement si le score est raisonnable (> 0.5)
-        if best_score > 0.5:
-            return best_match
+        Args:
+            category_name: Nom de la catégorie recherchée
+            subcategory_name: Nom de la sous-catégorie recherchée (optionnel)
         
-        return None
-
+        Returns:
+            Tuple (category_main, category_sub) ou None si aucune correspondance
+        """
+        return self.get_category_matcher().match(category_name, subcategory_name)
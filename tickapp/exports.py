@@ -0,0 +1,139 @@
+# tickapp/exports.py
+"""
+Export des transactions et articles en Parquet, CSV ou Arrow IPC
+
+Les lignes sont lues par lots avec un curseur côté serveur
+(DatabaseClient.iter_dataset_rows) et chaque lot est écrit puis libéré :
+la mémoire dépend de batch_size, pas de la taille de l'export.
+
+Les colonnes sont celles des datasets de tickapp.snapshots. Un export
+incrémental ne contient que les transactions (et leurs articles) dont le
+transaction_id dépasse le watermark de l'export précédent ; le watermark
+retourné est le plus grand transaction_id exporté.
+
+Les transaction_id sont attribués à l'insertion, pas au COMMIT : un ticket
+d'ID plus petit peut devenir visible après un ID plus grand déjà exporté.
+L'export s'arrête donc à until_transaction_id, l'horizon au-delà duquel
+aucune insertion n'est encore en cours
+(DatabaseClient.get_committed_transaction_horizon).
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from .snapshots import SNAPSHOT_SCHEMAS, to_table
+
+
+EXPORT_FORMATS = {
+    "parquet": ".parquet",
+    "csv": ".csv",
+    "arrow": ".arrow",
+}
+
+
+@dataclass
+class ExportFilters:
+    """Filtres d'un export (vides = pas de filtre)"""
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    stores: List[str] = field(default_factory=list)
+    groups: List[str] = field(default_factory=list)        # Catégories de transaction
+    categories: List[str] = field(default_factory=list)    # Catégories principales d'articles
+    since_transaction_id: Optional[int] = None             # Watermark de l'export précédent
+    until_transaction_id: Optional[int] = None             # Horizon des transactions validées
+
+    def scope(self) -> str:
+        """
+        Filtres de sélection, sans les bornes de transaction_id : un watermark
+        n'est valable que pour un export de même périmètre
+        """
+        return json.dumps({
+            "from_date": self.from_date.isoformat() if self.from_date else None,
+            "to_date": self.to_date.isoformat() if self.to_date else None,
+            "stores": sorted(self.stores),
+            "groups": sorted(self.groups),
+            "categories": sorted(self.categories),
+        }, sort_keys=True, ensure_ascii=False)
+
+
+@dataclass
+class ExportResult:
+    """Résultat d'un export"""
+    path: Path
+    rows: int
+    batches: int
+    watermark: Optional[int]  # Plus grand transaction_id exporté (None si export vide)
+
+
+def _open_writer(path: Path, export_format: str, schema: pa.Schema):
+    if export_format == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    if export_format == "csv":
+        return pa_csv.CSVWriter(path, schema)
+    if export_format == "arrow":
+        return pa.ipc.new_file(path, schema)
+    raise ValueError(f"Format d'export inconnu: {export_format} (formats: {', '.join(EXPORT_FORMATS)})")
+
+
+def export_dataset(db_client, dataset: str, path: Path, export_format: str = "parquet",
+                   filters: Optional[ExportFilters] = None, batch_size: int = 10000) -> ExportResult:
+    """
+    Exporte un dataset ('transactions' ou 'items') dans un fichier
+
+    Le fichier est écrit à côté puis renommé : un export interrompu ne laisse
+    pas de fichier partiel.
+
+    Args:
+        db_client: DatabaseClient
+        path: Fichier de destination
+        export_format: 'parquet', 'csv' ou 'arrow' (Arrow IPC)
+        batch_size: Lignes lues et écrites par lot (groupe de lignes Parquet)
+
+    Raises:
+        ValueError: Dataset ou format inconnu
+    """
+    if dataset not in SNAPSHOT_SCHEMAS:
+        raise ValueError(f"Dataset inconnu: {dataset} (datasets: {', '.join(SNAPSHOT_SCHEMAS)})")
+    filters = filters or ExportFilters()
+    schema = SNAPSHOT_SCHEMAS[dataset]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+    rows = batches = 0
+    watermark = None
+    writer = _open_writer(tmp_path, export_format, schema)
+    try:
+        for batch in db_client.iter_dataset_rows(
+            dataset,
+            batch_size=batch_size,
+            from_date=filters.from_date,
+            to_date=filters.to_date,
+            stores=filters.stores,
+            groups=filters.groups,
+            categories=filters.categories,
+            since_transaction_id=filters.since_transaction_id,
+            until_transaction_id=filters.until_transaction_id,
+        ):
+            table = to_table(dataset, batch)
+            writer.write_table(table)
+            batch_max = pc.max(table.column("transaction_id")).as_py()
+            watermark = batch_max if watermark is None else max(watermark, batch_max)
+            rows += len(batch)
+            batches += 1
+        writer.close()
+    except BaseException:
+        writer.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, path)
+    return ExportResult(path=path, rows=rows, batches=batches, watermark=watermark)
@@ -0,0 +1,89 @@
+# tickapp/io_managers.py
+"""
+IO managers Dagster du pipeline
+"""
+import hashlib
+import os
+from typing import Any
+
+from dagster import ConfigurableIOManager, InputContext, OutputContext
+
+from tickapp import serialization
+from tickapp.clients.database_client import DatabaseClient
+from tickapp.clients.signal_client import Message
+
+
+class MessageIOManager(ConfigurableIOManager):
+    """
+    Stocke les sorties des assets du pipeline par message dans la table
+    asset_output, une ligne par (message_id, asset), au lieu du pickle de
+    l'IO manager par défaut
+
+    - Les sorties sont sérialisées en msgpack compact (tickapp.serialization)
+      avec leur version de schéma et un hash SHA-256
+    - Un Message Signal n'est pas recopié : il est déjà en base, seule sa
+      référence est gardée et il est relu par DatabaseClient.get_signal_message
+    - Une sortie n'est relue en base que quand un asset aval la charge
+
+    Le message est identifié par la clé de partition (partitions dynamiques
+    signal_message).
+    """
+
+    @staticmethod
+    def _get_db_client() -> DatabaseClient:
+        return DatabaseClient(
+            host=os.getenv("DB_HOST", "localhost"),
+            port=int(os.getenv("DB_PORT", "5434")),
+            database=os.getenv("DB_NAME", "receipt_processing"),
+            user=os.getenv("DB_USER", "receipt_user"),
+            password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+        )
+
+    @staticmethod
+    def _get_message_id(context) -> int:
+        if not context.has_partition_key:
+            raise ValueError("MessageIOManager ne gère que les assets partitionnés par message")
+        return int(context.partition_key)
+
+    def handle_output(self, context: OutputContext, obj: Any) -> None:
+        if obj is None:
+            return
+        message_id = self._get_message_id(context)
+        asset_key = context.asset_key.to_user_string()
+
+        if isinstance(obj, Message):
+            payload = None
+            content_hash = hashlib.sha256(f"signal_message:{message_id}".encode()).hexdigest()
+        else:
+            payload = serialization.dumps(obj)
+            content_hash = hashlib.sha256(payload).hexdigest()
+
+        self._get_db_client().save_asset_output(
+            message_id=message_id,
+            asset_key=asset_key,
+            schema_version=serialization.SCHEMA_VERSION,
+            content_hash=content_hash,
+            payload=payload,
+            run_id=context.run_id
+        )
+        context.add_output_metadata({
+            "message_id": message_id,
+            "content_hash": content_hash,
+            "size_bytes": len(payload) if payload is not None else 0,
+        })
+
+    def load_input(self, context: InputContext) -> Any:
+        message_id = self._get_message_id(context)
+        asset_key = context.asset_key.to_user_string()
+        db_client = self._get_db_client()
+
+        output = db_client.get_asset_output(message_id, asset_key)
+        if output is None:
+            raise ValueError(f"Aucune sortie de {asset_key} pour le message {message_id}")
+        _, payload = output
+        if payload is None:
+            message = db_client.get_signal_message(message_id)
+            if message is None:
+                raise ValueError(f"Message {message_id} introuvable")
+            return message
+        return serialization.loads(payload)
@@ -12,8 +12,11 @@ from uuid import UUID
 # ============================================================================
 # MODELS RECEIPT (Magasins, Transactions, Articles)
 # ============================================================================
+# Classes à __slots__ : pas de __dict__ par instance, les gros lots de
+# backfill tiennent en mémoire. Sérialisées par position (tickapp.serialization) :
+# ajouter les nouveaux champs en fin de classe, avec une valeur par défaut.
 
-@dataclass
+@dataclass(slots=True)
 class Store:
     """Magasin"""
     store_name: str
@@ -23,7 +26,7 @@ class Store:
     country_code: Optional[str] = None
     phone: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     """Transaction (ticket de caisse)"""
     store_id: int  # Sera rempli après insertion du store
@@ -37,8 +40,9 @@ class Transaction:
     total: Decimal = None
     payment_method: Optional[str] = None
     source: str = "signal"
+    prompt_version: Optional[str] = None  # Version du prompt ayant produit l'extraction
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     """Article d'un ticket"""
     transaction_id: int  # Sera rempli après insertion de la transaction
@@ -52,8 +56,11 @@ class Item:
     category_main: str = None
     category_sub: str = None
     line_number: int = None
+    # Catégorie proposée par l'extraction quand elle est inconnue du référentiel (à revoir)
+    proposed_category_main: Optional[str] = None
+    proposed_category_sub: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Category:
     """Catégorie de dépense"""
     category_main: str
@@ -65,7 +72,7 @@ class Category:
 # MODELS COMPOSÉS (pour faciliter les retours de fonctions)
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ReceiptData:
     """Données complètes d'un ticket"""
     store: Store
@@ -2,7 +2,7 @@
 """
 Sensor Dagster pour détecter les nouveaux messages Signal et déclencher le pipeline
 """
-from dagster import sensor, SensorEvaluationContext, RunRequest, SkipReason
+from dagster import sensor, SensorEvaluationContext, SensorResult, RunRequest, SkipReason
 from typing import List, Optional
 import os
 from datetime import datetime
@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 
 from tickapp.clients.signal_client import SignalClient, Message, SignalCLINotFound
 from tickapp.clients.database_client import DatabaseClient
+from tickapp.assets.message_pipeline import signal_message_partitions
 
 load_dotenv()
 
@@ -108,15 +109,6 @@ def get_new_messages(context: SensorEvaluationContext) -> List[tuple]:
         )
     ]
     
-    # Vérifier quels messages sont déjà en base de données
-    db_client = DatabaseClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "5434")),
-        database=os.getenv("DB_NAME", "receipt_processing"),
-        user=os.getenv("DB_USER", "receipt_user"),
-        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
-    )
-    
     # Helper function pour connexion avec retry
     def get_db_connection(max_retries=3, retry_delay=1.0):
         import psycopg2
@@ -180,6 +172,60 @@ def get_new_messages(context: SensorEvaluationContext) -> List[tuple]:
     return new_messages
 
 
+def get_db_client() -> DatabaseClient:
+    return DatabaseClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+
+
+def build_sensor_result(context: SensorEvaluationContext, new_messages: List[tuple],
+                        run_key_prefix: str, extra_tags: Optional[dict] = None) -> Optional[SensorResult]:
+    """
+    Insère les nouveaux messages en base, puis ajoute une partition et crée
+    un run pour chaque message confié au pipeline par message
+    (DatabaseClient.assign_partition_messages) qui n'a pas encore de partition
+    
+    Les runs sont déduits de la base et non des messages insérés : si un tick
+    échoue après l'insertion, le tick suivant crée quand même leurs runs. Un
+    message déjà en base n'est pas réinséré, et un message déjà en file
+    receipt_job est laissé aux workers.
+    
+    Le run ne reçoit que la clé de partition (message_id) : les assets
+    relisent le message en base.
+    
+    Returns:
+        SensorResult, ou None s'il n'y a aucun message à traiter
+    """
+    db_client = get_db_client()
+    for message, message_json in new_messages:
+        if db_client.find_signal_message_id(message) is None:
+            db_client.insert_signal_message(message)
+    
+    registered = set(context.instance.get_dynamic_partitions(signal_message_partitions.name))
+    message_ids = [
+        str(message_id) for message_id in db_client.assign_partition_messages()
+        if str(message_id) not in registered
+    ]
+    if not message_ids:
+        return None
+    
+    return SensorResult(
+        run_requests=[
+            RunRequest(
+                run_key=f"{run_key_prefix}_{message_id}",
+                partition_key=message_id,
+                tags=extra_tags or {}
+            )
+            for message_id in message_ids
+        ],
+        dynamic_partitions_requests=[signal_message_partitions.build_add_request(message_ids)]
+    )
+
+
 @sensor(
     name="signal_message_sensor",
     job_name="process_signal_message",
@@ -207,72 +253,14 @@ def signal_message_sensor(context: SensorEvaluationContext):
     context.log.info("🔍 Vérification des nouveaux messages Signal...")
     
     new_messages = get_new_messages(context)
+    if new_messages:
+        context.log.info(f"📨 {len(new_messages)} nouveau(x) message(s) détecté(s)")
     
-    if not new_messages:
+    result = build_sensor_result(context, new_messages, "signal_message")
+    if result is None:
         return SkipReason("Aucun nouveau message avec image de ticket trouvé")
     
-    context.log.info(f"📨 {len(new_messages)} nouveau(x) message(s) détecté(s)")
-    
-    # Créer un RunRequest pour chaque nouveau message
-    import json
-    run_requests = []
-    for message, message_json in new_messages:
-        # Créer un identifiant unique pour ce message (basé sur timestamp + sender)
-        message_id = f"{message.timestamp.isoformat()}_{message.sender.uuid or message.sender.number or 'unknown'}"
-        
-        # Récupérer le groupe si disponible
-        group_id = None
-        group_name = None
-        if message.group:
-            group_id = message.group.id
-            group_name = message.group.name
-        
-        # Sérialiser les chemins des attachments (le message a déjà été téléchargé par le sensor)
-        attachment_paths = []
-        if message.attachments:
-            for att in message.attachments:
-                if att.path:
-                    attachment_paths.append({
-                        "path": str(att.path),
-                        "content_type": att.content_type,
-                        "filename": att.filename,
-                        "id": att.id
-                    })
-        
-        run_requests.append(
-            RunRequest(
-                run_key=f"signal_message_{message_id}",
-                run_config={
-                    "ops": {
-                        "message_from_signal": {
-                            "config": {
-                                "message_timestamp": message.timestamp.isoformat(),
-                                "sender_uuid": str(message.sender.uuid) if message.sender.uuid else None,
-                                "sender_number": message.sender.number or None,
-                            }
-                        }
-                    }
-                },
-                job_name="process_signal_message",
-                tags={
-                    # Tags essentiels pour retrouver le message
-                    "message_timestamp": message.timestamp.isoformat(),
-                    "sender_uuid": str(message.sender.uuid) if message.sender.uuid else "",
-                    "sender_number": message.sender.number or "",
-                    "sender_name": message.sender.name or "",
-                    # Tags pour les notifications
-                    "group_id": group_id or "",
-                    "group_name": group_name or "",
-                    # Tags pour les attachments
-                    "attachment_paths": json.dumps(attachment_paths),
-                    # Tags optionnels pour les logs
-                    "message_text": message.text or "",
-                    "is_group_message": str(message.is_group_message),
-                }
-            )
-        )
-    
-    return run_requests
+    return result
 
 
 @sensor(
@@ -295,71 +283,13 @@ def signal_message_sensor_test(context: SensorEvaluationContext):
     context.log.info("🧪 [TEST] Vérification des nouveaux messages Signal...")
     
     new_messages = get_new_messages(context)
+    if new_messages:
+        context.log.info(f"🧪 [TEST] {len(new_messages)} nouveau(x) message(s) détecté(s)")
     
-    if not new_messages:
+    # Tag pour identifier les runs de test
+    result = build_sensor_result(context, new_messages, "signal_message_test", extra_tags={"test_mode": "true"})
+    if result is None:
         return SkipReason("🧪 [TEST] Aucun nouveau message avec image de ticket trouvé")
     
-    context.log.info(f"🧪 [TEST] {len(new_messages)} nouveau(x) message(s) détecté(s)")
-    
-    # Créer un RunRequest pour chaque nouveau message
-    import json
-    run_requests = []
-    for message, message_json in new_messages:
-        # Créer un identifiant unique pour ce message (basé sur timestamp + sender)
-        message_id = f"{message.timestamp.isoformat()}_{message.sender.uuid or message.sender.number or 'unknown'}"
-        
-        # Récupérer le groupe si disponible
-        group_id = None
-        group_name = None
-        if message.group:
-            group_id = message.group.id
-            group_name = message.group.name
-        
-        # Sérialiser les chemins des attachments (le message a déjà été téléchargé par le sensor)
-        attachment_paths = []
-        if message.attachments:
-            for att in message.attachments:
-                if att.path:
-                    attachment_paths.append({
-                        "path": str(att.path),
-                        "content_type": att.content_type,
-                        "filename": att.filename,
-                        "id": att.id
-                    })
-        
-        run_requests.append(
-            RunRequest(
-                run_key=f"signal_message_test_{message_id}",
-                run_config={
-                    "ops": {
-                        "message_from_signal": {
-                            "config": {
-                                "message_timestamp": message.timestamp.isoformat(),
-                                "sender_uuid": str(message.sender.uuid) if message.sender.uuid else None,
-                                "sender_number": message.sender.number or None,
-                            }
-                        }
-                    }
-                },
-                job_name="process_signal_message",
-                tags={
-                    # Tags essentiels pour retrouver le message
-                    "message_timestamp": message.timestamp.isoformat(),
-                    "sender_uuid": str(message.sender.uuid) if message.sender.uuid else "",
-                    "sender_number": message.sender.number or "",
-                    "sender_name": message.sender.name or "",
-                    # Tags pour les notifications
-                    "group_id": group_id or "",
-                    "group_name": group_name or "",
-                    # Tags pour les attachments
-                    "attachment_paths": json.dumps(attachment_paths),
-                    # Tags optionnels pour les logs
-                    "message_text": message.text or "",
-                    "is_group_message": str(message.is_group_message),
-                    "test_mode": "true",  # Tag pour identifier les runs de test
-                }
-            )
-        )
-    
-    return run_requests
+    return result
 
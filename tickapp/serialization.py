@@ -0,0 +1,111 @@
+# tickapp/serialization.py
+"""
+Sérialisation compacte (msgpack) des modèles de ticket
+
+Les modèles sont encodés par position (liste des valeurs des champs, sans
+leurs noms) dans des types d'extension msgpack ; Decimal, date, time et
+datetime sont encodés en texte ISO. Chaque payload commence par
+SCHEMA_VERSION.
+
+Compatibilité : un payload d'une version antérieure se relit tant que les
+nouveaux champs sont ajoutés en fin de classe avec une valeur par défaut.
+Renommer, retirer ou réordonner un champ impose d'incrémenter SCHEMA_VERSION.
+"""
+from dataclasses import fields
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Tuple, Type
+
+import msgpack
+
+from .models import Category, Item, ReceiptData, Store, Transaction
+
+
+SCHEMA_VERSION = 1
+
+_DECIMAL = 1
+_DATE = 2
+_TIME = 3
+_DATETIME = 4
+_PATH = 5
+
+# Codes d'extension des modèles : ne jamais réattribuer un code existant
+_MODEL_CODES: Dict[Type, int] = {
+    Store: 10,
+    Transaction: 11,
+    Item: 12,
+    Category: 13,
+    ReceiptData: 14,
+}
+_MODELS_BY_CODE: Dict[int, Type] = {code: model for model, code in _MODEL_CODES.items()}
+_FIELD_NAMES: Dict[Type, Tuple[str, ...]] = {
+    model: tuple(f.name for f in fields(model)) for model in _MODEL_CODES
+}
+
+
+def _pack(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def _unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def _default(obj: Any) -> msgpack.ExtType:
+    """Encode les types que msgpack ne connaît pas"""
+    model_code = _MODEL_CODES.get(type(obj))
+    if model_code is not None:
+        return msgpack.ExtType(model_code, _pack([getattr(obj, name) for name in _FIELD_NAMES[type(obj)]]))
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_DECIMAL, str(obj).encode())
+    # datetime avant date : datetime est une sous-classe de date
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_DATE, obj.isoformat().encode())
+    if isinstance(obj, time):
+        return msgpack.ExtType(_TIME, obj.isoformat().encode())
+    if isinstance(obj, Path):
+        return msgpack.ExtType(_PATH, str(obj).encode())
+    raise TypeError(f"Type non sérialisable: {type(obj).__name__}")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    model = _MODELS_BY_CODE.get(code)
+    if model is not None:
+        return model(*_unpack(data))
+    if code == _DECIMAL:
+        return Decimal(data.decode())
+    if code == _DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _DATE:
+        return date.fromisoformat(data.decode())
+    if code == _TIME:
+        return time.fromisoformat(data.decode())
+    if code == _PATH:
+        return Path(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Sérialise un modèle, une liste de modèles ou un dictionnaire/une liste de
+    valeurs simples (pouvant contenir des modèles)
+    """
+    return _pack([SCHEMA_VERSION, obj])
+
+
+def loads(data: bytes) -> Any:
+    """
+    Désérialise un payload de dumps()
+
+    Raises:
+        ValueError: Payload d'une version de schéma plus récente
+    """
+    version, obj = _unpack(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"Version de schéma {version} non supportée (version courante: {SCHEMA_VERSION})"
+        )
+    return obj
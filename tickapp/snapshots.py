@@ -0,0 +1,164 @@
+# tickapp/snapshots.py
+"""
+Snapshots Parquet des transactions et articles pour le dashboard
+
+Les pages d'analyse lisent des fichiers colonnaires locaux au lieu
+d'interroger Postgres. Un dataset par table, une partition par mois
+(partitionnement Hive) :
+
+    <root>/transactions/month=2025-01/data.parquet
+    <root>/items/month=2025-01/data.parquet
+
+Un mois est toujours réécrit en entier (fichier temporaire puis os.replace) :
+un lecteur voit l'ancienne ou la nouvelle version, jamais un fichier partiel.
+Les schémas sont fixes pour que tous les mois se lisent comme un seul dataset.
+"""
+import os
+import shutil
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / "data" / "snapshots"
+
+SNAPSHOT_SCHEMAS: Dict[str, pa.Schema] = {
+    "transactions": pa.schema([
+        ("transaction_id", pa.int32()),
+        ("message_id", pa.int32()),
+        ("transaction_date", pa.date32()),
+        ("transaction_time", pa.time64("us")),
+        ("store_id", pa.int32()),
+        ("store_name", pa.string()),
+        ("city", pa.string()),
+        ("group", pa.string()),
+        ("currency", pa.string()),
+        ("total", pa.decimal128(10, 2)),
+        ("payment_method", pa.string()),
+        ("item_count", pa.int32()),
+    ]),
+    "items": pa.schema([
+        ("item_id", pa.int32()),
+        ("transaction_id", pa.int32()),
+        ("transaction_date", pa.date32()),
+        ("store_name", pa.string()),
+        ("product_name", pa.string()),
+        ("brand", pa.string()),
+        ("quantity", pa.decimal128(10, 3)),
+        ("unit_price", pa.decimal128(10, 2)),
+        ("total_price", pa.decimal128(10, 2)),
+        ("currency", pa.string()),
+        ("category_main", pa.string()),
+        ("category_sub", pa.string()),
+    ]),
+}
+
+DATA_FILE = "data.parquet"
+
+
+def month_key(month: date) -> str:
+    """Valeur de la partition d'un mois (YYYY-MM)"""
+    return f"{month.year:04d}-{month.month:02d}"
+
+
+def month_path(root: Path, dataset: str, month: date) -> Path:
+    """Fichier Parquet d'un mois d'un dataset"""
+    return Path(root) / dataset / f"month={month_key(month)}" / DATA_FILE
+
+
+def to_table(dataset: str, rows: List[tuple]) -> pa.Table:
+    """
+    Construit une table Arrow au schéma du dataset
+
+    Args:
+        rows: Lignes dans l'ordre des colonnes de SNAPSHOT_SCHEMAS[dataset]
+    """
+    schema = SNAPSHOT_SCHEMAS[dataset]
+    columns = list(zip(*rows)) if rows else [() for _ in schema]
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def write_month(root: Path, dataset: str, month: date, rows: List[tuple]) -> int:
+    """
+    Réécrit le fichier d'un mois ; le supprime si le mois n'a plus de lignes
+
+    Returns:
+        Nombre de lignes écrites
+    """
+    path = month_path(root, dataset, month)
+    if not rows:
+        if path.parent.exists():
+            shutil.rmtree(path.parent)
+        return 0
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{DATA_FILE}.{os.getpid()}.tmp")
+    pq.write_table(to_table(dataset, rows), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def snapshot_months(root: Path, dataset: str) -> List[date]:
+    """Mois présents dans un dataset"""
+    dataset_dir = Path(root) / dataset
+    if not dataset_dir.exists():
+        return []
+    months = []
+    for partition in dataset_dir.glob("month=*"):
+        year, month = partition.name.split("=", 1)[1].split("-")
+        months.append(date(int(year), int(month), 1))
+    return sorted(months)
+
+
+class SnapshotExporter:
+    """Exporte les mois de transactions et d'articles de la base en Parquet"""
+
+    def __init__(self, db_client, root: Optional[Path] = None):
+        """
+        Args:
+            db_client: DatabaseClient
+            root: Dossier des snapshots (SNAPSHOT_DIR, sinon data/snapshots)
+        """
+        self.db_client = db_client
+        self.root = Path(root or os.getenv("SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR)
+
+    def export_months(self, months: Iterable[date]) -> Dict[str, Dict[str, int]]:
+        """
+        Réécrit les mois donnés des deux datasets
+
+        Returns:
+            {mois: {dataset: nombre de lignes}}
+        """
+        exported = {}
+        for month in sorted({month.replace(day=1) for month in months}):
+            exported[month_key(month)] = {
+                "transactions": write_month(
+                    self.root, "transactions", month, self.db_client.get_snapshot_transactions(month)
+                ),
+                "items": write_month(
+                    self.root, "items", month, self.db_client.get_snapshot_items(month)
+                ),
+            }
+        return exported
+
+    def export_transactions(self, transaction_ids: List[int]) -> Dict[str, Dict[str, int]]:
+        """Réécrit les mois des transactions données (après l'insertion d'un ticket)"""
+        return self.export_months(self.db_client.get_transaction_months(transaction_ids))
+
+    def export_all(self) -> Dict[str, Dict[str, int]]:
+        """
+        Réécrit tous les mois en base et supprime ceux qui n'y sont plus
+        (rattrape les corrections et suppressions)
+        """
+        months = set(self.db_client.get_transaction_months())
+        stale = {
+            month for dataset in SNAPSHOT_SCHEMAS
+            for month in snapshot_months(self.root, dataset)
+        } - months
+        return self.export_months(months | stale)
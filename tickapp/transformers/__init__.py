@@ -1,4 +1,5 @@
 # tickapp/transformers/__init__.py
-from .receipt_transformer import ReceiptTransformer
+from .receipt_transformer import ReceiptTransformer, BatchTransformResult
+from .category_matcher import CategoryMatcher
 
-__all__ = ['ReceiptTransformer']
\ No newline at end of file
+__all__ = ['ReceiptTransformer', 'BatchTransformResult', 'CategoryMatcher']
\ No newline at end of file
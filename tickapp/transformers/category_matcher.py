@@ -0,0 +1,161 @@
+# tickapp/transformers/category_matcher.py
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """Clé de comparaison : minuscules, sans accents ni ponctuation (œ -> oe)"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = text.replace("œ", "oe").replace("æ", "ae").replace("ß", "ss")
+    chars = [
+        c if c.isalnum() else " "
+        for c in text
+        if not unicodedata.combining(c)
+    ]
+    return " ".join("".join(chars).split())
+
+
+def trigrams(key: str) -> frozenset:
+    """Trigrammes d'une clé normalisée, découpés par mot comme pg_trgm"""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class CategoryMatcher:
+    """
+    Rapproche un couple (catégorie, sous-catégorie) libre du référentiel
+    item_category
+
+    Construit une fois à partir de la liste des catégories : correspondance
+    exacte par dictionnaire sur les clés normalisées, sinon similarité par
+    trigrammes (coefficient de Jaccard, comme pg_trgm) via un index inversé,
+    pondérée 0.6 pour la catégorie principale et 0.4 pour la sous-catégorie.
+    """
+
+    MAIN_WEIGHT = 0.6
+    SUB_WEIGHT = 0.4
+
+    def __init__(self, categories: Iterable[Tuple[str, str]], min_score: float = 0.35):
+        """
+        Args:
+            categories: Couples (category_main, category_sub) du référentiel
+            min_score: Score minimal d'une correspondance approchée. Le
+                Jaccard des trigrammes est plus bas que le ratio difflib :
+                0.35 accepte et rejette les mêmes requêtes que l'ancien
+                seuil difflib (> 0.5), voir scripts/benchmark_category_matcher.py
+        """
+        self.categories: List[Tuple[str, str]] = sorted(set(categories))
+        self.min_score = min_score
+
+        self._exact: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._first_by_main: Dict[str, int] = {}
+        self._mains: List[str] = []
+        self._main_grams: List[frozenset] = []
+        self._main_of: List[int] = []
+        self._sub_grams: List[frozenset] = []
+        self._main_index: Dict[str, List[int]] = defaultdict(list)
+        self._sub_index: Dict[str, List[int]] = defaultdict(list)
+        self._categories_of_main: Dict[int, List[int]] = defaultdict(list)
+
+        main_ids: Dict[str, int] = {}
+        for idx, (main, sub) in enumerate(self.categories):
+            main_key, sub_key = normalize_key(main), normalize_key(sub)
+            self._exact.setdefault((main_key, sub_key), (main, sub))
+            self._first_by_main.setdefault(main_key, idx)
+
+            if main_key not in main_ids:
+                main_ids[main_key] = len(self._mains)
+                self._mains.append(main_key)
+                grams = trigrams(main_key)
+                self._main_grams.append(grams)
+                for gram in grams:
+                    self._main_index[gram].append(main_ids[main_key])
+            self._main_of.append(main_ids[main_key])
+            self._categories_of_main[main_ids[main_key]].append(idx)
+
+            grams = trigrams(sub_key)
+            self._sub_grams.append(grams)
+            for gram in grams:
+                self._sub_index[gram].append(idx)
+
+    @staticmethod
+    def _similarities(query: frozenset, index: Dict[str, List[int]],
+                      grams: Sequence[frozenset]) -> Dict[int, float]:
+        """Similarité de Jaccard avec chaque entrée partageant au moins un trigramme"""
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query:
+            for entry in index.get(gram, ()):
+                shared[entry] += 1
+        return {
+            entry: count / (len(query) + len(grams[entry]) - count)
+            for entry, count in shared.items()
+        }
+
+    def match(self, category_main: Optional[str], category_sub: Optional[str] = None,
+              min_score: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """
+        Trouve la catégorie du référentiel la plus proche
+
+        Args:
+            min_score: Seuil de cette recherche (défaut: celui du matcher)
+
+        Returns:
+            (category_main, category_sub) ou None sous le seuil
+        """
+        return self._match_keys(normalize_key(category_main), normalize_key(category_sub), min_score)
+
+    def _match_keys(self, main_key: str, sub_key: str,
+                    min_score: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """match() sur des clés déjà normalisées"""
+        # Correspondances exactes
+        exact = self._exact.get((main_key, sub_key))
+        if exact is not None:
+            return exact
+        if not sub_key and main_key in self._first_by_main:
+            return self.categories[self._first_by_main[main_key]]
+
+        main_scores = self._similarities(trigrams(main_key), self._main_index, self._main_grams)
+        if sub_key:
+            sub_scores = self._similarities(trigrams(sub_key), self._sub_index, self._sub_grams)
+            candidates = set(sub_scores)
+            for main_id in main_scores:
+                candidates.update(self._categories_of_main[main_id])
+            scored = (
+                (self.MAIN_WEIGHT * main_scores.get(self._main_of[idx], 0.0)
+                 + self.SUB_WEIGHT * sub_scores.get(idx, 0.0), idx)
+                for idx in candidates
+            )
+        else:
+            scored = (
+                (main_scores.get(self._main_of[idx], 0.0), idx)
+                for main_id in main_scores
+                for idx in self._categories_of_main[main_id]
+            )
+
+        # Ex æquo : la première dans l'ordre du référentiel
+        best_score, best_idx = max(scored, key=lambda s: (s[0], -s[1]), default=(0.0, None))
+        if best_idx is None or best_score < (self.min_score if min_score is None else min_score):
+            return None
+        return self.categories[best_idx]
+
+    def match_many(self, queries: Iterable[Tuple[Optional[str], Optional[str]]],
+                   min_score: Optional[float] = None) -> List[Optional[Tuple[str, str]]]:
+        """
+        Rapproche un lot de couples (catégorie, sous-catégorie)
+
+        Les couples identiques après normalisation ne sont calculés qu'une fois.
+        """
+        results: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+        matches = []
+        for category_main, category_sub in queries:
+            key = (normalize_key(category_main), normalize_key(category_sub))
+            if key not in results:
+                results[key] = self._match_keys(*key, min_score)
+            matches.append(results[key])
+        return matches
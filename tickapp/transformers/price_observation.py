@@ -0,0 +1,102 @@
+# tickapp/transformers/price_observation.py
+import re
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Tuple
+
+from .category_matcher import normalize_key
+from .product_dictionary import ProductDictionary
+
+
+# Unités de contenance des libellés -> (unité de prix, facteur)
+_UNITS = {
+    "kg": ("kg", Decimal("1")),
+    "g": ("kg", Decimal("0.001")),
+    "l": ("l", Decimal("1")),
+    "dl": ("l", Decimal("0.1")),
+    "cl": ("l", Decimal("0.01")),
+    "ml": ("l", Decimal("0.001")),
+    "stk": ("pce", Decimal("1")),
+    "st": ("pce", Decimal("1")),
+    "pce": ("pce", Decimal("1")),
+    "pces": ("pce", Decimal("1")),
+    "pc": ("pce", Decimal("1")),
+    "pcs": ("pce", Decimal("1")),
+}
+
+QUANTITY_UNITS = ("kg", "l", "pce")
+
+# "1L", "500 g", "1,5l", "6x1.5L", "6 x 33cl", "10 Stk"
+_PACKAGE_SIZE = re.compile(
+    r"(?<![\w.,])(?:(\d+)\s*x\s*)?(\d+(?:[.,]\d+)?)\s*(" + "|".join(sorted(_UNITS, key=len, reverse=True)) + r")(?!\w)"
+)
+
+
+@dataclass(frozen=True)
+class PriceObservation:
+    """Prix d'un article rapporté à une unité comparable (kg, l ou pièce)"""
+    product_key: str          # Nom normalisé du produit canonique
+    product_name: str         # Libellé canonique (dictionnaire) ou libellé du ticket
+    brand: Optional[str]
+    unit_price: Decimal       # Prix unitaire du ticket
+    package_size: Decimal     # Contenance d'une unité, en quantity_unit
+    quantity_unit: str        # 'kg', 'l' ou 'pce'
+    price_per_unit: Decimal   # unit_price / package_size
+
+
+def package_size(product_name: Optional[str]) -> Optional[Tuple[Decimal, str]]:
+    """
+    Contenance lue dans le libellé ("Milch 1L" -> (1, 'l'), "6x33cl" -> (1.98, 'l'))
+
+    Returns:
+        (contenance, unité) ou None si le libellé n'en indique pas
+    """
+    # La dernière contenance du libellé est celle du conditionnement ("Bio 2 Stk 500g")
+    matches = _PACKAGE_SIZE.findall((product_name or "").casefold())
+    if not matches:
+        return None
+    count, size, unit = matches[-1]
+    quantity_unit, factor = _UNITS[unit]
+    size = (Decimal(size.replace(",", ".")) * factor * int(count or 1)).quantize(Decimal("0.001"))
+    if size <= 0:
+        return None
+    return size, quantity_unit
+
+
+def observe(product_name: str, brand: Optional[str], quantity: Decimal, unit_price: Decimal,
+            store_name: Optional[str] = None,
+            product_dictionary: Optional[ProductDictionary] = None) -> Optional[PriceObservation]:
+    """
+    Observation de prix d'un article de ticket
+
+    La contenance vient du libellé ; sans contenance, un article à quantité
+    décimale est vendu au poids (prix au kg), sinon à la pièce. Le produit
+    canonique est celui du dictionnaire de produits quand il le connaît.
+
+    Returns:
+        None pour les lignes sans prix (rabais, consignes, gratuités)
+    """
+    if unit_price is None or unit_price <= 0:
+        return None
+
+    entry = product_dictionary.lookup(product_name, store_name) if product_dictionary is not None else None
+    if entry is not None:
+        product_name, brand = entry.canonical_name, brand or entry.brand
+    product_key = normalize_key(product_name)
+    if not product_key:
+        return None
+
+    size = package_size(product_name)
+    if size is None:
+        size = (Decimal("1"), "kg" if quantity is not None and quantity != quantity.to_integral_value() else "pce")
+    size_value, quantity_unit = size
+
+    return PriceObservation(
+        product_key=product_key,
+        product_name=product_name,
+        brand=brand,
+        unit_price=unit_price,
+        package_size=size_value,
+        quantity_unit=quantity_unit,
+        price_per_unit=(unit_price / size_value).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP),
+    )
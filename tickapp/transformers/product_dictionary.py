@@ -0,0 +1,116 @@
+# tickapp/transformers/product_dictionary.py
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import Item
+from .category_matcher import normalize_key
+
+
+@dataclass(frozen=True)
+class ProductEntry:
+    """Produit connu du dictionnaire"""
+    canonical_name: str
+    brand: Optional[str]
+    category_main: str
+    category_sub: str
+    occurrences: int = 0
+
+
+class ProductDictionary:
+    """
+    Dictionnaire en mémoire : (nom normalisé, magasin) -> produit canonique
+
+    Une entrée propre au magasin prime sur l'entrée tous magasins (store_key '').
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, ProductEntry]] = ()):
+        """
+        Args:
+            entries: Triplets (normalized_name, store_key, ProductEntry)
+        """
+        self._entries: Dict[Tuple[str, str], ProductEntry] = {
+            (normalized_name, store_key): entry
+            for normalized_name, store_key, entry in entries
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, product_name: Optional[str], store_name: Optional[str] = None) -> Optional[ProductEntry]:
+        """Produit connu pour ce nom d'article (et ce magasin), ou None"""
+        name_key = normalize_key(product_name)
+        if not name_key:
+            return None
+        entry = self._entries.get((name_key, normalize_key(store_name)))
+        if entry is None:
+            entry = self._entries.get((name_key, ""))
+        return entry
+
+    def apply(self, items: List[Item], store_name: Optional[str] = None) -> List[Item]:
+        """
+        Pré-remplit la catégorie (et la marque manquante) des articles connus
+
+        Returns:
+            Articles inconnus du dictionnaire
+        """
+        unknown = []
+        for item in items:
+            entry = self.lookup(item.product_name, store_name)
+            if entry is None:
+                unknown.append(item)
+                continue
+            item.category_main, item.category_sub = entry.category_main, entry.category_sub
+            if not item.brand:
+                item.brand = entry.brand
+        return unknown
+
+    def unknown_items(self, items: List[Item], store_name: Optional[str] = None) -> List[Item]:
+        """Articles à faire catégoriser (par Claude) car absents du dictionnaire"""
+        return [item for item in items if self.lookup(item.product_name, store_name) is None]
+
+    @staticmethod
+    def learn(rows: Iterable[Tuple[str, Optional[str], Optional[str], str, str, int]],
+              min_occurrences: int = 1) -> List[Tuple[str, str, ProductEntry]]:
+        """
+        Construit les entrées à partir des articles déjà extraits
+
+        Pour chaque nom normalisé (par magasin, puis tous magasins), retient la
+        catégorie et la marque les plus fréquentes et le libellé le plus courant.
+
+        Args:
+            rows: (product_name, brand, store_name, category_main, category_sub, count)
+            min_occurrences: Nombre minimal d'articles pour créer une entrée
+
+        Returns:
+            Triplets (normalized_name, store_key, ProductEntry)
+        """
+        names: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        brands: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        categories: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+
+        for product_name, brand, store_name, category_main, category_sub, count in rows:
+            name_key = normalize_key(product_name)
+            if not name_key:
+                continue
+            # Un article sans magasin ne compte qu'une fois pour l'entrée tous magasins
+            for key in {(name_key, normalize_key(store_name)), (name_key, "")}:
+                names[key][product_name] += count
+                categories[key][(category_main, category_sub)] += count
+                if brand:
+                    brands[key][brand] += count
+
+        entries = []
+        for key, category_counts in categories.items():
+            occurrences = sum(category_counts.values())
+            if occurrences < min_occurrences:
+                continue
+            category_main, category_sub = category_counts.most_common(1)[0][0]
+            entries.append((key[0], key[1], ProductEntry(
+                canonical_name=names[key].most_common(1)[0][0],
+                brand=brands[key].most_common(1)[0][0] if brands[key] else None,
+                category_main=category_main,
+                category_sub=category_sub,
+                occurrences=occurrences
+            )))
+        return entries
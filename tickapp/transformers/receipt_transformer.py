@@ -1,19 +1,114 @@
 # tickapp/transformers/receipt_transformer.py
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+import pandas as pd
 from ..models import Store, Transaction, Item, ReceiptData
+from .product_dictionary import ProductDictionary
+
+# Colonnes des DataFrames de transform_many (ordre des colonnes COPY)
+STORE_FIELDS = {
+    "store_name": "nom", "address": "adresse", "postal_code": "code_postal",
+    "city": "ville", "country_code": "pays", "phone": "telephone",
+}
+TRANSACTION_FIELDS = {
+    "transaction_category_id": "category_id", "receipt_number": "numero_ticket",
+    "payment_method": "mode_paiement",
+}
+ITEM_FIELDS = {
+    "product_name": "nom", "product_reference": "reference", "brand": "marque",
+    "quantity": "quantite", "unit_price": "prix_unitaire", "total_price": "prix_total",
+    "vat_rate": "tva", "category_main": "categorie", "category_sub": "sous_categorie",
+}
+MONEY_COLUMNS = ["quantity", "unit_price", "total_price"]
+
+
+@dataclass
+class BatchTransformResult:
+    """
+    Résultat de ReceiptTransformer.transform_many
+
+    receipts : une ligne par ticket valide, indexée par sa position dans le lot
+    items : une ligne par article, receipt_index renvoie au ticket
+    errors : position dans le lot -> message d'erreur (tickets écartés)
+
+    Les montants restent en texte (exacts, prêts pour COPY) ; ils ne sont
+    convertis en Decimal que par to_receipt_data().
+    """
+    receipts: pd.DataFrame
+    items: pd.DataFrame
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    def to_receipt_data(self) -> List[Optional[ReceiptData]]:
+        """ReceiptData par position dans le lot (None pour les tickets en erreur)"""
+        size = len(self.receipts) + len(self.errors)
+        results: List[Optional[ReceiptData]] = [None] * size
+
+        items_by_receipt: Dict[int, List[Item]] = {}
+        for row in self.items.itertuples(index=False):
+            items_by_receipt.setdefault(row.receipt_index, []).append(Item(
+                transaction_id=0,
+                product_name=row.product_name,
+                product_reference=row.product_reference,
+                brand=row.brand,
+                quantity=Decimal(row.quantity),
+                unit_price=Decimal(row.unit_price),
+                total_price=Decimal(row.total_price),
+                vat_rate=row.vat_rate,
+                category_main=row.category_main,
+                category_sub=row.category_sub,
+                line_number=row.line_number
+            ))
+
+        for row in self.receipts.itertuples():
+            results[row.Index] = ReceiptData(
+                store=Store(**{name: getattr(row, name) for name in STORE_FIELDS}),
+                transaction=Transaction(
+                    store_id=0,
+                    message_id=row.message_id,
+                    transaction_category_id=row.transaction_category_id,
+                    receipt_number=row.receipt_number,
+                    transaction_date=row.transaction_date,
+                    transaction_time=row.transaction_time,
+                    currency=row.currency,
+                    total=Decimal(row.total),
+                    payment_method=row.payment_method,
+                    source=row.source
+                ),
+                items=items_by_receipt.get(row.Index, [])
+            )
+        return results
+
+
+def _none_if_missing(series: pd.Series) -> pd.Series:
+    """NaN/NaT/pd.NA -> None, pour des objets Python et COPY (NULL)"""
+    return series.astype(object).where(series.notna(), None)
+
+
+def _parse_money(series: pd.Series) -> tuple:
+    """
+    Montants en texte exact (comme Decimal(str(x))) et masque des valeurs invalides
+    """
+    text = series.astype(str)
+    invalid = series.isna() | pd.to_numeric(text, errors="coerce").isna()
+    return text.where(~invalid, None), invalid
+
 
 class ReceiptTransformer:
     """Transforme le JSON Claude en objets de données"""
     
     @staticmethod
-    def transform_claude_json(claude_json: dict, message_id: int = None) -> ReceiptData:
+    def transform_claude_json(claude_json: dict, message_id: int = None,
+                              product_dictionary: Optional[ProductDictionary] = None) -> ReceiptData:
         """
         Transforme le JSON de Claude en objets Python
         
         Args:
             claude_json: Le JSON retourné par Claude
             message_id: ID du message Signal (optionnel)
+            product_dictionary: Dictionnaire de produits connus (optionnel) : leur
+                catégorie remplace celle de Claude, qui peut alors être omise
             
         Returns:
             ReceiptData avec store, transaction, items
@@ -74,14 +169,129 @@ class ReceiptTransformer:
                 unit_price=Decimal(str(article["prix_unitaire"])),
                 total_price=Decimal(str(article["prix_total"])),
                 vat_rate=article.get("tva"),
-                category_main=article["categorie"],
-                category_sub=article["sous_categorie"],
+                category_main=article.get("categorie"),
+                category_sub=article.get("sous_categorie"),
                 line_number=idx
             )
             items.append(item)
         
+        # 5. Pré-remplir les catégories des produits déjà connus
+        if product_dictionary is not None:
+            product_dictionary.apply(items, store.store_name)
+        
         return ReceiptData(
             store=store,
             transaction=transaction,
             items=items
-        )
\ No newline at end of file
+        )
+    
+    @staticmethod
+    def transform_many(claude_jsons: Sequence[dict],
+                       message_ids: Optional[Sequence[Optional[int]]] = None,
+                       product_dictionary: Optional[ProductDictionary] = None) -> BatchTransformResult:
+        """
+        Transforme un lot d'extractions Claude en colonnes (pandas)
+        
+        Seul l'aplatissement du JSON est fait ligne à ligne : dates, heures et
+        montants sont parsés par colonne. Un ticket invalide (champ requis
+        manquant, date ou montant illisible) est écarté avec son erreur sans
+        interrompre le lot.
+        
+        Args:
+            claude_jsons: Les JSON retournés par Claude
+            message_ids: ID du message Signal de chaque extraction (optionnel)
+            product_dictionary: Dictionnaire de produits connus (optionnel)
+        
+        Returns:
+            BatchTransformResult (DataFrames receipts/items et erreurs par ticket)
+        """
+        errors: Dict[int, str] = {}
+        valid_jsons = []
+        receipt_indexes = []
+        articles = []
+        article_receipts = []
+        line_numbers = []
+        
+        # 1. Vérifier la structure et aplatir les articles (seule boucle par ticket)
+        for index, claude_json in enumerate(claude_jsons):
+            try:
+                claude_json["magasin"]["nom"], claude_json["transaction"]["date"]
+                claude_json["devise"], claude_json["total"]
+                ticket_articles = list(claude_json["articles"])
+                if not all(isinstance(article, dict) for article in ticket_articles):
+                    raise TypeError("articles")
+            except (KeyError, TypeError, AttributeError) as e:
+                errors[index] = f"Champ manquant ou invalide: {e}"
+                continue
+            valid_jsons.append(claude_json)
+            receipt_indexes.append(index)
+            articles.extend(ticket_articles)
+            article_receipts.extend([index] * len(ticket_articles))
+            line_numbers.extend(range(1, len(ticket_articles) + 1))
+        
+        # Colonnes construites d'un bloc ; dtype object : pas de conversion int -> float quand une valeur manque
+        magasins = [claude_json["magasin"] for claude_json in valid_jsons]
+        transactions = [claude_json["transaction"] for claude_json in valid_jsons]
+        receipts = pd.DataFrame({
+            **{column: [m.get(key) for m in magasins] for column, key in STORE_FIELDS.items()},
+            **{column: [t.get(key) for t in transactions] for column, key in TRANSACTION_FIELDS.items()},
+            "message_id": [message_ids[i] for i in receipt_indexes] if message_ids is not None else None,
+            "date": [t["date"] for t in transactions],
+            "heure": [t.get("heure") for t in transactions],
+            "currency": [claude_json["devise"] for claude_json in valid_jsons],
+            "total": [claude_json["total"] for claude_json in valid_jsons],
+        }, index=pd.Index(receipt_indexes, dtype=object, name="receipt_index"), dtype=object)
+        items = pd.DataFrame({
+            "receipt_index": article_receipts,
+            "line_number": line_numbers,
+            **{column: [a.get(key) for a in articles] for column, key in ITEM_FIELDS.items()},
+        }, dtype=object)
+        
+        def reject(indexes, message):
+            for index in indexes:
+                errors.setdefault(int(index), message)
+        
+        # 2. Dates (requises) et heures (HH:MM:SS puis HH:MM, sinon None)
+        dates = pd.to_datetime(receipts["date"], format="%Y-%m-%d", errors="coerce")
+        reject(receipts.index[dates.isna()], "Date invalide")
+        receipts["transaction_date"] = _none_if_missing(dates.dt.date)
+        
+        heures = receipts["heure"].where(receipts["heure"].astype(bool) & receipts["heure"].notna())
+        times = pd.to_datetime(heures, format="%H:%M:%S", errors="coerce")
+        times = times.fillna(pd.to_datetime(heures, format="%H:%M", errors="coerce"))
+        receipts["transaction_time"] = _none_if_missing(times.dt.time)
+        
+        # 3. Montants
+        receipts["total"], invalid = _parse_money(receipts["total"])
+        reject(receipts.index[invalid], "Total invalide")
+        for column in MONEY_COLUMNS:
+            items[column], invalid = _parse_money(items[column])
+            reject(items.loc[invalid, "receipt_index"], f"Article: {column} invalide")
+        reject(items.loc[items["product_name"].isna(), "receipt_index"], "Article: nom manquant")
+        
+        # 4. Écarter les tickets en erreur et leurs articles
+        receipts = receipts.drop(index=[i for i in errors if i in receipts.index])
+        items = items[~items["receipt_index"].isin(list(errors))]
+        receipts = receipts.drop(columns=["date", "heure"])
+        receipts["source"] = "signal"
+        for column in [*STORE_FIELDS, *TRANSACTION_FIELDS, "message_id"]:
+            receipts[column] = _none_if_missing(receipts[column])
+        for column in ITEM_FIELDS:
+            items[column] = _none_if_missing(items[column])
+        
+        # 5. Pré-remplir les catégories (une recherche par couple article/magasin distinct)
+        if product_dictionary is not None and not items.empty:
+            stores = items["receipt_index"].map(receipts["store_name"])
+            keys = pd.DataFrame({"product_name": items["product_name"], "store_name": stores})
+            entries = {
+                key: product_dictionary.lookup(*key)
+                for key in keys.drop_duplicates().itertuples(index=False, name=None)
+            }
+            found = pd.Series([entries[key] for key in keys.itertuples(index=False, name=None)], index=items.index)
+            known = found.notna()
+            items.loc[known, "category_main"] = found[known].map(lambda e: e.category_main)
+            items.loc[known, "category_sub"] = found[known].map(lambda e: e.category_sub)
+            fill_brand = known & items["brand"].isna()
+            items.loc[fill_brand, "brand"] = found[fill_brand].map(lambda e: e.brand)
+        
+        return BatchTransformResult(receipts=receipts, items=items.reset_index(drop=True), errors=errors)
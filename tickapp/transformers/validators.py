@@ -1,14 +1,33 @@
 # tickapp/transformers/validators.py
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..models import Item
+from .category_matcher import CategoryMatcher
+from .receipt_transformer import ReceiptTransformer
 
 class DataValidator:
     """Helpers pour valider les données avant insertion"""
     
+    # Catégorie de repli des articles dont la catégorie est inconnue
+    FALLBACK_CATEGORY = ("Divers", "Divers")
+    # La catégorie principale seule (poids 0.6) ne suffit pas : la
+    # sous-catégorie doit aussi ressembler à une sous-catégorie existante
+    CATEGORY_MIN_SCORE = 0.75
+    
+    VALID_CURRENCIES = ["CHF", "EUR", "USD", "GBP"]
+    # Écart toléré : arrondi suisse à 5 centimes, articles au poids (1 %)
+    AMOUNT_TOLERANCE = 0.05
+    LINE_RELATIVE_TOLERANCE = 0.01
+    OLDEST_RECEIPT_DATE = date(2000, 1, 1)
+    
     @staticmethod
     def validate_currency(currency: str) -> str:
         """Valide et normalise la devise"""
-        valid_currencies = ["CHF", "EUR", "USD", "GBP"]
+        valid_currencies = DataValidator.VALID_CURRENCIES
         currency = currency.upper()
         if currency not in valid_currencies:
             raise ValueError(f"Devise invalide: {currency}")
@@ -25,4 +44,119 @@ class DataValidator:
     def validate_category(category_main: str, category_sub: str) -> tuple[str, str]:
         """Vérifie que la catégorie existe dans le référentiel"""
         # Ici tu pourrais vérifier contre la table categories
-        return category_main, category_sub
\ No newline at end of file
+        return category_main, category_sub
+    
+    @staticmethod
+    def validate_categories(items: List[Item], matcher: CategoryMatcher,
+                            fallback: Tuple[str, str] = FALLBACK_CATEGORY) -> List[Item]:
+        """
+        Rapproche en lot la catégorie de chaque article d'une catégorie active
+        existante. Les articles sans correspondance passent dans la catégorie
+        de repli et gardent la catégorie proposée pour revue, telle quelle :
+        une catégorie absente est enregistrée vide ('') et non NULL, pour que
+        l'article reste dans la file de revue et hors de l'apprentissage du
+        dictionnaire de produits.
+        
+        Returns:
+            Articles signalés pour revue
+        """
+        matches = matcher.match_many(
+            ((item.category_main, item.category_sub) for item in items),
+            min_score=DataValidator.CATEGORY_MIN_SCORE
+        )
+        flagged = []
+        for item, match in zip(items, matches):
+            if match is None:
+                item.proposed_category_main = (item.category_main or "")[:100]
+                item.proposed_category_sub = (item.category_sub or "")[:100]
+                match = fallback
+                flagged.append(item)
+            item.category_main, item.category_sub = match
+        return flagged
+    
+    @staticmethod
+    def check_consistency(receipts: pd.DataFrame, items: pd.DataFrame,
+                          today: Optional[date] = None) -> pd.DataFrame:
+        """
+        Contrôle de cohérence vectorisé d'un lot de tickets (DataFrames de
+        ReceiptTransformer.transform_many)
+        
+        Vérifie par ticket :
+        - total_ok : somme des prix des articles = total du ticket
+        - lines_ok : quantité × prix unitaire = prix total, pour chaque article
+        - date_ok : date ni future ni antérieure à OLDEST_RECEIPT_DATE
+        - currency_ok : devise connue
+        
+        Returns:
+            DataFrame indexé comme receipts : items_total, total_gap,
+            bad_lines (numéros de ligne), les 4 contrôles, score (0-1),
+            passed et issues (description des problèmes)
+        """
+        today = today or date.today()
+        report = pd.DataFrame(index=receipts.index)
+        
+        # Articles : montants en float (la tolérance absorbe l'arrondi binaire)
+        quantity = pd.to_numeric(items["quantity"], errors="coerce")
+        unit_price = pd.to_numeric(items["unit_price"], errors="coerce")
+        total_price = pd.to_numeric(items["total_price"], errors="coerce")
+        line_gap = (quantity * unit_price - total_price).abs()
+        line_bad = ~(line_gap <= DataValidator.AMOUNT_TOLERANCE
+                     + DataValidator.LINE_RELATIVE_TOLERANCE * total_price.abs())
+        
+        receipt_index = items["receipt_index"].astype("int64")
+        items_total = total_price.groupby(receipt_index).sum()
+        bad_lines = items.loc[line_bad, "line_number"].groupby(receipt_index[line_bad]).agg(list)
+        
+        total = pd.to_numeric(receipts["total"], errors="coerce")
+        report.index = report.index.astype("int64")
+        report["items_total"] = items_total.reindex(report.index, fill_value=0.0).values
+        report["total_gap"] = (report["items_total"] - total.values).round(2)
+        report["bad_lines"] = bad_lines.reindex(report.index).map(lambda v: v if isinstance(v, list) else [])
+        
+        report["total_ok"] = (report["total_gap"].abs() <= DataValidator.AMOUNT_TOLERANCE).values
+        report["lines_ok"] = report["bad_lines"].map(len) == 0
+        dates = pd.to_datetime(receipts["transaction_date"], errors="coerce")
+        report["date_ok"] = (
+            (dates >= pd.Timestamp(DataValidator.OLDEST_RECEIPT_DATE))
+            & (dates <= pd.Timestamp(today + timedelta(days=1)))
+        ).values
+        report["currency_ok"] = receipts["currency"].isin(DataValidator.VALID_CURRENCIES).values
+        
+        checks = ["total_ok", "lines_ok", "date_ok", "currency_ok"]
+        report["score"] = report[checks].mean(axis=1)
+        report["passed"] = report[checks].all(axis=1)
+        
+        def describe(row) -> List[str]:
+            issues = []
+            if not row.total_ok:
+                issues.append(f"La somme des articles ({row.items_total:.2f}) diffère du total de {row.total_gap:+.2f}")
+            if not row.lines_ok:
+                issues.append(f"Quantité × prix unitaire ≠ prix total aux lignes {row.bad_lines}")
+            if not row.date_ok:
+                issues.append("Date du ticket absente, future ou invraisemblable")
+            if not row.currency_ok:
+                issues.append("Devise inconnue")
+            return issues
+        
+        report["issues"] = [describe(row) for row in report.itertuples()]
+        report.index = receipts.index
+        return report
+    
+    @staticmethod
+    def check_extraction(claude_json: Dict, today: Optional[date] = None) -> Dict:
+        """
+        Contrôle de cohérence d'une extraction Claude
+        
+        Returns:
+            {"score", "passed", "issues"} ; une extraction non transformable
+            a un score de 0
+        """
+        batch = ReceiptTransformer.transform_many([claude_json])
+        if batch.errors:
+            return {"score": 0.0, "passed": False, "issues": list(batch.errors.values())}
+        report = DataValidator.check_consistency(batch.receipts, batch.items, today=today).iloc[0]
+        return {
+            "score": float(report["score"]),
+            "passed": bool(report["passed"]),
+            "issues": report["issues"]
+        }
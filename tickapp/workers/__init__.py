@@ -0,0 +1,7 @@
+# tickapp/workers/__init__.py
+"""
+Workers hors Dagster qui consomment la file receipt_job
+"""
+from .receipt_worker import ReceiptWorker
+
+__all__ = ["ReceiptWorker"]
@@ -0,0 +1,240 @@
+# tickapp/workers/receipt_worker.py
+"""
+Worker qui consomme la file receipt_job
+
+Plusieurs processus (sur une ou plusieurs machines) peuvent tourner en
+parallèle : chaque job est réclamé avec FOR UPDATE SKIP LOCKED, gardé par un
+bail prolongé en heartbeat, et terminé dans la même transaction que
+l'insertion du ticket.
+
+Usage:
+    python -m tickapp.workers.receipt_worker
+    python -m tickapp.workers.receipt_worker --enqueue-pending --once
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+from tickapp.clients.database_client import DatabaseClient, LeaseLostError
+from tickapp.clients.claude_client import ClaudeClient
+from tickapp.clients.prompt_client import PromptClient
+from tickapp.clients.signal_client import Attachment, Message
+from tickapp.transformers.receipt_transformer import ReceiptTransformer
+from tickapp.transformers.validators import DataValidator
+
+load_dotenv()
+
+
+class _Heartbeat(threading.Thread):
+    """Thread qui prolonge le bail d'un job pendant son traitement"""
+
+    def __init__(self, db_client: DatabaseClient, job_id: int, worker_id: str, lease_seconds: int):
+        super().__init__(daemon=True)
+        self.db_client = db_client
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        interval = max(self.lease_seconds / 3, 1)
+        while not self._stop_event.wait(interval):
+            try:
+                if not self.db_client.heartbeat_receipt_job(self.job_id, self.worker_id, self.lease_seconds):
+                    self.lost.set()
+                    return
+            except Exception as e:
+                # Erreur transitoire : le prochain heartbeat réessaiera avant expiration du bail
+                print(f"⚠️  Heartbeat job {self.job_id} échoué : {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ReceiptWorker:
+    """
+    Consomme les jobs receipt_job : Claude -> transformation -> insertion
+    """
+
+    def __init__(self, db_client: DatabaseClient, prompt_client: PromptClient,
+                 api_key: str, worker_id: Optional[str] = None,
+                 lease_seconds: int = 300, retry_delay: float = 30.0):
+        """
+        Args:
+            db_client: Client base de données
+            prompt_client: Client pour générer le prompt d'extraction
+            api_key: Clé API Anthropic
+            worker_id: Identifiant du worker (défaut: hostname-pid-uuid)
+            lease_seconds: Durée du bail d'un job (visibility timeout)
+            retry_delay: Délai de base entre deux tentatives d'un job
+        """
+        self.db_client = db_client
+        self.prompt_client = prompt_client
+        self.api_key = api_key
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+
+    def process_job(self, job_id: int, message_id: int) -> int:
+        """
+        Traite un job réclamé et le termine en base
+
+        Returns:
+            transaction_id
+        """
+        message = self.db_client.get_signal_message(message_id)
+        if message is None:
+            raise ValueError(f"Message {message_id} introuvable")
+
+        prompt = self.prompt_client.get_prompt()
+        json_response = self.extract(message_id, message, prompt.text)
+
+        receipt_data = ReceiptTransformer.transform_claude_json(
+            claude_json=json_response,
+            message_id=message_id,
+            product_dictionary=self.prompt_client.get_product_dictionary()
+        )
+        receipt_data.transaction.prompt_version = prompt.version
+        DataValidator.validate_categories(receipt_data.items, self.prompt_client.get_category_matcher())
+
+        return self.db_client.complete_receipt_job(
+            job_id=job_id,
+            worker_id=self.worker_id,
+            receipt_data=receipt_data,
+            message_id=message_id
+        )
+
+    def extract(self, message_id: int, message: Message, prompt_text: str) -> Dict:
+        """
+        Extraction Claude des images d'un message, vérifiée par verify_extraction
+
+        Returns:
+            JSON de l'extraction
+        """
+        images = [
+            att for att in message.attachments
+            if att.path and att.content_type and att.content_type.startswith("image/")
+        ]
+        if not images:
+            raise ValueError(f"Le message {message_id} n'a pas d'images de ticket")
+
+        claude_client = ClaudeClient(api_key=self.api_key)
+        claude_client.add_prompt(prompt_text)
+        for attachment in images:
+            claude_client.add_image(str(attachment.path))
+        return self.verify_extraction(claude_client.call_json(), images)
+
+    def verify_extraction(self, json_response: Dict, images: List[Attachment]) -> Dict:
+        """
+        Ré-extraction ciblée si l'extraction est incohérente (voir
+        DataValidator.check_extraction) ; garde la plus cohérente des deux
+        """
+        report = DataValidator.check_extraction(json_response)
+        if report["passed"]:
+            return json_response
+
+        print(f"⚠️  [{self.worker_id}] Extraction incohérente, ré-extraction ciblée : {'; '.join(report['issues'])}")
+        claude_client = ClaudeClient(api_key=self.api_key)
+        claude_client.add_prompt(PromptClient.generate_verification_prompt(json_response, report["issues"]))
+        for attachment in images:
+            claude_client.add_image(str(attachment.path))
+        retry_response = claude_client.call_json()
+
+        if DataValidator.check_extraction(retry_response)["score"] > report["score"]:
+            return retry_response
+        return json_response
+
+    def run_once(self) -> bool:
+        """
+        Réclame et traite un seul job
+
+        Returns:
+            False si la file était vide
+        """
+        claimed = self.db_client.claim_receipt_job(self.worker_id, self.lease_seconds)
+        if claimed is None:
+            return False
+
+        job_id, message_id, attempts = claimed
+        print(f"📥 [{self.worker_id}] Job {job_id} (message {message_id}, tentative {attempts})")
+
+        heartbeat = _Heartbeat(self.db_client, job_id, self.worker_id, self.lease_seconds)
+        heartbeat.start()
+        try:
+            transaction_id = self.process_job(job_id, message_id)
+            print(f"✅ [{self.worker_id}] Job {job_id} -> transaction {transaction_id}")
+        except LeaseLostError as e:
+            # Un autre worker a repris le job : ne rien écrire
+            print(f"⚠️  [{self.worker_id}] {e}")
+        except Exception as e:
+            if heartbeat.lost.is_set():
+                print(f"⚠️  [{self.worker_id}] Bail perdu pour le job {job_id}, erreur ignorée : {e}")
+            else:
+                status = self.db_client.fail_receipt_job(job_id, self.worker_id, str(e), self.retry_delay)
+                print(f"❌ [{self.worker_id}] Job {job_id} en échec ({status}) : {e}")
+        finally:
+            heartbeat.stop()
+        return True
+
+    def run_forever(self, poll_interval: float = 5.0, stop_when_empty: bool = False):
+        """
+        Boucle principale : traite les jobs tant qu'il y en a, puis attend
+
+        Args:
+            poll_interval: Attente (secondes) quand la file est vide
+            stop_when_empty: Quitter dès que la file est vide
+        """
+        print(f"🚀 Worker {self.worker_id} démarré")
+        while True:
+            if self.run_once():
+                continue
+            if stop_when_empty:
+                print(f"🏁 Worker {self.worker_id} : file vide, arrêt")
+                return
+            time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la file receipt_job")
+    parser.add_argument("--worker-id", default=None, help="Identifiant du worker")
+    parser.add_argument("--lease-seconds", type=int, default=300, help="Durée du bail d'un job")
+    parser.add_argument("--retry-delay", type=float, default=30.0, help="Délai de base entre deux tentatives")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Attente quand la file est vide")
+    parser.add_argument("--enqueue-pending", action="store_true",
+                        help="Créer les jobs des messages non traités avant de démarrer")
+    parser.add_argument("--once", action="store_true", help="S'arrêter quand la file est vide")
+    args = parser.parse_args()
+
+    db_params = dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5434")),
+        database=os.getenv("DB_NAME", "receipt_processing"),
+        user=os.getenv("DB_USER", "receipt_user"),
+        password=os.getenv("DB_PASSWORD", "SuperSecretPassword123!")
+    )
+    db_client = DatabaseClient(**db_params)
+
+    if args.enqueue_pending:
+        count = db_client.enqueue_pending_messages()
+        print(f"📨 {count} job(s) ajouté(s) à la file")
+
+    worker = ReceiptWorker(
+        db_client=db_client,
+        prompt_client=PromptClient(**db_params),
+        api_key=os.getenv("ANTHROPIC_API_KEY"),
+        worker_id=args.worker_id,
+        lease_seconds=args.lease_seconds,
+        retry_delay=args.retry_delay
+    )
+    worker.run_forever(poll_interval=args.poll_interval, stop_when_empty=args.once)
+
+
+if __name__ == "__main__":
+    main()